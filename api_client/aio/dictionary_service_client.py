@@ -0,0 +1,42 @@
+import urllib.parse
+import logging
+from api_client.dictionary_service_client import PING_URL_PATH
+from api_client.aio.security import AsyncSession
+
+
+class AsyncDictionaryServiceClient(object):
+    def __init__(self, session: AsyncSession, service_base_url):
+        self.session = session
+        self.service_base_url = service_base_url
+
+    async def import_file(self, file_management_file_id, job_name, overwrite=False):
+        url_path = f'/dictionary/v1/import/{file_management_file_id}/jobs'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+
+        params = {
+            'jobname': job_name,
+            'overwrite': str(overwrite).lower()
+        }
+
+        async with self.session.transport.post(
+                url,
+                params=params,
+                headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            job_info = await response.json(content_type=None)
+
+        result = job_info['jobId']
+        return result
+
+    async def ping(self):
+        url_path = PING_URL_PATH
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url) as response:
+            if response.ok:
+                logging.info(f"Dictionary service connectivity test to '{self.service_base_url}' - PASSED")
+                return True
+            else:
+                logging.error(
+                    f"Dictionary service connectivity test to '{self.service_base_url}' - FAILED. "
+                    f"Status code: {response.status}; Reason: {response.reason}")
+                return False
@@ -0,0 +1,132 @@
+import os
+import asyncio
+import contextlib
+import urllib.parse
+import logging
+from api_client.file_management_service_client import PING_URL_PATH
+from api_client.file_management_service_client import DOWNLOAD_CHUNK_SIZE
+from api_client.multipart_encoder import MultipartFileEncoder
+from api_client.aio.security import AsyncSession
+
+
+# Size of the chunks the uploaded files are read from the disk with
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class AsyncFileManagementServiceClient(object):
+    def __init__(self, session: AsyncSession, service_base_url):
+        self.session = session
+        self.service_base_url = service_base_url
+
+    async def import_file(self, source_file_path, file_management_file_name, file_management_file_path):
+        url_path = "/fms/v1/files/job/import"
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+
+        upload_data = {'path': file_management_file_path}
+        with open(source_file_path, 'rb') as source_file:
+            # Stream the file in chunks instead of building the whole multipart body in memory
+            upload_body = MultipartFileEncoder(
+                upload_data,
+                file_management_file_name,
+                os.path.basename(source_file_path),
+                source_file)
+
+            headers = await self.session.get_auth_header()
+            headers['Content-Type'] = upload_body.content_type
+            headers['Content-Length'] = str(len(upload_body))
+
+            async with self.session.transport.post(
+                    url,
+                    data=AsyncFileManagementServiceClient.iter_body(upload_body),
+                    headers=headers) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+
+        return result
+
+    async def download_job_import_error_file(self, job_id, destination_file_path):
+        url = self.get_job_import_error_file_url(job_id)
+        await self.download_file(url, destination_file_path)
+
+    async def retrieve_job_import_error_file_content(self, job_id):
+        url = self.get_job_import_error_file_url(job_id)
+
+        async with self.session.transport.get(url, headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            result = await response.read()
+
+        return result
+
+    def get_job_import_error_file_url(self, job_id):
+        url_path = f'/fms/v1/files/job/import/{job_id}'
+        result = urllib.parse.urljoin(self.service_base_url, url_path)
+        return result
+
+    async def download_analysis_result_file(self, analysis_id, destination_file_path):
+        url = self.get_analysis_result_file_url(analysis_id)
+        await self.download_file(url, destination_file_path)
+
+    async def retrieve_analysis_result_file_content(self, analysis_id):
+        url = self.get_analysis_result_file_url(analysis_id)
+
+        async with self.session.transport.get(url, headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            result = await response.read()
+
+        return result
+
+    def get_analysis_result_file_url(self, analysis_id):
+        url_path = f'/fms/v1/files/job/analyses/{analysis_id}'
+        result = urllib.parse.urljoin(self.service_base_url, url_path)
+        return result
+
+    async def download_file(self, url, destination_file_path):
+        """
+        Streams the file in fixed-size chunks to a temporary file next to the destination one.
+        The disk writes run in the default executor, so the event loop is not blocked.
+        The temporary file is atomically renamed to the destination file on success and deleted on failure.
+        :param url: URL of the file to download
+        :param destination_file_path: Destination file path on the client side
+        """
+        temp_file_path = f'{destination_file_path}.part'
+        loop = asyncio.get_running_loop()
+
+        try:
+            with open(temp_file_path, 'wb') as temp_file:
+                async with self.session.transport.get(
+                        url,
+                        headers=await self.session.get_auth_header()) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await loop.run_in_executor(None, temp_file.write, chunk)
+
+            os.replace(temp_file_path, destination_file_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_file_path)
+            raise
+
+    async def ping(self):
+        url_path = PING_URL_PATH
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url) as response:
+            if response.ok:
+                logging.info(f"File Management service connectivity test to '{self.service_base_url}' - PASSED")
+                return True
+            else:
+                logging.error(
+                    f"File Management service connectivity test to '{self.service_base_url}' - FAILED. "
+                    f"Status code: {response.status}; Reason: {response.reason}")
+                return False
+
+    @staticmethod
+    async def iter_body(upload_body):
+        """
+        Reads the request body in the default executor, so the disk reads do not block the event loop
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, upload_body.read, UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,129 @@
+import asyncio
+import urllib.parse
+import aiohttp
+from api_client.http_transport import HttpTransportSettings
+from api_client.job_polling import parse_retry_after
+from api_client.retry_policy import ServiceCallGuard
+from api_client.retry_policy import RETRYABLE_STATUS_CODES
+from api_client.retry_policy import MAX_RETRY_AFTER_IN_SECONDS
+from api_client.retry_policy import get_service_name
+
+
+class AsyncHttpTransport(object):
+    """
+    Pooled, keep-alive HTTP transport of the asyncio clients. The connection limits, the retries
+    and the circuit breakers are taken from the same settings as the blocking transport,
+    proxies are applied per URL scheme.
+    """
+    def __init__(self, settings: HttpTransportSettings = None, proxies=None):
+        """
+        :param settings: Connection pool settings; None - default settings
+        :param proxies: Proxy URL per URL scheme, e.g. {'https': 'http://proxy.example.com:1234'}
+        """
+        self.settings = settings or HttpTransportSettings()
+        self.proxies = proxies or {}
+        self.service_call_guard = ServiceCallGuard(self.settings.retry_policy)
+        self.rate_limiter = self.settings.rate_limiter
+        self.client_session = None
+
+    def get_client_session(self):
+        # aiohttp binds the session to the running event loop, so it's created on the first request
+        if self.client_session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.settings.pool_connections * self.settings.pool_maxsize,
+                limit_per_host=self.settings.pool_maxsize,
+                force_close=not self.settings.keep_alive)
+            self.client_session = aiohttp.ClientSession(connector=connector)
+
+        return self.client_session
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends the request. The result is used as an async context manager which releases the connection.
+        """
+        proxy = self.proxies.get(urllib.parse.urlsplit(url).scheme)
+        if proxy:
+            kwargs.setdefault('proxy', proxy)
+
+        result = AsyncRetryingRequest(self, method, url, kwargs)
+        return result
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    async def close(self):
+        if self.client_session is not None:
+            await self.client_session.close()
+            self.client_session = None
+
+
+class AsyncRetryingRequest(object):
+    """
+    Request sent with the transport's retry policy, the same as by the blocking HttpTransport
+    """
+    def __init__(self, transport: AsyncHttpTransport, method, url, kwargs):
+        self.transport = transport
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.response = None
+
+    async def __aenter__(self):
+        service_call_guard = self.transport.service_call_guard
+        retry_policy = service_call_guard.retry_policy
+        service_name = get_service_name(self.url)
+        # Async generators are streamed bodies as well
+        data = self.kwargs.get('data')
+        is_retryable = retry_policy.is_retryable_request(self.method, data) and not hasattr(data, '__aiter__')
+        retry_number = 0
+
+        while True:
+            is_trial_request = service_call_guard.before_request(service_name)
+            try:
+                if self.transport.rate_limiter is not None:
+                    # The bucket files are updated in the executor, the reserved slot is awaited on the event loop
+                    wait_time = await asyncio.get_running_loop().run_in_executor(
+                        None, self.transport.rate_limiter.reserve, self.url)
+                    await asyncio.sleep(wait_time)
+                response = await self.transport.get_client_session().request(self.method, self.url, **self.kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                service_call_guard.record_failure(service_name)
+                if not is_retryable or retry_number >= retry_policy.max_retries:
+                    raise
+                reason = type(e).__name__
+                delay = retry_policy.get_delay(retry_number)
+            except BaseException:
+                # No outcome, e.g. the task has been cancelled; the circuit must not stay half-open
+                if is_trial_request:
+                    service_call_guard.cancel_trial_request(service_name)
+                raise
+            else:
+                service_call_guard.record_response(service_name, response.status)
+                if response.status not in RETRYABLE_STATUS_CODES \
+                        or not is_retryable \
+                        or retry_number >= retry_policy.max_retries:
+                    self.response = response
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER_IN_SECONDS:
+                    self.response = response
+                    return response
+                reason = response.status
+                delay = retry_policy.get_delay(retry_number, retry_after)
+                response.release()
+
+            retry_number += 1
+            service_call_guard.record_retry(service_name, self.method, self.url, reason, retry_number, delay)
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, *args):
+        self.response.release()
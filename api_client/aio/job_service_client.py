@@ -0,0 +1,171 @@
+import time
+import asyncio
+import urllib.parse
+import logging
+import aiohttp
+from api_client.job_polling import JobPollScheduler
+from api_client.job_polling import parse_retry_after
+from api_client.job_service_client import PING_URL_PATH
+from api_client.job_waiter import JobWaitTimeoutError
+from api_client.job_waiter import DEFAULT_MAX_CONCURRENT_POLLS
+from api_client.retry_policy import CircuitBreakerOpenError
+from api_client.retry_policy import RETRYABLE_STATUS_CODES
+from api_client.aio.security import AsyncSession
+
+
+class AsyncJobServiceClient(object):
+    def __init__(self, session: AsyncSession, service_base_url, max_concurrent_polls=DEFAULT_MAX_CONCURRENT_POLLS):
+        """
+        :param session: Authentication session
+        :param service_base_url: Job service base URL
+        :param max_concurrent_polls: Maximum number of job status requests in flight across all awaited jobs
+        """
+        self.session = session
+        self.service_base_url = service_base_url
+        self.max_concurrent_polls = max_concurrent_polls
+        # The semaphore belongs to an event loop, which may not be running yet (see get_poll_semaphore)
+        self.poll_semaphore = None
+        self.poll_semaphore_loop = None
+
+    async def get_job(self, job_id):
+        url_path = f'/job/v1/jobs/{job_id}'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url, headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            jobs_status = await response.json(content_type=None)
+
+        return jobs_status
+
+    async def poll_job(self, job_id):
+        """
+        Gets job status for polling
+        :param job_id: Job id
+        :return: Job status (None - the service is throttling the requests or is temporarily unavailable)
+         and the delay in seconds requested by the service before the next poll (None - not requested)
+        """
+        url_path = f'/job/v1/jobs/{job_id}'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        headers = await self.session.get_auth_header()
+        # A long wait must outlive the service outages, the job is polled again later
+        try:
+            async with self.get_poll_semaphore():
+                async with self.session.transport.get(url, headers=headers) as response:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status in RETRYABLE_STATUS_CODES:
+                        logging.warning(
+                            f"Job status (job id: '{job_id}') has not been received. Status code: {response.status}")
+                        return None, retry_after
+                    response.raise_for_status()
+
+                    result = await response.json(content_type=None), retry_after
+        except CircuitBreakerOpenError as e:
+            return None, e.retry_after_in_seconds
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            logging.warning(f"Job status (job id: '{job_id}') has not been received. Error: {e}")
+            return None, None
+
+        return result
+
+    def get_poll_semaphore(self):
+        """
+        Gets the semaphore bounding the polls in flight. It's created in the running event loop, since before
+        Python 3.10 it's bound to the loop current at its creation, e.g. not the one started by asyncio.run().
+        """
+        loop = asyncio.get_running_loop()
+        if self.poll_semaphore_loop is not loop:
+            self.poll_semaphore = asyncio.Semaphore(self.max_concurrent_polls)
+            self.poll_semaphore_loop = loop
+
+        return self.poll_semaphore
+
+    async def wait_job(self, job_id, wait_timeout_in_seconds, job_duration_history=None, submit_time=None):
+        """
+        Waits until job is complete successfully or with failures. The job is polled on the same adaptive
+        schedule as by the blocking JobWaiter; any number of jobs can be awaited concurrently,
+        the number of polls in flight is bounded by the client.
+        :param job_id: Job id
+        :param wait_timeout_in_seconds: Wait time on the client side
+        :param job_duration_history: Recorded durations of the past jobs (see JobWaiter)
+        :param submit_time: Monotonic time the job has been submitted at; None - the job duration is not recorded
+         (see JobWaiter.add)
+        :return: Job final status
+        """
+        poll_scheduler = JobPollScheduler()
+        wait_begin_time = time.monotonic()
+        poll_count = 0
+        previous_poll_time = None
+
+        while True:
+            poll_time = time.monotonic()
+            job_status, retry_after = await self.poll_job(job_id)
+            poll_count += 1
+            wait_duration = time.monotonic() - wait_begin_time
+
+            if job_status is not None and job_status['status'] != 'RUNNING':
+                # The job has finished somewhere between the previous poll and this one
+                detection_lag = poll_time - previous_poll_time if previous_poll_time is not None else 0
+                if job_duration_history is not None and submit_time is not None:
+                    job_duration_history.record(job_status['type'], time.monotonic() - submit_time)
+                logging.info(
+                    f"Job wait (job id: '{job_id}') has finished in {wait_duration:.1f} s "
+                    f"after {poll_count} polls; detection lag: up to {detection_lag:.1f} s.")
+                return job_status
+
+            # The predicted duration is counted from the job submission (see JobWaiter)
+            if job_status is not None and poll_count == 1 and job_duration_history is not None \
+                    and submit_time is not None:
+                poll_scheduler.predicted_duration_in_seconds = \
+                    job_duration_history.predict_duration(job_status['type'])
+
+            if wait_duration >= wait_timeout_in_seconds:
+                raise JobWaitTimeoutError(
+                    f"Job wait has been terminated by timeout. "
+                    f"Job id: {job_id}; timeout: {wait_timeout_in_seconds} s.")
+
+            previous_poll_time = poll_time
+            # Put less load on the job service. Make a delay before the next call
+            job_duration = time.monotonic() - submit_time if submit_time is not None else wait_duration
+            delay = poll_scheduler.next_delay(job_duration, retry_after)
+            delay = min(delay, wait_timeout_in_seconds - wait_duration)
+            await asyncio.sleep(delay)
+
+    async def wait_jobs(self, job_ids, wait_timeout_in_seconds, job_duration_history=None):
+        """
+        Waits for the jobs concurrently. Duplicate job ids are awaited once.
+        Closing the iterator early cancels the waits which have not finished.
+        :param job_ids: Ids of the jobs to wait for
+        :param wait_timeout_in_seconds: Wait time of every job on the client side
+        :param job_duration_history: Recorded durations of the past jobs (see JobWaiter)
+        :return: Async iterator of job id, job final status and the wait error in the order the jobs reach
+         terminal state or their waits fail (see JobWaiter.iter_completed)
+        """
+        async def wait_job(job_id):
+            try:
+                job_status = await self.wait_job(job_id, wait_timeout_in_seconds, job_duration_history)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The wait of this job has failed, e.g. its status is refused or it has timed out
+                return job_id, None, e
+            return job_id, job_status, None
+
+        tasks = [asyncio.ensure_future(wait_job(job_id)) for job_id in dict.fromkeys(job_ids)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def ping(self):
+        url_path = PING_URL_PATH
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url) as response:
+            if response.ok:
+                logging.info(f"Job service connectivity test to '{self.service_base_url}' - PASSED")
+                return True
+            else:
+                logging.error(
+                    f"Job service connectivity test to '{self.service_base_url}' - FAILED. "
+                    f"Status code: {response.status}; Reason: {response.reason}")
+                return False
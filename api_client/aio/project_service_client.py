@@ -0,0 +1,60 @@
+import urllib.parse
+import logging
+import json
+from api_client.project_service_client import PING_URL_PATH
+from api_client.aio.security import AsyncSession
+
+
+class AsyncProjectServiceClient(object):
+    def __init__(self, session: AsyncSession, service_base_url):
+        self.session = session
+        self.service_base_url = service_base_url
+
+    async def run_analysis(self, analysis_id, with_attr=None):
+        if with_attr:
+            url_path = f'/project/v1/analyses/{analysis_id}/jobs?withAttribution=true'
+        else:
+            url_path = f'/project/v1/analyses/{analysis_id}/jobs'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        logging.info(f'now making run analysis call with url: {url}')
+        async with self.session.transport.post(url, headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            job_info = await response.json(content_type=None)
+
+        result = job_info['jobId']
+        return result
+
+    async def duplicate_analysis(self, analysis_id, payload):
+        url_path = f'/project/v1/analysis/{analysis_id}/duplicate'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+
+        headers = await self.session.get_auth_header()
+        headers["Content-Type"] = "application/json"
+        headers["Accept"] = "application/json"
+        async with self.session.transport.post(url, headers=headers, data=json.dumps(payload)) as response:
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+
+        return result
+
+    async def get_analysis_scenarios(self, analysis_id: int) -> list:
+        url_path = f'/project/1.0/analyses/{analysis_id}/scenarios'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url, headers=await self.session.get_auth_header()) as response:
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+
+        return result
+
+    async def ping(self):
+        url_path = PING_URL_PATH
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        async with self.session.transport.get(url) as response:
+            if response.ok:
+                logging.info(f"Project service connectivity test to '{self.service_base_url}' - PASSED")
+                return True
+            else:
+                logging.error(
+                    f"Project service connectivity test to '{self.service_base_url}' - FAILED. "
+                    f"Status code: {response.status}; Reason: {response.reason}")
+                return False
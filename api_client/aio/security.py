@@ -0,0 +1,201 @@
+import asyncio
+import datetime
+import urllib.parse
+import logging
+import jwt
+import base64
+from api_client.http_transport import HttpTransportSettings
+from api_client.security import Session
+from api_client.errors import AuthenticationError
+from api_client.security import SSO_SVCS_BASE_URL
+from api_client.security import PING_URL_PATH
+from api_client.security import log_retry_stats
+from api_client.security import log_rate_limiter_stats
+from api_client.aio.http_transport import AsyncHttpTransport
+
+
+class AsyncSession(object):
+    """
+    Authentication session of the asyncio clients. It renews the token the same way as the blocking Session:
+    concurrent coroutines which need the token while it's being renewed wait for a single SSO request.
+    """
+    def __init__(
+            self,
+            user_id: str,
+            user_password: str,
+            sso_svcs_base_url: str = SSO_SVCS_BASE_URL,
+            proxies={},
+            transport_settings: HttpTransportSettings = None):
+        self.sso_svcs_base_url = sso_svcs_base_url
+        self.user_id = user_id
+        self.user_password = user_password
+        self.proxies = proxies
+        # Connection pool shared by the session and all service clients created in its scope
+        self.transport = AsyncHttpTransport(transport_settings, proxies)
+
+        self.auth_token = None
+        self.auth_token_claimset = None
+        self.expiration_timestamp = None
+        self.expiration_datetime = None
+        # Renewal in progress which the concurrent callers wait for; None - token is not being renewed
+        self.auth_token_renewal = None
+
+    async def __aenter__(self):
+        logging.info("Entered authentication session.")
+
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def get_auth_token(self):
+        # Token has not expired
+        if self.auth_token is not None and not self.is_auth_token_renewal():
+            return self.auth_token
+
+        if self.auth_token_renewal is not None:
+            result = await asyncio.shield(self.auth_token_renewal)
+            return result
+
+        self.auth_token_renewal = asyncio.get_running_loop().create_future()
+        try:
+            result = await self.acquire_auth_token()
+            self.auth_token_renewal.set_result(result)
+        except BaseException as e:
+            self.auth_token_renewal.set_exception(e)
+            # Mark the exception as retrieved when there are no concurrent callers
+            self.auth_token_renewal.exception()
+            raise
+        finally:
+            self.auth_token_renewal = None
+
+        return result
+
+    async def acquire_auth_token(self):
+        # Get authentication token for the first time
+        if self.auth_token is None:
+            self.swap_auth_token(await self.request_new_auth_token())
+            logging.info("Security token has been generated.")
+            return self.auth_token
+
+        # It's a renewal time, renew authentication token
+        try:
+            self.swap_auth_token(await self.renew_auth_token())
+            return self.auth_token
+        except AuthenticationError:
+            # It can happen if token is fully expired. In this case, request new token
+            self.swap_auth_token(await self.request_new_auth_token())
+            return self.auth_token
+
+    async def close(self):
+        try:
+            if self.auth_token is not None:
+                await self.revoke_auth_token()
+        finally:
+            log_retry_stats(self.transport.service_call_guard.get_stats())
+            if self.transport.rate_limiter is not None:
+                log_rate_limiter_stats(self.transport.rate_limiter.get_stats())
+            await self.transport.close()
+
+    async def request_new_auth_token(self):
+        url_path = '/sso-api/v1/token'
+        url = urllib.parse.urljoin(self.sso_svcs_base_url, url_path)
+
+        request_new_auth_token_data = {
+            'username': self.user_id,
+            'password': self.user_password,
+            'grant_type': 'password',
+            'scope': 'openid'
+        }
+
+        async with self.transport.post(
+                url,
+                data=request_new_auth_token_data,
+                headers=AsyncSession.create_basic_auth_header(self.user_id, self.user_password)) as response:
+            response.raise_for_status()
+            response_body_json = await response.json(content_type=None)
+
+        result = response_body_json.get('id_token')
+        if result is None or result == "":
+            raise AuthenticationError(
+                f"Authorization token is empty. "
+                f"Authentication token has not been retrieved from "
+                f"SSO service '{self.sso_svcs_base_url} for user '{self.user_id}''.")
+
+        token_type = response_body_json.get('token_type')
+        if token_type != 'Bearer':
+            raise AuthenticationError(f"Wrong token type '{token_type}'. Expected token type is 'Bearer'.")
+
+        return result
+
+    async def delete_auth_token(self, auth_token):
+        url_path = '/sso-api/v1/token'
+        url = urllib.parse.urljoin(self.sso_svcs_base_url, url_path)
+
+        async with self.transport.delete(url, headers=Session.create_auth_header(auth_token)) as response:
+            response.raise_for_status()
+
+    async def revoke_auth_token(self):
+        await self.delete_auth_token(self.auth_token)
+
+        self.auth_token = None
+        self.auth_token_claimset = None
+        self.expiration_timestamp = None
+        self.expiration_datetime = None
+
+    async def renew_auth_token(self):
+        # Revoke current token
+        await self.revoke_auth_token()
+
+        # Wait for one second for token revocation process
+        await asyncio.sleep(1)
+
+        # Request a new token
+        result = await self.request_new_auth_token()
+        return result
+
+    def swap_auth_token(self, auth_token):
+        """
+        Replaces the token together with its expiration info
+        :return: Replaced token
+        """
+        result = self.auth_token
+        self.auth_token_claimset = jwt.decode(auth_token, verify=False)
+        self.expiration_timestamp = self.auth_token_claimset['exp']
+        self.expiration_datetime = datetime.datetime.fromtimestamp(self.expiration_timestamp)
+        self.auth_token = auth_token
+        return result
+
+    def is_auth_token_renewal(self):
+        if self.expiration_datetime is None:
+            raise AuthenticationError(
+                "Error checking renewal time of the authentication token. "
+                "The token's expiration date/time is empty. "
+                "Get authentication token calling get_auth_token() first.")
+
+        result = Session.is_renewal_time(self.expiration_datetime)
+        return result
+
+    async def get_auth_header(self):
+        auth_token = await self.get_auth_token()
+        result = Session.create_auth_header(auth_token)
+        return result
+
+    async def ping(self):
+        url_path = PING_URL_PATH
+        url = urllib.parse.urljoin(self.sso_svcs_base_url, url_path)
+        async with self.transport.get(url) as response:
+            if response.ok:
+                logging.info(f"Single Sing-On (SSO) service connectivity test to '{self.sso_svcs_base_url}' - PASSED")
+                return True
+            else:
+                logging.error(
+                    f"Single Sing-On (SSO) connectivity test to '{self.sso_svcs_base_url}' - FAILED. "
+                    f"Status code: {response.status}; Reason: {response.reason}")
+                return False
+
+    @staticmethod
+    def create_basic_auth_header(user_id, user_password):
+        credentials = base64.b64encode(f'{user_id}:{user_password}'.encode('utf-8')).decode('ascii')
+        result = {'Authorization': f'Basic {credentials}'}
+        return result
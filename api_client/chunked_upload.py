@@ -0,0 +1,236 @@
+import os
+import json
+import base64
+import hashlib
+import logging
+import threading
+import urllib.parse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_EXCEPTION
+from concurrent.futures import wait
+
+
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_PARALLEL_PARTS = 4
+
+# Status codes of the upload session creation request which mean that the server does not support chunked uploads
+CHUNKED_UPLOAD_NOT_SUPPORTED_STATUS_CODES = [404, 405, 501]
+
+
+class ChunkedUploadNotSupportedError(Exception):
+    pass
+
+
+class ChunkedUploadError(Exception):
+    pass
+
+
+class ChunkedUpload(object):
+    """
+    Uploads a file to the File Management Service in parts, several parts at a time.
+
+    The upload goes through the upload session endpoints of the import resource:
+    - POST   /fms/v1/files/job/import/uploads                          - creates an upload session
+    - GET    /fms/v1/files/job/import/uploads/{upload id}              - lists the parts received by the server
+    - PUT    /fms/v1/files/job/import/uploads/{upload id}/parts/{n}    - uploads part n with its SHA-256 digest
+    - POST   /fms/v1/files/job/import/uploads/{upload id}/complete     - assembles the file from the parts
+
+    Uploaded parts are recorded in a local state file, so running the same upload again
+    only sends the parts the server has not received yet.
+    """
+    def __init__(
+            self,
+            session,
+            service_base_url,
+            source_file_path,
+            file_management_file_name,
+            file_management_file_path,
+            part_size,
+            parallel_parts,
+            state_dir):
+        """
+        :param session: Authentication session with the shared HTTP transport
+        :param service_base_url: File Management Service base URL
+        :param source_file_path: Path of the file to upload
+        :param file_management_file_name: File name in the File Management Service
+        :param file_management_file_path: File location in the File Management Service (e.g. 'raw')
+        :param part_size: Size of one part in bytes
+        :param parallel_parts: Number of parts uploaded at once
+        :param state_dir: Directory with the state files of unfinished uploads
+        """
+        self.session = session
+        self.service_base_url = service_base_url
+        self.source_file_path = source_file_path
+        self.file_management_file_name = file_management_file_name
+        self.file_management_file_path = file_management_file_path
+        self.part_size = part_size
+        self.parallel_parts = parallel_parts
+
+        file_stat = os.stat(source_file_path)
+        self.file_size = file_stat.st_size
+        self.part_count = max(1, -(-self.file_size // part_size))
+
+        # The state is bound to the file content (size and modification time) and to the upload destination
+        state_key_text = \
+            f'{os.path.abspath(source_file_path)}|{file_stat.st_size}|{file_stat.st_mtime_ns}|' \
+            f'{file_management_file_path}|{file_management_file_name}|{part_size}'
+        state_key = hashlib.sha256(state_key_text.encode('utf-8')).hexdigest()
+        self.state_file_path = os.path.join(state_dir, f'{state_key}.json')
+
+        self.state_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.state = None
+
+    def run(self):
+        """
+        Uploads the file
+        :return: Information on the uploaded file, the same as returned by the single-shot import
+        """
+        self.state = self.load_state()
+        if self.state is None:
+            self.state = {'upload_id': self.create_upload(), 'parts': {}}
+            self.save_state()
+        else:
+            logging.info(
+                f"Resuming upload of '{self.source_file_path}': "
+                f"{len(self.state['parts'])} of {self.part_count} parts are already uploaded.")
+
+        pending_part_numbers = [
+            part_number for part_number in range(1, self.part_count + 1)
+            if str(part_number) not in self.state['parts']]
+
+        executor = ThreadPoolExecutor(max_workers=self.parallel_parts)
+        try:
+            futures = [executor.submit(self.upload_part, part_number) for part_number in pending_part_numbers]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                # Re-raise the first part failure, if any
+                future.result()
+        except BaseException:
+            # Let the parts in progress finish, so they do not have to be uploaded again on the next run
+            self.stop_event.set()
+            executor.shutdown(wait=True)
+            logging.info(
+                f"Upload of '{self.source_file_path}' has been interrupted: "
+                f"{len(self.state['parts'])} of {self.part_count} parts are uploaded. "
+                f"Run the command again to resume the upload.")
+            raise
+
+        executor.shutdown(wait=True)
+
+        result = self.complete_upload()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.state_file_path)
+
+        return result
+
+    def create_upload(self):
+        url = self.get_url('/fms/v1/files/job/import/uploads')
+        request_body = {
+            'filename': self.file_management_file_name,
+            'path': self.file_management_file_path,
+            'size': self.file_size,
+            'partSize': self.part_size,
+            'partCount': self.part_count
+        }
+
+        response = self.session.transport.post(url, json=request_body, headers=self.session.get_auth_header())
+        if response.status_code in CHUNKED_UPLOAD_NOT_SUPPORTED_STATUS_CODES:
+            raise ChunkedUploadNotSupportedError(
+                f"Chunked upload is not supported by '{self.service_base_url}'. "
+                f"Status code: {response.status_code}; Reason: {response.reason}")
+        response.raise_for_status()
+
+        result = response.json()['uploadId']
+        return result
+
+    def get_received_parts(self, upload_id):
+        """
+        Gets the parts received by the server
+        :param upload_id: Upload session id
+        :return: Part number to digest mapping; None - upload session does not exist anymore
+        """
+        url = self.get_url(f'/fms/v1/files/job/import/uploads/{upload_id}')
+
+        response = self.session.transport.get(url, headers=self.session.get_auth_header())
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        result = {str(part['partNumber']): part['checksum'] for part in response.json().get('parts', [])}
+        return result
+
+    def upload_part(self, part_number):
+        if self.stop_event.is_set():
+            return
+
+        with open(self.source_file_path, 'rb') as source_file:
+            source_file.seek((part_number - 1) * self.part_size)
+            part_content = source_file.read(self.part_size)
+
+        checksum = base64.b64encode(hashlib.sha256(part_content).digest()).decode('ascii')
+        url = self.get_url(f"/fms/v1/files/job/import/uploads/{self.state['upload_id']}/parts/{part_number}")
+        headers = self.session.get_auth_header()
+        headers['Content-Type'] = 'application/octet-stream'
+        headers['Digest'] = f'SHA-256={checksum}'
+
+        response = self.session.transport.put(url, data=part_content, headers=headers)
+        response.raise_for_status()
+
+        received_checksum = response.json().get('checksum') if response.content else None
+        if received_checksum is not None and received_checksum != checksum:
+            raise ChunkedUploadError(
+                f"Part {part_number} of '{self.source_file_path}' has been corrupted during upload. "
+                f"Expected checksum: '{checksum}'; received checksum: '{received_checksum}'.")
+
+        with self.state_lock:
+            self.state['parts'][str(part_number)] = checksum
+            self.save_state()
+
+    def complete_upload(self):
+        url = self.get_url(f"/fms/v1/files/job/import/uploads/{self.state['upload_id']}/complete")
+        request_body = {
+            'parts': [
+                {'partNumber': part_number, 'checksum': self.state['parts'][str(part_number)]}
+                for part_number in range(1, self.part_count + 1)]
+        }
+
+        response = self.session.transport.post(url, json=request_body, headers=self.session.get_auth_header())
+        response.raise_for_status()
+
+        result = response.json()
+        return result
+
+    def load_state(self):
+        """
+        Loads the state of the unfinished upload and reconciles it with the parts received by the server
+        :return: Upload state; None - there is no upload to resume
+        """
+        try:
+            with open(self.state_file_path, 'r') as state_file:
+                state = json.load(state_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        received_parts = self.get_received_parts(state['upload_id'])
+        if received_parts is None:
+            return None
+
+        # Only the parts which the server has received with the same checksum are skipped
+        state['parts'] = {
+            part_number: checksum for part_number, checksum in state['parts'].items()
+            if received_parts.get(part_number) == checksum}
+
+        return state
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_file_path), exist_ok=True)
+        temp_state_file_path = f'{self.state_file_path}.tmp'
+        with open(temp_state_file_path, 'w') as state_file:
+            json.dump(self.state, state_file)
+        os.replace(temp_state_file_path, self.state_file_path)
+
+    def get_url(self, url_path):
+        result = urllib.parse.urljoin(self.service_base_url, url_path)
+        return result
@@ -0,0 +1,252 @@
+import os
+import ssl
+import time
+import socket
+import base64
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+PROBE_TIMEOUT_IN_SECONDS = 30
+PROBE_PHASES = ['dns', 'connect', 'tls', 'ttfb', 'total']
+RESPONSE_READ_SIZE = 64 * 1024
+
+
+class ConnectivityProbe(object):
+    """
+    Sends GET requests to a service endpoint over new connections, through the same proxy and with the same
+    CA certificates as the HTTP transport (requests), and measures the phases of each request:
+    - dns      - host name resolution
+    - connect  - TCP connection (including the CONNECT tunnel when going through the proxy)
+    - tls      - TLS handshake; 0 for plain HTTP
+    - ttfb     - time from sending the request to the first byte of the response
+    - total    - whole request including reading the response
+    """
+    def __init__(self, service_name, url, proxies=None, timeout_in_seconds=PROBE_TIMEOUT_IN_SECONDS):
+        """
+        :param service_name: Service name shown in the report
+        :param url: URL of the endpoint to probe
+        :param proxies: Proxy URL per URL scheme from the configuration, the same as used by the HTTP transport.
+         Without the proxy of the URL scheme the proxy is taken from the environment variables as requests does.
+        :param timeout_in_seconds: Timeout of every network operation
+        """
+        self.service_name = service_name
+        self.url = url
+        self.timeout_in_seconds = timeout_in_seconds
+
+        self.parsed_url = urllib.parse.urlsplit(url)
+        self.is_https = self.parsed_url.scheme == 'https'
+        self.port = self.parsed_url.port or (443 if self.is_https else 80)
+        proxy_url = get_proxy_url(self.parsed_url, proxies)
+        self.parsed_proxy_url = urllib.parse.urlsplit(proxy_url) if proxy_url else None
+
+    def run(self, repeat=1):
+        """
+        Probes the endpoint
+        :param repeat: Number of requests sent one after another, at least 1
+        :return: Probe report with the phase timings percentiles in milliseconds
+        """
+        if repeat < 1:
+            raise ValueError(f"Number of requests must be at least 1, got {repeat}.")
+
+        samples = [self.probe() for _ in range(repeat)]
+        successful_samples = [sample for sample in samples if sample['error'] is None]
+
+        timings = {}
+        for phase in PROBE_PHASES:
+            durations = sorted(sample[phase] for sample in successful_samples)
+            timings[phase] = {
+                'p50': get_percentile(durations, 50),
+                'p99': get_percentile(durations, 99)
+            }
+
+        last_sample = samples[-1]
+        result = {
+            'service': self.service_name,
+            'url': self.url,
+            # Proxy host and port the requests have been sent through; None - direct connection
+            'proxy': self.parsed_proxy_url.netloc.rpartition('@')[2] if self.parsed_proxy_url else None,
+            'passed': len(successful_samples) == len(samples) and all(
+                sample['status_code'] < 400 for sample in successful_samples),
+            'status_code': last_sample['status_code'],
+            'error': last_sample['error'],
+            'samples': len(samples),
+            'failed_samples': len(samples) - len(successful_samples),
+            'timings_in_ms': timings
+        }
+        return result
+
+    def probe(self):
+        """
+        Sends one request over a new connection
+        :return: Phase durations in milliseconds, response status code and error message (None on success)
+        """
+        result = {phase: None for phase in PROBE_PHASES}
+        result.update(status_code=None, error=None)
+
+        begin_time = time.perf_counter()
+        connection = None
+        try:
+            if self.parsed_proxy_url:
+                connect_host, connect_port = self.parsed_proxy_url.hostname, self.parsed_proxy_url.port or 80
+            else:
+                connect_host, connect_port = self.parsed_url.hostname, self.port
+
+            address_info = socket.getaddrinfo(connect_host, connect_port, type=socket.SOCK_STREAM)
+            dns_end_time = time.perf_counter()
+
+            family, socket_type, protocol, canonical_name, address = address_info[0]
+            connection = socket.socket(family, socket_type, protocol)
+            connection.settimeout(self.timeout_in_seconds)
+            connection.connect(address)
+            if self.parsed_proxy_url and self.is_https:
+                self.open_proxy_tunnel(connection)
+            connect_end_time = time.perf_counter()
+
+            tls_end_time = connect_end_time
+            if self.is_https:
+                ssl_context = ssl.create_default_context(cafile=get_ca_bundle_path())
+                connection = ssl_context.wrap_socket(connection, server_hostname=self.parsed_url.hostname)
+                tls_end_time = time.perf_counter()
+
+            connection.sendall(self.create_request())
+            response = connection.recv(RESPONSE_READ_SIZE)
+            first_byte_time = time.perf_counter()
+            # The request is sent with 'Connection: close', the response ends when the server closes the connection
+            chunk = response
+            while chunk:
+                chunk = connection.recv(RESPONSE_READ_SIZE)
+                if b'\r\n' not in response:
+                    response += chunk
+            end_time = time.perf_counter()
+            result['status_code'] = parse_status_code(response)
+
+            result.update(
+                dns=round((dns_end_time - begin_time) * 1000, 3),
+                connect=round((connect_end_time - dns_end_time) * 1000, 3),
+                tls=round((tls_end_time - connect_end_time) * 1000, 3),
+                ttfb=round((first_byte_time - tls_end_time) * 1000, 3),
+                total=round((end_time - begin_time) * 1000, 3))
+        except (OSError, ValueError) as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+        finally:
+            if connection is not None:
+                connection.close()
+
+        return result
+
+    def create_request(self):
+        if self.parsed_proxy_url and not self.is_https:
+            # Plain HTTP requests are sent to the proxy with the absolute URL
+            request_target = self.url
+        else:
+            request_target = self.parsed_url.path or '/'
+            if self.parsed_url.query:
+                request_target += f'?{self.parsed_url.query}'
+
+        headers = [
+            f'GET {request_target} HTTP/1.1',
+            f'Host: {self.parsed_url.netloc}',
+            'User-Agent: apic-connectivity-probe',
+            'Accept: */*',
+            'Connection: close'
+        ]
+        if self.parsed_proxy_url and not self.is_https:
+            headers += self.create_proxy_authorization_headers()
+
+        result = ('\r\n'.join(headers) + '\r\n\r\n').encode('ascii')
+        return result
+
+    def open_proxy_tunnel(self, connection):
+        headers = [
+            f'CONNECT {self.parsed_url.hostname}:{self.port} HTTP/1.1',
+            f'Host: {self.parsed_url.hostname}:{self.port}'
+        ]
+        headers += self.create_proxy_authorization_headers()
+        connection.sendall(('\r\n'.join(headers) + '\r\n\r\n').encode('ascii'))
+
+        response = b''
+        while b'\r\n\r\n' not in response:
+            chunk = connection.recv(RESPONSE_READ_SIZE)
+            if not chunk:
+                raise ConnectionError('Proxy has closed the connection while opening the tunnel.')
+            response += chunk
+
+        status_code = parse_status_code(response)
+        if status_code != 200:
+            raise ConnectionError(f'Proxy has refused to open the tunnel. Status code: {status_code}')
+
+    def create_proxy_authorization_headers(self):
+        if not self.parsed_proxy_url.username:
+            return []
+
+        credentials = \
+            f'{urllib.parse.unquote(self.parsed_proxy_url.username)}:' \
+            f'{urllib.parse.unquote(self.parsed_proxy_url.password or "")}'
+        result = [f'Proxy-Authorization: Basic {base64.b64encode(credentials.encode("utf-8")).decode("ascii")}']
+        return result
+
+
+def run_probes(probes, repeat=1):
+    """
+    Runs the probes of all endpoints at once, so the total time is set by the slowest endpoint
+    :param probes: Connectivity probes
+    :param repeat: Number of requests sent to every endpoint
+    :return: Probe reports in the order of the probes
+    """
+    with ThreadPoolExecutor(max_workers=max(len(probes), 1)) as executor:
+        result = list(executor.map(lambda probe: probe.run(repeat), probes))
+
+    return result
+
+
+def get_proxy_url(parsed_url, proxies):
+    """
+    Gets the proxy the HTTP transport sends the request to the URL through: the configured proxy of the URL scheme,
+    otherwise the proxy from the environment variables (e.g. HTTPS_PROXY) unless NO_PROXY excludes the host
+    :return: Proxy URL; None - the request is sent directly
+    """
+    result = (proxies or {}).get(parsed_url.scheme)
+    if result is None and not urllib.request.proxy_bypass(parsed_url.hostname):
+        result = urllib.request.getproxies().get(parsed_url.scheme)
+
+    return result
+
+
+def get_ca_bundle_path():
+    """
+    Gets the CA certificates file the HTTP transport (requests) verifies the servers with
+    """
+    result = os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('CURL_CA_BUNDLE')
+    if not result:
+        import certifi
+
+        result = certifi.where()
+
+    return result
+
+
+def parse_status_code(response):
+    status_line = response.split(b'\r\n', 1)[0].decode('iso-8859-1')
+    status_line_parts = status_line.split(' ', 2)
+    if len(status_line_parts) < 2 or not status_line_parts[0].startswith('HTTP/'):
+        raise ValueError(f"Malformed HTTP status line '{status_line}'")
+
+    result = int(status_line_parts[1])
+    return result
+
+
+def get_percentile(sorted_values, percentile):
+    """
+    Gets the percentile using the nearest-rank method
+    :param sorted_values: Values sorted in the ascending order
+    :param percentile: Percentile from 0 to 100
+    :return: Percentile value; None - there are no values
+    """
+    if not sorted_values:
+        return None
+
+    rank = max(-(-percentile * len(sorted_values) // 100), 1)
+    result = sorted_values[int(rank) - 1]
+    return result
@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import threading
+import contextlib
+import collections
+import socketserver
+
+
+CONNECT_TIMEOUT_IN_SECONDS = 1
+THROUGHPUT_WINDOW_IN_SECONDS = 60
+# Connections waiting to be accepted; Unix sockets refuse the connections above it instead of waiting
+LISTEN_BACKLOG = 128
+
+
+class DaemonError(Exception):
+    pass
+
+
+def is_daemon_supported():
+    result = hasattr(socket, 'AF_UNIX')
+    return result
+
+
+class DaemonServer(object):
+    """
+    Local daemon which serves the requests sent over a Unix socket, each request in its own thread.
+    A request is one JSON line. The handler streams back any number of JSON messages;
+    the last message has the request's exit code. The socket is accessible by the current user only.
+    Built-in requests are 'status' and 'stop'.
+    """
+    def __init__(self, socket_path, request_handler, status_provider=None):
+        """
+        :param socket_path: Path of the Unix socket
+        :param request_handler: Function of the request and the function sending a message back to the client,
+         returning the exit code
+        :param status_provider: Function returning additional status items; None - no additional items
+        """
+        self.socket_path = socket_path
+        self.request_handler = request_handler
+        self.status_provider = status_provider
+        self.server = None
+
+        # Metrics
+        self.stats_lock = threading.Lock()
+        self.start_time = None
+        self.active_request_count = 0
+        self.request_type_stats = {}
+        self.completion_times = collections.deque()
+
+    def serve_forever(self):
+        if DaemonClient(self.socket_path).is_running():
+            raise DaemonError(f"Daemon is already running on the socket '{self.socket_path}'.")
+        # The socket file is left behind by a daemon which has not been shut down
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+
+        daemon_server = self
+
+        class DaemonRequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon_server.handle_connection(self.rfile, self.wfile)
+
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        previous_umask = os.umask(0o177)
+        try:
+            self.server = DaemonUnixStreamServer(self.socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(previous_umask)
+        self.start_time = time.time()
+        logging.info(f"Daemon is listening on the socket '{self.socket_path}'.")
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+            logging.info("Daemon has stopped.")
+
+    def shutdown(self):
+        # shutdown() waits for the serving loop to exit, so it cannot be called from a request thread directly
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def handle_connection(self, request_file, response_file):
+        send_lock = threading.Lock()
+
+        def send_message(message):
+            with send_lock:
+                try:
+                    response_file.write((json.dumps(message) + '\n').encode('utf-8'))
+                    response_file.flush()
+                except OSError:
+                    # The client has gone; the request is still completed
+                    pass
+
+        request_line = request_file.readline()
+        # Connection probe of DaemonClient.is_running()
+        if not request_line:
+            return
+
+        try:
+            request = json.loads(request_line.decode('utf-8'))
+        except ValueError:
+            send_message({'error': 'Malformed request.', 'exit_code': 1})
+            return
+
+        request_type = request.get('type')
+        if request_type == 'status':
+            send_message({'status': self.get_status(), 'exit_code': 0})
+            return
+        if request_type == 'stop':
+            send_message({'exit_code': 0})
+            self.shutdown()
+            return
+
+        request_begin_time = time.monotonic()
+        with self.stats_lock:
+            self.active_request_count += 1
+
+        exit_code = 1
+        try:
+            exit_code = self.request_handler(request, send_message)
+        except Exception as e:
+            logging.exception(f"Daemon request '{request_type}' has failed.")
+            send_message({'error': f'{type(e).__name__}: {e}'})
+        finally:
+            self.record_request(request_type, exit_code, time.monotonic() - request_begin_time)
+            send_message({'exit_code': exit_code})
+
+    def record_request(self, request_type, exit_code, duration):
+        with self.stats_lock:
+            self.active_request_count -= 1
+            stats = self.request_type_stats.setdefault(request_type, {
+                'requests': 0, 'failed_requests': 0, 'duration_in_seconds': 0, 'max_duration_in_seconds': 0})
+            stats['requests'] += 1
+            if exit_code != 0:
+                stats['failed_requests'] += 1
+            stats['duration_in_seconds'] += duration
+            stats['max_duration_in_seconds'] = max(stats['max_duration_in_seconds'], duration)
+            self.completion_times.append(time.monotonic())
+
+    def get_status(self):
+        """
+        Gets the daemon's status and throughput
+        """
+        with self.stats_lock:
+            now = time.monotonic()
+            while self.completion_times and self.completion_times[0] < now - THROUGHPUT_WINDOW_IN_SECONDS:
+                self.completion_times.popleft()
+
+            result = {
+                'pid': os.getpid(),
+                'socket': self.socket_path,
+                'uptime_in_seconds': round(time.time() - self.start_time, 1),
+                'active_requests': self.active_request_count,
+                'requests_per_minute': len(self.completion_times) * 60 / THROUGHPUT_WINDOW_IN_SECONDS,
+                'requests': {
+                    request_type: dict(
+                        stats,
+                        avg_duration_in_seconds=round(stats['duration_in_seconds'] / stats['requests'], 3),
+                        duration_in_seconds=round(stats['duration_in_seconds'], 3),
+                        max_duration_in_seconds=round(stats['max_duration_in_seconds'], 3))
+                    for request_type, stats in self.request_type_stats.items()}
+            }
+
+        if self.status_provider is not None:
+            result.update(self.status_provider())
+
+        return result
+
+
+class DaemonUnixStreamServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class DaemonClient(object):
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+
+    def is_running(self):
+        if not is_daemon_supported() or not os.path.exists(self.socket_path):
+            return False
+
+        try:
+            with self.connect():
+                return True
+        except OSError:
+            return False
+
+    def send(self, request):
+        """
+        Sends the request to the daemon
+        :param request: Request
+        :return: Iterator of the messages sent back by the daemon
+        :raise OSError: The daemon is not running
+        """
+        connection = self.connect()
+        try:
+            # Requests such as job waits run as long as they need to
+            connection.settimeout(None)
+            connection.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        except OSError:
+            connection.close()
+            raise
+
+        result = DaemonClient.read_messages(connection)
+        return result
+
+    @staticmethod
+    def read_messages(connection):
+        with connection, connection.makefile('rb') as response_file:
+            for line in response_file:
+                yield json.loads(line.decode('utf-8'))
+
+    def connect(self):
+        result = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        result.settimeout(CONNECT_TIMEOUT_IN_SECONDS)
+        try:
+            result.connect(self.socket_path)
+        except OSError:
+            result.close()
+            raise
+
+        return result
+
+
+class ThreadOutputRouter(logging.Handler):
+    """
+    Sends the standard output and the log records of the threads serving daemon requests back to their clients.
+    The threads started by a request thread, e.g. the workers of its thread pools, are routed to the same client
+    while the request runs. The other threads write to the daemon's own output as before.
+    """
+    def __init__(self):
+        super().__init__()
+        self.send_message_functions = {}
+        self.routes_lock = threading.Lock()
+        self.stdout = None
+        self.thread_start = None
+
+    def install(self):
+        self.stdout = sys.stdout
+        sys.stdout = ThreadRoutedStream(self, self.stdout)
+        logging.getLogger().addHandler(self)
+
+        # Threads know nothing of the thread which has started them, so the routed threads pass their route on
+        router = self
+        self.thread_start = thread_start = threading.Thread.start
+
+        def start(thread):
+            send_message = router.send_message_functions.get(threading.get_ident())
+            if send_message is not None:
+                thread.run = router.create_routed_run(thread.run, send_message)
+            return thread_start(thread)
+
+        threading.Thread.start = start
+
+    def uninstall(self):
+        threading.Thread.start = self.thread_start
+        logging.getLogger().removeHandler(self)
+        sys.stdout = self.stdout
+
+    @contextlib.contextmanager
+    def route(self, send_message):
+        """
+        Routes the output of the current thread and the threads it starts to the client
+        :param send_message: Function sending a message to the client
+        """
+        with self.routes_lock:
+            self.send_message_functions[threading.get_ident()] = send_message
+        try:
+            yield
+        finally:
+            # The threads which outlive the request, e.g. pool workers shut down without waiting,
+            # write to the daemon's output again
+            with self.routes_lock:
+                for thread_id, routed_send_message in list(self.send_message_functions.items()):
+                    if routed_send_message is send_message:
+                        del self.send_message_functions[thread_id]
+
+    def create_routed_run(self, run, send_message):
+        def routed_run():
+            thread_id = threading.get_ident()
+            with self.routes_lock:
+                # The request may have finished before the thread has started
+                if send_message in self.send_message_functions.values():
+                    self.send_message_functions[thread_id] = send_message
+            try:
+                run()
+            finally:
+                with self.routes_lock:
+                    if self.send_message_functions.get(thread_id) is send_message:
+                        del self.send_message_functions[thread_id]
+
+        return routed_run
+
+    def emit(self, record):
+        send_message = self.send_message_functions.get(record.thread)
+        if send_message is not None:
+            send_message({'log': {'level': record.levelno, 'message': record.getMessage()}})
+
+
+class ThreadRoutedStream(object):
+    def __init__(self, router: ThreadOutputRouter, stream):
+        self.router = router
+        self.stream = stream
+
+    def write(self, text):
+        send_message = self.router.send_message_functions.get(threading.get_ident())
+        if send_message is None:
+            return self.stream.write(text)
+
+        send_message({'output': text})
+        return len(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
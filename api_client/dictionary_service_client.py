@@ -1,14 +1,9 @@
-import requests
 import urllib.parse
 import logging
 from api_client.security import Session
 
-# Configure the logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s\t%(asctime)s\t%(message)s',
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+
+PING_URL_PATH = '/dictionary/docs/'
 
 
 class DictionaryServiceClient(object):
@@ -25,11 +20,10 @@ class DictionaryServiceClient(object):
             'overwrite': str(overwrite).lower()
         }
 
-        response = requests.post(
+        response = self.session.transport.post(
             url,
             params=params,
-            headers=self.session.get_auth_header(),
-            proxies=self.session.proxies)
+            headers=self.session.get_auth_header())
         response.raise_for_status()
 
         job_info = response.json()
@@ -37,11 +31,9 @@ class DictionaryServiceClient(object):
         return result
 
     def ping(self):
-        url_path = "/dictionary/docs/"
+        url_path = PING_URL_PATH
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(
-            url,
-            proxies=self.session.proxies)
+        response = self.session.transport.get(url)
 
         if response.ok:
             logging.info(f"Dictionary service connectivity test to '{self.service_base_url}' - PASSED")
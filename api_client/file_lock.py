@@ -0,0 +1,76 @@
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock(object):
+    """
+    Exclusive lock shared by processes on the same host, held on a lock file
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock_file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def acquire(self, blocking=True):
+        """
+        Acquires the lock
+        :param blocking: True - wait until the lock is released by its holder; False - return at once
+        :return: True - the lock has been acquired; False - it's held by another process or thread
+        """
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        self.lock_file = open(self.file_path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif blocking:
+                self.lock_windows_file()
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.lock_file.close()
+            self.lock_file = None
+            if blocking:
+                raise
+            # The lock is held by another process or thread
+            return False
+        except BaseException:
+            self.lock_file.close()
+            self.lock_file = None
+            raise
+
+        return True
+
+    def release(self):
+        try:
+            if fcntl:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def lock_windows_file(self):
+        while True:
+            self.lock_file.seek(0)
+            try:
+                # Retries for 10 seconds and raises OSError if the lock is still held by another process
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
@@ -1,14 +1,20 @@
-import requests
+import os
+import contextlib
 import urllib.parse
 import logging
 from api_client.security import Session
+from api_client.segmented_download import SegmentedDownload
+from api_client.multipart_encoder import MultipartFileEncoder
+from api_client.multipart_encoder import MultipartStreamEncoder
+from api_client.chunked_upload import ChunkedUpload
+from api_client.chunked_upload import ChunkedUploadNotSupportedError
 
-# Configure the logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s\t%(asctime)s\t%(message)s',
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+
+PING_URL_PATH = '/fms/docs/'
+
+
+# Size of the chunks the downloaded files are streamed to the disk with
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 class FileManagementServiceClient(object):
@@ -16,61 +22,224 @@ class FileManagementServiceClient(object):
         self.session = session
         self.service_base_url = service_base_url
 
-    def import_file(self, source_file_path, file_management_file_name, file_management_file_path):
+    def import_file(self, source_file_path, file_management_file_name, file_management_file_path, content_hash=None):
+        """
+        Uploads the file in a single request
+        :param content_hash: Hash object updated with the file content as it's uploaded; None - not hashed
+        :return: Information on the uploaded file
+        """
         url_path = "/fms/v1/files/job/import"
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        files = {file_management_file_name: open(source_file_path, 'rb')}
 
         upload_data = {'path': file_management_file_path}
-        response = requests.post(
-            url,
-            data=upload_data,
-            files=files,
-            headers=self.session.get_auth_header(),
-            proxies=self.session.proxies)
+        with open(source_file_path, 'rb') as source_file:
+            # Stream the file in chunks instead of building the whole multipart body in memory
+            upload_body = MultipartFileEncoder(
+                upload_data,
+                file_management_file_name,
+                os.path.basename(source_file_path),
+                source_file,
+                content_hash)
+
+            headers = self.session.get_auth_header()
+            headers['Content-Type'] = upload_body.content_type
+            headers['Content-Length'] = str(len(upload_body))
+
+            response = self.session.transport.post(
+                url,
+                data=upload_body,
+                headers=headers)
         response.raise_for_status()
 
         result = response.json()
         return result
 
-    def download_job_import_error_file(self, job_id, destination_file_path):
-        file_content = self.retrieve_job_import_error_file_content(job_id)
+    def import_file_stream(self, file_chunks, file_management_file_name, file_management_file_path):
+        """
+        Uploads the file produced while it's sent (e.g. an archive built on the fly) in a single request
+        with the chunked transfer encoding
+        :param file_chunks: Iterable of the file's chunks
+        :return: Information on the uploaded file
+        """
+        url_path = "/fms/v1/files/job/import"
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+
+        upload_body = MultipartStreamEncoder(
+            {'path': file_management_file_path},
+            file_management_file_name,
+            file_management_file_name,
+            file_chunks)
+        headers = self.session.get_auth_header()
+        headers['Content-Type'] = upload_body.content_type
 
-        with open(destination_file_path, 'wb') as local_destination_file:
-            local_destination_file.write(file_content)
+        response = self.session.transport.post(url, data=iter(upload_body), headers=headers)
+        response.raise_for_status()
+
+        result = response.json()
+        return result
+
+    def import_file_in_parts(
+            self,
+            source_file_path,
+            file_management_file_name,
+            file_management_file_path,
+            part_size,
+            parallel_parts,
+            state_dir):
+        """
+        Uploads the file in parts, several parts at a time. An interrupted upload is resumed on the next call
+        for the same file. Falls back to the single-shot upload if the server does not support chunked uploads.
+        :return: Information on the uploaded file
+        """
+        chunked_upload = ChunkedUpload(
+            self.session,
+            self.service_base_url,
+            source_file_path,
+            file_management_file_name,
+            file_management_file_path,
+            part_size,
+            parallel_parts,
+            state_dir)
+
+        try:
+            result = chunked_upload.run()
+        except ChunkedUploadNotSupportedError as e:
+            logging.info(f"{e.args[0]} The file is uploaded in a single request.")
+            result = self.import_file(source_file_path, file_management_file_name, file_management_file_path)
+
+        return result
+
+    def download_job_import_error_file(self, job_id, destination_file_path, chunk_consumer=None):
+        url = self.get_job_import_error_file_url(job_id)
+        self.download_file(url, destination_file_path, chunk_consumer)
 
     def retrieve_job_import_error_file_content(self, job_id):
-        url_path = f'/fms/v1/files/job/import/{job_id}'
-        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        url = self.get_job_import_error_file_url(job_id)
 
-        response = requests.get(url, headers=self.session.get_auth_header(), proxies=self.session.proxies)
+        response = self.session.transport.get(url, headers=self.session.get_auth_header())
         response.raise_for_status()
 
         result = response.content
         return result
 
-    def download_analysis_result_file(self, analysis_id, destination_file_path):
-        file_content = self.retrieve_analysis_result_file_content(analysis_id)
+    def get_job_import_error_file_url(self, job_id):
+        url_path = f'/fms/v1/files/job/import/{job_id}'
+        result = urllib.parse.urljoin(self.service_base_url, url_path)
+        return result
+
+    def download_analysis_result_file(self, analysis_id, destination_file_path, segment_count=1, chunk_consumer=None):
+        """
+        Downloads the analysis results file
+        :param analysis_id: Analysis id
+        :param destination_file_path: Destination file path on the client side
+        :param segment_count: Number of byte ranges downloaded at once
+        :param chunk_consumer: Function called with every downloaded chunk in the file order (e.g. to extract
+         the file while it's downloaded); the file is then downloaded as a single stream. None - no consumer
+        """
+        url = self.get_analysis_result_file_url(analysis_id)
+
+        if segment_count > 1 and chunk_consumer is None:
+            segmented_download = SegmentedDownload(
+                self.session,
+                url,
+                destination_file_path,
+                segment_count,
+                DOWNLOAD_CHUNK_SIZE)
+            if segmented_download.is_supported():
+                segmented_download.run()
+                return
+            logging.info(f"Server does not support byte ranges for '{url}'. The file is downloaded as a single stream.")
 
-        with open(destination_file_path, 'wb') as local_destination_file:
-            local_destination_file.write(file_content)
+        self.download_file(url, destination_file_path, chunk_consumer)
 
     def retrieve_analysis_result_file_content(self, analysis_id):
-        url_path = f'/fms/v1/files/job/analyses/{analysis_id}'
-        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        url = self.get_analysis_result_file_url(analysis_id)
 
-        response = requests.get(url, headers=self.session.get_auth_header(), proxies=self.session.proxies)
+        response = self.session.transport.get(url, headers=self.session.get_auth_header())
         response.raise_for_status()
 
         result = response.content
         return result
 
+    def get_analysis_result_file_url(self, analysis_id):
+        url_path = f'/fms/v1/files/job/analyses/{analysis_id}'
+        result = urllib.parse.urljoin(self.service_base_url, url_path)
+        return result
+
+    def download_analysis_result_file_if_modified(
+            self,
+            analysis_id,
+            destination_file_path,
+            validators=None,
+            segment_count=1):
+        """
+        Downloads the analysis results file unless it has not changed since it was downloaded with the validators
+        :param analysis_id: Analysis id
+        :param destination_file_path: Destination file path on the client side
+        :param validators: ETag and Last-Modified values of the file downloaded before
+         ({'etag': ..., 'last_modified': ...}); None - there is no such file
+        :param segment_count: Number of byte ranges downloaded at once
+        :return: ETag and Last-Modified values of the downloaded file; None - the file has not changed
+        """
+        url = self.get_analysis_result_file_url(analysis_id)
+        headers = self.session.get_auth_header()
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        if segment_count > 1:
+            # The conditional request also checks whether the file can be downloaded in byte ranges
+            headers['Range'] = 'bytes=0-0'
+
+        with self.session.transport.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+
+            result = get_response_validators(response)
+            if response.status_code != 206:
+                save_response_content(response, destination_file_path)
+                return result
+
+            segmented_download = SegmentedDownload(
+                self.session,
+                url,
+                destination_file_path,
+                segment_count,
+                DOWNLOAD_CHUNK_SIZE)
+            is_segmented_download_supported = segmented_download.read_probe_response(response)
+
+        if is_segmented_download_supported:
+            # The segments are of the version the validators are of (see read_probe_response)
+            segmented_download.run()
+            return result
+
+        logging.info(f"Server does not support byte ranges for '{url}'. The file is downloaded as a single stream.")
+        result = self.download_file(url, destination_file_path)
+        return result
+
+    def download_file(self, url, destination_file_path, chunk_consumer=None):
+        """
+        Downloads the file as a single stream
+        :param url: URL of the file to download
+        :param destination_file_path: Destination file path on the client side
+        :param chunk_consumer: Function called with every downloaded chunk; None - no consumer
+        :return: ETag and Last-Modified values of the downloaded file
+        """
+        with self.session.transport.get(
+                url,
+                headers=self.session.get_auth_header(),
+                stream=True) as response:
+            response.raise_for_status()
+            save_response_content(response, destination_file_path, chunk_consumer)
+            result = get_response_validators(response)
+
+        return result
+
     def ping(self):
-        url_path = "/fms/docs/"
+        url_path = PING_URL_PATH
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(
-            url,
-            proxies=self.session.proxies)
+        response = self.session.transport.get(url)
 
         if response.ok:
             logging.info(f"File Management service connectivity test to '{self.service_base_url}' - PASSED")
@@ -82,3 +251,31 @@ class FileManagementServiceClient(object):
             return False
 
 
+def get_response_validators(response):
+    """
+    Gets the validators of the file version the response is of
+    :return: ETag and Last-Modified values ({'etag': ..., 'last_modified': ...})
+    """
+    result = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+    return result
+
+
+def save_response_content(response, destination_file_path, chunk_consumer=None):
+    """
+    Streams the response content in fixed-size chunks to a temporary file next to the destination one.
+    The temporary file is atomically renamed to the destination file on success and deleted on failure.
+    """
+    temp_file_path = f'{destination_file_path}.part'
+
+    try:
+        with open(temp_file_path, 'wb') as temp_file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                temp_file.write(chunk)
+                if chunk_consumer is not None:
+                    chunk_consumer(chunk)
+
+        os.replace(temp_file_path, destination_file_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_file_path)
+        raise
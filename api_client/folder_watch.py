@@ -0,0 +1,97 @@
+import os
+import stat
+import time
+import fnmatch
+
+
+DEFAULT_STABLE_TIME_IN_SECONDS = 10
+DEFAULT_MARKER_SUFFIX = '.done'
+
+
+class FolderWatch(object):
+    """
+    Finds the files dropped into a folder once they are fully written: either the marker file
+    (the file name with the marker suffix, e.g. 'input.zip.done') exists, or the file's size and modification time
+    have not changed for the stable time. Every file is reported once while it stays in the folder.
+    """
+    def __init__(
+            self,
+            folder_path,
+            file_name_pattern='*.zip',
+            stable_time_in_seconds=DEFAULT_STABLE_TIME_IN_SECONDS,
+            marker_suffix=DEFAULT_MARKER_SUFFIX,
+            require_marker=False):
+        """
+        :param folder_path: Folder to watch
+        :param file_name_pattern: Pattern of the names of the files to report
+        :param stable_time_in_seconds: How long the size and modification time of a file must stay the same
+        :param marker_suffix: Suffix of the marker files which tell that the file has been fully written
+        :param require_marker: True - report only the files with the marker file; False - the stable files as well
+        """
+        self.folder_path = folder_path
+        self.file_name_pattern = file_name_pattern
+        self.stable_time_in_seconds = stable_time_in_seconds
+        self.marker_suffix = marker_suffix
+        self.require_marker = require_marker
+
+        # File path to its size and modification time and the time they were first seen
+        self.candidates = {}
+        self.reported_file_paths = set()
+
+    def poll(self):
+        """
+        Scans the folder
+        :return: Paths of the files which have become ready since the previous scan, the oldest first
+        """
+        now = time.monotonic()
+        file_names = set(os.listdir(self.folder_path))
+        ready_files = []
+
+        for file_name in file_names:
+            if file_name.startswith('.') or not fnmatch.fnmatch(file_name, self.file_name_pattern):
+                continue
+            file_path = os.path.join(self.folder_path, file_name)
+            if file_path in self.reported_file_paths:
+                continue
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+
+            if f'{file_name}{self.marker_suffix}' not in file_names:
+                if self.require_marker:
+                    continue
+                signature = (file_stat.st_size, file_stat.st_mtime_ns)
+                candidate = self.candidates.get(file_path)
+                if candidate is None or candidate[0] != signature:
+                    self.candidates[file_path] = (signature, now)
+                    continue
+                if now - candidate[1] < self.stable_time_in_seconds:
+                    continue
+
+            self.candidates.pop(file_path, None)
+            self.reported_file_paths.add(file_path)
+            ready_files.append((file_stat.st_mtime_ns, file_path))
+
+        # Forget the files which have been moved away, so a new file with the same name is reported again
+        self.candidates = {
+            file_path: candidate for file_path, candidate in self.candidates.items()
+            if os.path.basename(file_path) in file_names}
+        self.reported_file_paths = {
+            file_path for file_path in self.reported_file_paths if os.path.basename(file_path) in file_names}
+
+        result = [file_path for mtime, file_path in sorted(ready_files)]
+        return result
+
+    def get_marker_file_path(self, file_path):
+        result = f'{file_path}{self.marker_suffix}'
+        return result
+
+    def get_unready_file_count(self):
+        """
+        Gets the number of files which are still being written
+        """
+        result = len(self.candidates)
+        return result
@@ -0,0 +1,180 @@
+import logging
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from api_client.job_polling import parse_retry_after
+from api_client.retry_policy import RetryPolicy
+from api_client.retry_policy import ServiceCallGuard
+from api_client.retry_policy import RETRYABLE_STATUS_CODES
+from api_client.retry_policy import MAX_RETRY_AFTER_IN_SECONDS
+from api_client.retry_policy import get_service_name
+from api_client.rate_limiter import RateLimiter
+from api_client.metrics import RequestMetrics
+from api_client.metrics import CountingIterator
+from api_client.metrics import get_body_size
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+# Failures of the service which are not retried, but count for its circuit breaker
+BROKEN_RESPONSE_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+    requests.exceptions.TooManyRedirects)
+
+
+class HttpTransportSettings(object):
+    def __init__(
+            self,
+            pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            keep_alive: bool = True,
+            retry_policy: RetryPolicy = None,
+            rate_limiter: RateLimiter = None):
+        """
+        Settings of the pooled HTTP transport
+        :param pool_connections: Number of per-host connection pools to cache
+        :param pool_maxsize: Maximum number of connections to keep in each per-host pool
+        :param keep_alive: True - reuse connections between requests; False - close connection after each request
+        :param retry_policy: Retries of the failed requests and the circuit breaker; None - default policy
+        :param rate_limiter: Request budgets shared by the processes on the host; None - requests are not limited
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.rate_limiter = rate_limiter
+
+
+class PooledHttpAdapter(HTTPAdapter):
+    """
+    HTTP adapter which logs whether a request has been sent over a new or a reused (kept-alive) connection
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_connection_counts = {}
+
+    def send(self, request, **kwargs):
+        send_begin_time = time.perf_counter()
+        response = super().send(request, **kwargs)
+        self.log_connection_usage(request, response, time.perf_counter() - send_begin_time)
+        return response
+
+    def log_connection_usage(self, request, response, elapsed_seconds):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+
+        pool = getattr(response.raw, '_pool', None)
+        if pool is None:
+            return
+
+        previous_connection_count = self.pool_connection_counts.get(id(pool), 0)
+        self.pool_connection_counts[id(pool)] = pool.num_connections
+        connection_usage = 'new' if pool.num_connections > previous_connection_count else 'reused'
+
+        logging.debug(
+            f"HTTP {request.method} {request.url} - {response.status_code} "
+            f"in {elapsed_seconds * 1000:.1f} ms over {connection_usage} connection "
+            f"to '{pool.host}' (pool connections: {pool.num_connections}; pool requests: {pool.num_requests}).")
+
+
+class HttpTransport(requests.Session):
+    """
+    Pooled, keep-alive HTTP transport shared by the authentication session and all service clients.
+    Failed requests are retried with exponential backoff, and a circuit breaker per service rejects
+    the requests to a service which keeps failing (see RetryPolicy). Every request is recorded in the metrics
+    per endpoint (see RequestMetrics).
+    """
+    def __init__(self, settings: HttpTransportSettings = None, proxies=None):
+        super().__init__()
+        self.settings = settings if settings else HttpTransportSettings()
+
+        adapter = PooledHttpAdapter(
+            pool_connections=self.settings.pool_connections,
+            pool_maxsize=self.settings.pool_maxsize)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+        if not self.settings.keep_alive:
+            self.headers['Connection'] = 'close'
+
+        if proxies:
+            self.proxies.update(proxies)
+
+        self.service_call_guard = ServiceCallGuard(self.settings.retry_policy)
+        self.rate_limiter = self.settings.rate_limiter
+        self.metrics = RequestMetrics()
+
+    def request(self, method, url, *args, **kwargs):
+        retry_policy = self.service_call_guard.retry_policy
+        service_name = get_service_name(url)
+        is_retryable = retry_policy.is_retryable_request(method, kwargs.get('data'))
+        retry_number = 0
+
+        while True:
+            is_trial_request = self.service_call_guard.before_request(service_name)
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+                response = self.send_measured_request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.service_call_guard.record_failure(service_name)
+                if not is_retryable or retry_number >= retry_policy.max_retries:
+                    raise
+                reason = type(e).__name__
+                delay = retry_policy.get_delay(retry_number)
+            except BROKEN_RESPONSE_ERRORS:
+                # The service has answered with a broken response, e.g. a truncated body or endless redirects
+                self.service_call_guard.record_failure(service_name)
+                raise
+            except BaseException:
+                # No outcome, e.g. interrupted or the rate limiter has failed; the circuit must not stay half-open
+                if is_trial_request:
+                    self.service_call_guard.cancel_trial_request(service_name)
+                raise
+            else:
+                self.service_call_guard.record_response(service_name, response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES \
+                        or not is_retryable \
+                        or retry_number >= retry_policy.max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER_IN_SECONDS:
+                    return response
+                reason = response.status_code
+                delay = retry_policy.get_delay(retry_number, retry_after)
+                response.close()
+
+            retry_number += 1
+            self.service_call_guard.record_retry(service_name, method, url, reason, retry_number, delay)
+            self.metrics.record_retry(method, url)
+            time.sleep(delay)
+
+    def send_measured_request(self, method, url, *args, **kwargs):
+        """
+        Sends the request once and records its latency, status code and body sizes
+        """
+        data = kwargs.get('data')
+        counting_data = None
+        if data is not None and hasattr(data, '__next__'):
+            # The size of a streamed body is known only after it's sent
+            counting_data = kwargs['data'] = CountingIterator(data)
+
+        begin_time = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.record_request(method, url, None, time.perf_counter() - begin_time)
+            raise
+        duration = time.perf_counter() - begin_time
+
+        bytes_sent = counting_data.size if counting_data is not None else get_body_size(response.request.body)
+        if kwargs.get('stream'):
+            # The body of a streamed response is read by the caller; its declared length is counted
+            content_length = response.headers.get('Content-Length', '')
+            bytes_received = int(content_length) if content_length.isdigit() else 0
+        else:
+            bytes_received = len(response.content or b'')
+        self.metrics.record_request(method, url, response.status_code, duration, bytes_sent, bytes_received)
+
+        return response
@@ -0,0 +1,142 @@
+import os
+import json
+import random
+import statistics
+import email.utils
+import datetime
+
+
+MIN_POLL_INTERVAL_IN_SECONDS = 1
+MAX_POLL_INTERVAL_IN_SECONDS = 60
+POLL_INTERVAL_BACKOFF_FACTOR = 1.5
+POLL_INTERVAL_JITTER_RATIO = 0.2
+
+# Jobs are polled with the minimal interval within this window around the predicted finish time
+PREDICTED_FINISH_WINDOW_RATIO = 0.1
+MIN_PREDICTED_FINISH_WINDOW_IN_SECONDS = 5
+
+MAX_JOB_DURATIONS_PER_TYPE = 20
+
+
+class JobPollScheduler(object):
+    """
+    Computes delays between job status polls: starts fast, backs off exponentially with jitter,
+    polls densely around the predicted finish time and honours the server's Retry-After.
+    """
+    def __init__(
+            self,
+            predicted_duration_in_seconds=None,
+            min_interval_in_seconds=MIN_POLL_INTERVAL_IN_SECONDS,
+            max_interval_in_seconds=MAX_POLL_INTERVAL_IN_SECONDS):
+        """
+        :param predicted_duration_in_seconds: Predicted job duration; None - there is no prediction
+        :param min_interval_in_seconds: Delay before the first poll and within the predicted finish window
+        :param max_interval_in_seconds: Upper bound of the backed off delay
+        """
+        self.predicted_duration_in_seconds = predicted_duration_in_seconds
+        self.min_interval_in_seconds = min_interval_in_seconds
+        self.max_interval_in_seconds = max_interval_in_seconds
+        self.interval_in_seconds = min_interval_in_seconds
+
+    def next_delay(self, elapsed_seconds, retry_after_seconds=None):
+        """
+        Computes the delay before the next poll
+        :param elapsed_seconds: Seconds elapsed since the job has been submitted, which the predicted duration
+         is counted from; the seconds elapsed since the wait has begun if there is no prediction
+        :param retry_after_seconds: Delay requested by the server (Retry-After header); None - not requested
+        :return: Delay in seconds
+        """
+        window = self.get_predicted_finish_window()
+
+        if window and window[0] <= elapsed_seconds <= window[1]:
+            # The job is about to finish. Poll densely and restart the back off after the window.
+            self.interval_in_seconds = self.min_interval_in_seconds
+            result = self.min_interval_in_seconds
+        else:
+            result = self.interval_in_seconds
+            self.interval_in_seconds = min(
+                self.interval_in_seconds * POLL_INTERVAL_BACKOFF_FACTOR,
+                self.max_interval_in_seconds)
+            if window and elapsed_seconds < window[0]:
+                # Do not sleep through the beginning of the predicted finish window
+                result = max(min(result, window[0] - elapsed_seconds), self.min_interval_in_seconds)
+
+        result *= random.uniform(1 - POLL_INTERVAL_JITTER_RATIO, 1 + POLL_INTERVAL_JITTER_RATIO)
+
+        if retry_after_seconds is not None:
+            result = max(result, retry_after_seconds)
+
+        return result
+
+    def get_predicted_finish_window(self):
+        if self.predicted_duration_in_seconds is None:
+            return None
+
+        half_width = max(
+            self.predicted_duration_in_seconds * PREDICTED_FINISH_WINDOW_RATIO,
+            MIN_PREDICTED_FINISH_WINDOW_IN_SECONDS)
+        result = (self.predicted_duration_in_seconds - half_width, self.predicted_duration_in_seconds + half_width)
+        return result
+
+
+class JobDurationHistory(object):
+    """
+    Recorded durations of the past jobs per job type, kept in a JSON file
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def predict_duration(self, job_type):
+        """
+        Predicts the job duration as the median of the recorded durations of the jobs of the same type
+        :param job_type: Job type
+        :return: Predicted duration in seconds; None - there are no recorded jobs of the type
+        """
+        durations = self.load().get(job_type)
+        if not durations:
+            return None
+
+        result = statistics.median(durations)
+        return result
+
+    def record(self, job_type, duration_in_seconds):
+        history = self.load()
+        durations = history.setdefault(job_type, [])
+        durations.append(round(duration_in_seconds, 1))
+        del durations[:-MAX_JOB_DURATIONS_PER_TYPE]
+
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        temp_file_path = f'{self.file_path}.{os.getpid()}.tmp'
+        with open(temp_file_path, 'w') as history_file:
+            json.dump(history, history_file)
+        os.replace(temp_file_path, self.file_path)
+
+    def load(self):
+        try:
+            with open(self.file_path, 'r') as history_file:
+                result = json.load(history_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        return result
+
+
+def parse_retry_after(retry_after):
+    """
+    Parses the value of the Retry-After header
+    :param retry_after: Either delay in seconds or HTTP date
+    :return: Delay in seconds; None - the header is missing or malformed
+    """
+    if not retry_after:
+        return None
+
+    if retry_after.strip().isdigit():
+        return int(retry_after)
+
+    try:
+        retry_datetime = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    result = (retry_datetime - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    return max(result, 0)
@@ -1,14 +1,15 @@
-import requests
 import urllib.parse
 import logging
+import requests
 from api_client.security import Session
+from api_client.retry_policy import CircuitBreakerOpenError
+from api_client.retry_policy import RETRYABLE_STATUS_CODES
+from api_client.job_polling import parse_retry_after
+from api_client.job_waiter import JobWaiter
+from api_client.job_waiter import DEFAULT_MAX_CONCURRENT_POLLS
+
 
-# Configure the logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s\t%(asctime)s\t%(message)s',
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+PING_URL_PATH = '/job/docs/'
 
 
 class JobServiceClient(object):
@@ -19,18 +20,74 @@ class JobServiceClient(object):
     def get_job(self, job_id):
         url_path = f'/job/v1/jobs/{job_id}'
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(url, headers=self.session.get_auth_header(), proxies=self.session.proxies)
+        response = self.session.transport.get(url, headers=self.session.get_auth_header())
         response.raise_for_status()
 
         jobs_status = response.json()
         return jobs_status
 
+    def poll_job(self, job_id):
+        """
+        Gets job status for polling
+        :param job_id: Job id
+        :return: Job status (None - the service is throttling the requests or is temporarily unavailable)
+         and the delay in seconds requested by the service before the next poll (None - not requested)
+        """
+        url_path = f'/job/v1/jobs/{job_id}'
+        url = urllib.parse.urljoin(self.service_base_url, url_path)
+        # A long wait must outlive the service outages, the job is polled again later
+        try:
+            response = self.session.transport.get(url, headers=self.session.get_auth_header())
+        except CircuitBreakerOpenError as e:
+            return None, e.retry_after_in_seconds
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logging.warning(f"Job status (job id: '{job_id}') has not been received. Error: {e}")
+            return None, None
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            logging.warning(
+                f"Job status (job id: '{job_id}') has not been received. Status code: {response.status_code}")
+            return None, retry_after
+        response.raise_for_status()
+
+        result = response.json(), retry_after
+        return result
+
+    def wait_jobs(
+            self,
+            job_ids,
+            wait_timeout_in_seconds,
+            max_concurrent_polls=DEFAULT_MAX_CONCURRENT_POLLS,
+            job_duration_history=None):
+        """
+        Waits for the jobs polling them from one scheduler with a bounded number of concurrent polls.
+        Duplicate job ids are awaited once.
+        :param job_ids: Ids of the jobs to wait for
+        :param wait_timeout_in_seconds: Wait time of every job on the client side
+        :param max_concurrent_polls: Maximum number of job status requests in flight
+        :param job_duration_history: Recorded durations of the past jobs (see JobWaiter)
+        :return: Iterator of job id, job final status and the wait error in the order the jobs reach terminal state
+         or their waits fail (see JobWaiter.iter_completed)
+        """
+        job_waiter = self.create_job_waiter(wait_timeout_in_seconds, max_concurrent_polls, job_duration_history)
+        for job_id in job_ids:
+            job_waiter.add(job_id)
+
+        result = job_waiter.iter_completed()
+        return result
+
+    def create_job_waiter(
+            self,
+            wait_timeout_in_seconds,
+            max_concurrent_polls=DEFAULT_MAX_CONCURRENT_POLLS,
+            job_duration_history=None):
+        result = JobWaiter(self, wait_timeout_in_seconds, max_concurrent_polls, job_duration_history)
+        return result
+
     def ping(self):
-        url_path = "/job/docs/"
+        url_path = PING_URL_PATH
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(
-            url,
-            proxies=self.session.proxies)
+        response = self.session.transport.get(url)
 
         if response.ok:
             logging.info(f"Job service connectivity test to '{self.service_base_url}' - PASSED")
@@ -0,0 +1,167 @@
+import time
+import heapq
+import logging
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from api_client.job_polling import JobPollScheduler
+
+
+DEFAULT_MAX_CONCURRENT_POLLS = 8
+
+
+class JobWaitTimeoutError(Exception):
+    pass
+
+
+class JobWaitState(object):
+    def __init__(self, job_id, wait_begin_time, submit_time=None):
+        self.job_id = job_id
+        self.wait_begin_time = wait_begin_time
+        self.submit_time = submit_time
+        self.poll_scheduler = JobPollScheduler()
+        self.poll_count = 0
+        self.previous_poll_time = None
+
+
+class JobWaiter(object):
+    """
+    Waits for many jobs at once. All jobs are polled from one scheduler with a bounded number
+    of concurrent polls, each job on its own adaptive schedule (see JobPollScheduler).
+    """
+    def __init__(
+            self,
+            js_client,
+            wait_timeout_in_seconds,
+            max_concurrent_polls=DEFAULT_MAX_CONCURRENT_POLLS,
+            job_duration_history=None):
+        """
+        :param js_client: Job service client
+        :param wait_timeout_in_seconds: Wait time of every job on the client side
+        :param max_concurrent_polls: Maximum number of job status requests in flight, at least 1
+        :param job_duration_history: Recorded durations of the past jobs used to predict the finish time
+         and updated with the durations of the jobs awaited from their submission (see add); None - do not predict
+        """
+        if max_concurrent_polls < 1:
+            raise ValueError(f"Maximum number of concurrent polls must be at least 1, got {max_concurrent_polls}.")
+
+        self.js_client = js_client
+        self.wait_timeout_in_seconds = wait_timeout_in_seconds
+        self.max_concurrent_polls = max_concurrent_polls
+        self.job_duration_history = job_duration_history
+
+        self.job_wait_states = {}
+        self.poll_queue = []
+        self.poll_queue_sequence = itertools.count()
+
+    def add(self, job_id, submit_time=None):
+        """
+        Adds the job to wait for. Adding a job which is already awaited has no effect.
+        It can be called while iterating over the completed jobs.
+        :param job_id: Job id
+        :param submit_time: Monotonic time the job has been submitted at; the job duration since then is recorded
+         in the job duration history. None - the job has been submitted before the wait (e.g. it's awaited by id),
+         its duration is not known and it's not recorded.
+        """
+        if job_id in self.job_wait_states:
+            return
+
+        now = time.monotonic()
+        self.job_wait_states[job_id] = JobWaitState(job_id, now, submit_time)
+        self.schedule_poll(job_id, now)
+
+    def __len__(self):
+        return len(self.job_wait_states)
+
+    def iter_completed(self):
+        """
+        Polls the jobs and yields each job as soon as it reaches a terminal state or its wait fails.
+        The wait of a job fails if its status cannot be received or it's still running after the wait timeout;
+        the other jobs are still awaited.
+        :return: Iterator of job id, job final status (None - the wait has failed) and the wait error
+         (e.g. JobWaitTimeoutError; None - the job has reached a terminal state)
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_polls)
+        in_flight_polls = {}
+
+        try:
+            while self.job_wait_states:
+                now = time.monotonic()
+                while self.poll_queue \
+                        and self.poll_queue[0][0] <= now \
+                        and len(in_flight_polls) < self.max_concurrent_polls:
+                    poll_time, sequence, job_id = heapq.heappop(self.poll_queue)
+                    in_flight_polls[executor.submit(self.js_client.poll_job, job_id)] = (job_id, time.monotonic())
+
+                timeout = None
+                if self.poll_queue and len(in_flight_polls) < self.max_concurrent_polls:
+                    timeout = max(self.poll_queue[0][0] - now, 0)
+
+                if not in_flight_polls:
+                    time.sleep(timeout)
+                    continue
+
+                done, not_done = wait(in_flight_polls, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id, poll_time = in_flight_polls.pop(future)
+                    try:
+                        job_status, retry_after = future.result()
+                        is_completed = self.handle_poll_result(job_id, poll_time, job_status, retry_after)
+                    except Exception as e:
+                        # The wait of this job has failed, e.g. its status is refused or it has timed out
+                        del self.job_wait_states[job_id]
+                        yield job_id, None, e
+                        continue
+                    if is_completed:
+                        yield job_id, job_status, None
+        finally:
+            for future in in_flight_polls:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def handle_poll_result(self, job_id, poll_time, job_status, retry_after):
+        """
+        Handles the job status poll result
+        :return: True - job has reached terminal state; False - job is still running and its next poll is scheduled
+        """
+        job_wait_state = self.job_wait_states[job_id]
+        job_wait_state.poll_count += 1
+        now = time.monotonic()
+        wait_duration = now - job_wait_state.wait_begin_time
+
+        if job_status is not None and job_status['status'] != 'RUNNING':
+            # The job has finished somewhere between the previous poll and this one
+            if job_wait_state.previous_poll_time is not None:
+                detection_lag = poll_time - job_wait_state.previous_poll_time
+            else:
+                detection_lag = 0
+            if self.job_duration_history is not None and job_wait_state.submit_time is not None:
+                self.job_duration_history.record(job_status['type'], now - job_wait_state.submit_time)
+            logging.info(
+                f"Job wait (job id: '{job_id}') has finished in {wait_duration:.1f} s "
+                f"after {job_wait_state.poll_count} polls; detection lag: up to {detection_lag:.1f} s.")
+            del self.job_wait_states[job_id]
+            return True
+
+        # The predicted duration is counted from the job submission, so it's of no use if the submit time is unknown
+        if job_status is not None and job_wait_state.poll_count == 1 and self.job_duration_history is not None \
+                and job_wait_state.submit_time is not None:
+            job_wait_state.poll_scheduler.predicted_duration_in_seconds = \
+                self.job_duration_history.predict_duration(job_status['type'])
+
+        if wait_duration >= self.wait_timeout_in_seconds:
+            raise JobWaitTimeoutError(
+                f"Job wait has been terminated by timeout. "
+                f"Job id: {job_id}; timeout: {self.wait_timeout_in_seconds} s.")
+
+        job_wait_state.previous_poll_time = poll_time
+        # Put less load on the job service. Make a delay before the next call
+        job_duration = now - job_wait_state.submit_time if job_wait_state.submit_time is not None else wait_duration
+        delay = job_wait_state.poll_scheduler.next_delay(job_duration, retry_after)
+        delay = min(delay, self.wait_timeout_in_seconds - wait_duration)
+        self.schedule_poll(job_id, now + delay)
+        return False
+
+    def schedule_poll(self, job_id, poll_time):
+        heapq.heappush(self.poll_queue, (poll_time, next(self.poll_queue_sequence), job_id))
@@ -0,0 +1,270 @@
+import os
+import re
+import tempfile
+import threading
+import contextlib
+import urllib.parse
+
+
+# Upper bounds of the request latency histogram buckets
+LATENCY_BUCKETS_IN_SECONDS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+# Status code label of the requests which have not got a response (connection errors and timeouts)
+ERROR_STATUS_CODE = 'error'
+# Path segments with digits are ids, except the API version, e.g. '/job/v1/jobs/123' -> '/job/v1/jobs/{id}'
+VERSION_SEGMENT_PATTERN = re.compile(r'^v\d+$')
+
+
+def get_endpoint_path(url):
+    """
+    Gets the path template the requests are tracked by: the path of the URL with the ids replaced by '{id}'
+    """
+    path_segments = urllib.parse.urlsplit(url).path.split('/')
+    result = '/'.join(
+        '{id}' if any(character.isdigit() for character in segment) and not VERSION_SEGMENT_PATTERN.match(segment)
+        else segment
+        for segment in path_segments)
+    return result
+
+
+def get_body_size(body):
+    """
+    Gets the size of the request body sent
+    :return: Size in bytes; None - the body is streamed and its size is not known
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if hasattr(body, '__len__'):
+        return len(body)
+
+    return None
+
+
+class CountingIterator(object):
+    """
+    Streamed request body which counts the bytes taken from it
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.size = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self.chunks)
+        self.size += len(chunk)
+        return chunk
+
+
+class RequestMetrics(object):
+    """
+    Request counts, status codes, retries, bytes sent and received and the latency histogram per endpoint
+    (method and path template), shared by all requests of a transport. Every attempt of a retried request
+    is counted as a request. The latency is the time until the response headers of a streamed response
+    and until the whole response otherwise; the wait for the rate limiter is not included.
+    """
+    def __init__(self, latency_buckets_in_seconds=None):
+        self.latency_buckets_in_seconds = latency_buckets_in_seconds or LATENCY_BUCKETS_IN_SECONDS
+
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record_request(self, method, url, status_code, duration_in_seconds, bytes_sent=0, bytes_received=0):
+        """
+        Records the request
+        :param status_code: Response status code; None - no response has been received
+        :param duration_in_seconds: Latency of the request
+        :param bytes_sent: Size of the request body
+        :param bytes_received: Size of the response body
+        """
+        with self.lock:
+            endpoint_stats = self.get_endpoint_stats(method, url)
+            status_code = ERROR_STATUS_CODE if status_code is None else str(status_code)
+            endpoint_stats['requests'] += 1
+            endpoint_stats['status_codes'][status_code] = endpoint_stats['status_codes'].get(status_code, 0) + 1
+            endpoint_stats['bytes_sent'] += bytes_sent or 0
+            endpoint_stats['bytes_received'] += bytes_received or 0
+            endpoint_stats['latency_sum_in_seconds'] += duration_in_seconds
+            endpoint_stats['latency_max_in_seconds'] = max(
+                endpoint_stats['latency_max_in_seconds'],
+                duration_in_seconds)
+            for bucket_index, bucket_upper_bound in enumerate(self.latency_buckets_in_seconds):
+                if duration_in_seconds <= bucket_upper_bound:
+                    endpoint_stats['latency_bucket_counts'][bucket_index] += 1
+                    break
+            else:
+                endpoint_stats['latency_bucket_counts'][-1] += 1
+
+    def record_retry(self, method, url):
+        with self.lock:
+            self.get_endpoint_stats(method, url)['retries'] += 1
+
+    def get_endpoint_stats(self, method, url):
+        endpoint = (method.upper(), get_endpoint_path(url))
+        result = self.stats.get(endpoint)
+        if result is None:
+            result = self.stats[endpoint] = {
+                'requests': 0,
+                'retries': 0,
+                'status_codes': {},
+                'bytes_sent': 0,
+                'bytes_received': 0,
+                'latency_sum_in_seconds': 0.0,
+                'latency_max_in_seconds': 0.0,
+                # Requests per bucket; the requests over the last bound are in the last item
+                'latency_bucket_counts': [0] * (len(self.latency_buckets_in_seconds) + 1)
+            }
+
+        return result
+
+    def get_stats(self):
+        """
+        Gets the metrics per endpoint
+        :return: Metrics by method and path template, e.g. {'GET /job/v1/jobs/{id}': {'requests': ..., ...}}
+        with the mean and the estimated median, 90th and 99th percentile latencies
+        """
+        with self.lock:
+            stats = {endpoint: dict(endpoint_stats, status_codes=dict(endpoint_stats['status_codes']),
+                                    latency_bucket_counts=list(endpoint_stats['latency_bucket_counts']))
+                     for endpoint, endpoint_stats in self.stats.items()}
+
+        result = {}
+        for (method, path), endpoint_stats in sorted(stats.items(), key=lambda item: (item[0][1], item[0][0])):
+            bucket_counts = endpoint_stats.pop('latency_bucket_counts')
+            requests = endpoint_stats['requests']
+            endpoint_stats['latency_mean_in_seconds'] = \
+                endpoint_stats['latency_sum_in_seconds'] / requests if requests else None
+            for quantile_name, quantile in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]:
+                endpoint_stats[f'latency_{quantile_name}_in_seconds'] = self.estimate_quantile(
+                    bucket_counts, quantile, endpoint_stats['latency_max_in_seconds'])
+            endpoint_stats['latency_buckets'] = self.get_cumulative_buckets(bucket_counts)
+            for stat_name, value in endpoint_stats.items():
+                if stat_name.startswith('latency_') and isinstance(value, float):
+                    endpoint_stats[stat_name] = round(value, 6)
+            result[f'{method} {path}'] = endpoint_stats
+
+        return result
+
+    def get_cumulative_buckets(self, bucket_counts):
+        """
+        :return: Cumulative request counts by the bucket upper bound as in the Prometheus histograms
+        """
+        result = {}
+        cumulative_count = 0
+        for bucket_upper_bound, bucket_count in zip(self.latency_buckets_in_seconds + ['+Inf'], bucket_counts):
+            cumulative_count += bucket_count
+            result[str(bucket_upper_bound)] = cumulative_count
+
+        return result
+
+    def estimate_quantile(self, bucket_counts, quantile, max_in_seconds):
+        """
+        Estimates the latency quantile by linear interpolation within its bucket, as Prometheus does
+        """
+        total_count = sum(bucket_counts)
+        if not total_count:
+            return None
+
+        rank = quantile * total_count
+        cumulative_count = 0
+        for bucket_index, bucket_count in enumerate(bucket_counts):
+            if cumulative_count + bucket_count >= rank and bucket_count:
+                lower_bound = self.latency_buckets_in_seconds[bucket_index - 1] if bucket_index else 0
+                upper_bound = self.latency_buckets_in_seconds[bucket_index] \
+                    if bucket_index < len(self.latency_buckets_in_seconds) else max_in_seconds
+                result = lower_bound + (upper_bound - lower_bound) * (rank - cumulative_count) / bucket_count
+                return min(result, max_in_seconds)
+            cumulative_count += bucket_count
+
+        return max_in_seconds
+
+    def format_prometheus(self, labels=None):
+        """
+        Formats the metrics in the Prometheus text exposition format
+        :param labels: Labels added to every sample, e.g. {'command': 'import'}
+        :return: Lines of the metrics
+        """
+        stats = self.get_stats()
+        samples = {
+            'apic_http_requests_total': [],
+            'apic_http_retries_total': [],
+            'apic_http_request_bytes_total': [],
+            'apic_http_response_bytes_total': [],
+            'apic_http_request_duration_seconds': []
+        }
+        for endpoint, endpoint_stats in stats.items():
+            method, path = endpoint.split(' ', 1)
+            endpoint_labels = dict(labels or {}, method=method, endpoint=path)
+            for status_code, count in sorted(endpoint_stats['status_codes'].items()):
+                samples['apic_http_requests_total'].append(
+                    format_sample('apic_http_requests_total', dict(endpoint_labels, code=status_code), count))
+            samples['apic_http_retries_total'].append(
+                format_sample('apic_http_retries_total', endpoint_labels, endpoint_stats['retries']))
+            samples['apic_http_request_bytes_total'].append(
+                format_sample('apic_http_request_bytes_total', endpoint_labels, endpoint_stats['bytes_sent']))
+            samples['apic_http_response_bytes_total'].append(
+                format_sample('apic_http_response_bytes_total', endpoint_labels, endpoint_stats['bytes_received']))
+            histogram_samples = samples['apic_http_request_duration_seconds']
+            for bucket_upper_bound, cumulative_count in endpoint_stats['latency_buckets'].items():
+                histogram_samples.append(format_sample(
+                    'apic_http_request_duration_seconds_bucket',
+                    dict(endpoint_labels, le=bucket_upper_bound),
+                    cumulative_count))
+            histogram_samples.append(format_sample(
+                'apic_http_request_duration_seconds_sum', endpoint_labels, endpoint_stats['latency_sum_in_seconds']))
+            histogram_samples.append(format_sample(
+                'apic_http_request_duration_seconds_count', endpoint_labels, endpoint_stats['requests']))
+
+        descriptions = {
+            'apic_http_requests_total': ('counter', 'HTTP requests by endpoint and status code'),
+            'apic_http_retries_total': ('counter', 'Retries of the failed HTTP requests by endpoint'),
+            'apic_http_request_bytes_total': ('counter', 'Bytes of the HTTP request bodies sent by endpoint'),
+            'apic_http_response_bytes_total': ('counter', 'Bytes of the HTTP response bodies received by endpoint'),
+            'apic_http_request_duration_seconds': ('histogram', 'Latency of the HTTP requests by endpoint')
+        }
+        result = []
+        for metric_name, metric_samples in samples.items():
+            metric_type, metric_help = descriptions[metric_name]
+            result += format_metric_header(metric_name, metric_type, metric_help) + metric_samples
+
+        return result
+
+
+def format_metric_header(metric_name, metric_type, metric_help):
+    result = [f'# HELP {metric_name} {metric_help}', f'# TYPE {metric_name} {metric_type}']
+    return result
+
+
+def format_sample(metric_name, labels, value):
+    label_text = ','.join(f'{name}="{escape_label_value(label_value)}"' for name, label_value in labels.items())
+    result = f'{metric_name}{{{label_text}}} {value}' if label_text else f'{metric_name} {value}'
+    return result
+
+
+def escape_label_value(value):
+    result = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return result
+
+
+def write_prometheus_textfile(file_path, lines):
+    """
+    Writes the metrics for the textfile collector of the Prometheus node exporter. The file is replaced at once,
+    so the collector never reads a partly written file.
+    """
+    # Commands running at once in the daemon or the watch mode write the same file, each through its own temp file
+    file_descriptor, temp_file_path = tempfile.mkstemp(
+        prefix=f'{os.path.basename(file_path)}.',
+        suffix='.tmp',
+        dir=os.path.dirname(file_path) or '.')
+    try:
+        with os.fdopen(file_descriptor, 'w') as textfile:
+            textfile.write('\n'.join(lines) + '\n')
+        # The collector runs as another user
+        os.chmod(temp_file_path, 0o644)
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_file_path)
+        raise
@@ -0,0 +1,124 @@
+import os
+import re
+import uuid
+
+
+# Control characters percent-encoded in the header parameter values, except ESC as in urllib3
+CONTROL_CHARACTER_PATTERN = re.compile('[\x00-\x1a\x1c-\x1f]')
+
+
+class MultipartFileEncoder(object):
+    """
+    Streaming multipart/form-data request body with form fields and one file.
+    The file is read in chunks while the body is sent, and the total length is known up front,
+    so the request is sent with Content-Length and memory use does not depend on the file size.
+    """
+    def __init__(self, fields: dict, file_field_name, file_name, file_object, content_hash=None):
+        """
+        :param fields: Form fields sent before the file
+        :param file_field_name: Name of the form field with the file
+        :param file_name: Name of the file sent in the Content-Disposition header
+        :param file_object: File opened in binary mode. It's read from its current position and is not closed.
+        :param content_hash: Hash object (e.g. hashlib.sha256()) updated with the file content as it's sent,
+         so the file is hashed without reading it again; None - the content is not hashed
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.file_object = file_object
+        self.content_hash = content_hash
+        self.preamble, self.epilogue = create_multipart_envelope(self.boundary, fields, file_field_name, file_name)
+
+        file_size = os.fstat(file_object.fileno()).st_size - file_object.tell()
+        self.length = len(self.preamble) + file_size + len(self.epilogue)
+        self.position = 0
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length - self.position
+
+        result = bytearray()
+        while len(result) < size and self.position < self.length:
+            chunk = self.read_next(size - len(result))
+            result += chunk
+            self.position += len(chunk)
+
+        return bytes(result)
+
+    def read_next(self, size):
+        preamble_end = len(self.preamble)
+        epilogue_begin = self.length - len(self.epilogue)
+
+        if self.position < preamble_end:
+            return self.preamble[self.position:self.position + size]
+
+        if self.position < epilogue_begin:
+            chunk = self.file_object.read(min(size, epilogue_begin - self.position))
+            if not chunk:
+                raise IOError(f"File '{self.file_object.name}' has been truncated while being uploaded.")
+            if self.content_hash is not None:
+                self.content_hash.update(chunk)
+            return chunk
+
+        epilogue_position = self.position - epilogue_begin
+        return self.epilogue[epilogue_position:epilogue_position + size]
+
+
+class MultipartStreamEncoder(object):
+    """
+    Streaming multipart/form-data request body with form fields and one file of unknown length,
+    e.g. an archive produced while it's sent. The request is sent with the chunked transfer encoding.
+    """
+    def __init__(self, fields: dict, file_field_name, file_name, file_chunks):
+        """
+        :param fields: Form fields sent before the file
+        :param file_field_name: Name of the form field with the file
+        :param file_name: Name of the file sent in the Content-Disposition header
+        :param file_chunks: Iterable of the file's chunks
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.file_chunks = file_chunks
+        self.preamble, self.epilogue = create_multipart_envelope(self.boundary, fields, file_field_name, file_name)
+
+    def __iter__(self):
+        yield self.preamble
+        for chunk in self.file_chunks:
+            if chunk:
+                yield chunk
+        yield self.epilogue
+
+
+def create_multipart_envelope(boundary, fields: dict, file_field_name, file_name):
+    """
+    Creates the parts of the multipart body sent before and after the file
+    :return: Preamble with the form fields and the file part headers, and epilogue
+    """
+    preamble_parts = []
+    for field_name, field_value in fields.items():
+        preamble_parts.append(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{quote(field_name)}"\r\n'
+            f'\r\n'
+            f'{field_value}\r\n')
+    preamble_parts.append(
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{quote(file_field_name)}"; '
+        f'filename="{quote(file_name)}"\r\n'
+        f'\r\n')
+
+    preamble = ''.join(preamble_parts).encode('utf-8')
+    epilogue = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return preamble, epilogue
+
+
+def quote(text):
+    """
+    Quotes the header parameter value as the browsers and requests (urllib3) do, following the HTML5 form
+    submission: double quotes and control characters are percent-encoded
+    """
+    result = str(text).replace('\\', '\\\\').replace('"', '%22')
+    result = CONTROL_CHARACTER_PATTERN.sub(lambda match: f'%{ord(match.group()):02X}', result)
+    return result
@@ -1,15 +1,10 @@
-import requests
 import urllib.parse
 import logging
 import json
 from api_client.security import Session
 
-# Configure the logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s\t%(asctime)s\t%(message)s',
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+
+PING_URL_PATH = '/project/docs/'
 
 
 class ProjectServiceClient(object):
@@ -24,7 +19,7 @@ class ProjectServiceClient(object):
             url_path = f'/project/v1/analyses/{analysis_id}/jobs'
         url = urllib.parse.urljoin(self.service_base_url, url_path)
         logging.info(f'now making run analysis call with url: {url}')
-        response = requests.post(url, headers=self.session.get_auth_header(), proxies=self.session.proxies)
+        response = self.session.transport.post(url, headers=self.session.get_auth_header())
         response.raise_for_status()
 
         job_info = response.json()
@@ -38,23 +33,21 @@ class ProjectServiceClient(object):
         headers = self.session.get_auth_header()
         headers["Content-Type"] = "application/json"
         headers["Accept"] = "application/json"
-        response = requests.post(url, headers=headers, proxies=self.session.proxies, data=json.dumps(payload))
+        response = self.session.transport.post(url, headers=headers, data=json.dumps(payload))
         response.raise_for_status() 
         return response.json()
 
     def get_analysis_scenarios(self, analysis_id: int) -> list:
         url_path = f'/project/1.0/analyses/{analysis_id}/scenarios'
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(url, headers=self.session.get_auth_header(), proxies=self.session.proxies)
+        response = self.session.transport.get(url, headers=self.session.get_auth_header())
         response.raise_for_status() 
         return response.json()
 
     def ping(self):
-        url_path = "/project/docs/"
+        url_path = PING_URL_PATH
         url = urllib.parse.urljoin(self.service_base_url, url_path)
-        response = requests.get(
-            url,
-            proxies=self.session.proxies)
+        response = self.session.transport.get(url)
 
         if response.ok:
             logging.info(f"Project service connectivity test to '{self.service_base_url}' - PASSED")
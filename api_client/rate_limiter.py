@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import urllib.parse
+from api_client.file_lock import FileLock
+from api_client.retry_policy import get_service_name
+
+
+DEFAULT_HOST_REQUESTS_PER_SECOND = 20
+DEFAULT_SERVICE_REQUESTS_PER_SECOND = 10
+DEFAULT_BURST = 10
+
+
+class RateLimiter(object):
+    """
+    Token buckets shared by all processes on the same host: one bucket per service host and one per service.
+    Each bucket is a small file updated under a file lock. A request takes a token from both buckets of its URL;
+    when a bucket is empty, the token is reserved ahead and the caller waits until it's due,
+    so the waiting processes are served in the order they have come without holding the lock.
+    """
+    def __init__(
+            self,
+            state_dir,
+            host_requests_per_second=DEFAULT_HOST_REQUESTS_PER_SECOND,
+            service_requests_per_second=DEFAULT_SERVICE_REQUESTS_PER_SECOND,
+            burst=DEFAULT_BURST):
+        """
+        :param state_dir: Directory of the bucket files shared by the processes
+        :param host_requests_per_second: Requests per second to a host; 0 - no limit
+        :param service_requests_per_second: Requests per second to a service (host and first path segment); 0 - no limit
+        :param burst: Number of requests which can be sent at once after a quiet period
+        """
+        self.state_dir = state_dir
+        self.host_requests_per_second = host_requests_per_second
+        self.service_requests_per_second = service_requests_per_second
+        self.burst = max(burst, 1)
+
+        # Metrics of this process per bucket
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    def acquire(self, url):
+        """
+        Waits until the request to the URL fits the budgets
+        :param url: Request URL
+        """
+        wait_time = self.reserve(url)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def reserve(self, url):
+        """
+        Takes a token from the buckets of the URL without waiting
+        :param url: Request URL
+        :return: Time in seconds the caller has to wait before sending the request
+        """
+        buckets = [
+            (urllib.parse.urlsplit(url).netloc, self.host_requests_per_second),
+            (get_service_name(url), self.service_requests_per_second)
+        ]
+
+        result = 0
+        for bucket_name, requests_per_second in buckets:
+            if not requests_per_second:
+                continue
+            wait_time = self.take_token(bucket_name, requests_per_second)
+            self.record_wait(bucket_name, wait_time)
+            result = max(result, wait_time)
+
+        return result
+
+    def take_token(self, bucket_name, requests_per_second):
+        bucket_file_path = self.get_bucket_file_path(bucket_name)
+
+        with FileLock(f'{bucket_file_path}.lock'):
+            # Wall-clock time, since the buckets are shared by processes
+            now = time.time()
+            try:
+                with open(bucket_file_path, 'r') as bucket_file:
+                    bucket = json.load(bucket_file)
+                tokens = bucket['tokens'] + max(now - bucket['time'], 0) * requests_per_second
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                tokens = self.burst
+
+            # The tokens go below zero when they are reserved ahead
+            tokens = min(tokens, self.burst) - 1
+            with open(bucket_file_path, 'w') as bucket_file:
+                json.dump({'name': bucket_name, 'tokens': tokens, 'time': now}, bucket_file)
+
+        result = -tokens / requests_per_second if tokens < 0 else 0
+        return result
+
+    def get_bucket_file_path(self, bucket_name):
+        file_name = hashlib.sha256(bucket_name.encode('utf-8')).hexdigest()[:32]
+        result = os.path.join(self.state_dir, f'{file_name}.json')
+        return result
+
+    def record_wait(self, bucket_name, wait_time):
+        with self.stats_lock:
+            bucket_stats = self.stats.setdefault(bucket_name, {
+                'requests': 0, 'delayed_requests': 0, 'wait_time_in_seconds': 0, 'max_wait_in_seconds': 0})
+            bucket_stats['requests'] += 1
+            if wait_time > 0:
+                bucket_stats['delayed_requests'] += 1
+                bucket_stats['wait_time_in_seconds'] += wait_time
+                bucket_stats['max_wait_in_seconds'] = max(bucket_stats['max_wait_in_seconds'], wait_time)
+
+    def get_stats(self):
+        """
+        Gets the time this process has waited for each bucket
+        :return: Number of requests, delayed requests, total and maximum wait time in seconds per bucket
+        """
+        with self.stats_lock:
+            result = {bucket_name: dict(bucket_stats) for bucket_name, bucket_stats in self.stats.items()}
+
+        return result
@@ -0,0 +1,215 @@
+import os
+import time
+import shutil
+import hashlib
+import sqlite3
+import threading
+import contextlib
+from api_client.file_lock import FileLock
+
+
+DEFAULT_MAX_SIZE_IN_MEGABYTES = 1024
+# How long a process waits for another one writing to the cache index
+INDEX_LOCK_TIMEOUT_IN_SECONDS = 30
+
+
+class ResultsCache(object):
+    """
+    Analysis results files kept on the disk with the ETag and Last-Modified values they were downloaded with,
+    so a file which has not changed is revalidated with a conditional request instead of being downloaded again.
+    The cache is shared by the processes on the same host and bound to the service. The least recently used files
+    are evicted once the cache grows over its size.
+    """
+    def __init__(self, cache_dir, service_base_url, max_size_in_bytes=DEFAULT_MAX_SIZE_IN_MEGABYTES * 1024 * 1024):
+        """
+        :param cache_dir: Directory with the cached files and their index
+        :param service_base_url: File Management Service base URL
+        :param max_size_in_bytes: Maximum total size of the cached files
+        """
+        self.cache_dir = cache_dir
+        self.service_base_url = service_base_url
+        self.max_size_in_bytes = max_size_in_bytes
+
+        # Counters of this process
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'entry_key TEXT PRIMARY KEY, '
+                'analysis_id TEXT NOT NULL, '
+                'etag TEXT, '
+                'last_modified TEXT, '
+                'file_size INTEGER NOT NULL, '
+                'last_used_at REAL NOT NULL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def lock(self, analysis_id):
+        """
+        Lock of the cache entry held while the entry is revalidated, downloaded and served
+        """
+        result = self.get_entry_lock(self.get_entry_key(analysis_id))
+        return result
+
+    def get_entry_lock(self, entry_key):
+        result = FileLock(os.path.join(self.cache_dir, f'{entry_key}.lock'))
+        return result
+
+    def get_validators(self, analysis_id):
+        """
+        Gets the validators of the cached file
+        :return: ETag and Last-Modified values ({'etag': ..., 'last_modified': ...}); None - the file is not cached
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                'SELECT etag, last_modified FROM results WHERE entry_key = ?',
+                (self.get_entry_key(analysis_id),)).fetchone()
+
+        if row is None or not os.path.isfile(self.get_file_path(analysis_id)):
+            return None
+
+        result = {'etag': row[0], 'last_modified': row[1]}
+        return result
+
+    def get_download_file_path(self, analysis_id):
+        """
+        Gets the path the file is downloaded to before it's stored in the cache
+        """
+        result = f'{self.get_file_path(analysis_id)}.download'
+        return result
+
+    def store(self, analysis_id, validators):
+        """
+        Stores the file downloaded to the download file path and evicts the least recently used files
+        if the cache has grown over its size. It should be called holding the cache entry lock.
+        :param analysis_id: Analysis id
+        :param validators: ETag and Last-Modified values the file has been downloaded with
+        """
+        file_path = self.get_file_path(analysis_id)
+        os.replace(self.get_download_file_path(analysis_id), file_path)
+        file_size = os.path.getsize(file_path)
+
+        with self.connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (entry_key, analysis_id, etag, last_modified, file_size, last_used_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.get_entry_key(analysis_id), str(analysis_id), validators.get('etag'),
+                 validators.get('last_modified'), file_size, time.time()))
+            self.update_stat(connection, 'misses', 1)
+
+        with self.stats_lock:
+            self.misses += 1
+        self.evict(keep_entry_key=self.get_entry_key(analysis_id))
+
+    def record_hit(self, analysis_id):
+        """
+        Records that the cached file has not changed. It should be called holding the cache entry lock.
+        """
+        file_size = os.path.getsize(self.get_file_path(analysis_id))
+        with self.connect() as connection:
+            connection.execute(
+                'UPDATE results SET last_used_at = ? WHERE entry_key = ?',
+                (time.time(), self.get_entry_key(analysis_id)))
+            self.update_stat(connection, 'hits', 1)
+            self.update_stat(connection, 'bytes_saved', file_size)
+
+        with self.stats_lock:
+            self.hits += 1
+            self.bytes_saved += file_size
+
+    def copy_to(self, analysis_id, destination_file_path):
+        """
+        Copies the cached file to the destination, as a hard link if the destination is on the same file system.
+        It should be called holding the cache entry lock.
+        """
+        temp_file_path = f'{destination_file_path}.part'
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_file_path)
+
+        try:
+            os.link(self.get_file_path(analysis_id), temp_file_path)
+        except OSError:
+            # Different file system or hard links are not supported
+            shutil.copyfile(self.get_file_path(analysis_id), temp_file_path)
+        os.replace(temp_file_path, destination_file_path)
+
+    def evict(self, keep_entry_key=None):
+        """
+        Evicts the least recently used files until the cache fits its size. The files whose entry locks are held,
+        e.g. by another process serving the file, are skipped.
+        :param keep_entry_key: Key of the entry not to evict, e.g. the one whose lock the caller holds
+        """
+        with self.connect() as connection:
+            rows = connection.execute(
+                'SELECT entry_key, file_size FROM results ORDER BY last_used_at DESC').fetchall()
+            total_size = sum(file_size for entry_key, file_size in rows)
+            evicted_entry_keys = []
+            for entry_key, file_size in reversed(rows):
+                if total_size <= self.max_size_in_bytes:
+                    break
+                if entry_key == keep_entry_key:
+                    continue
+                entry_lock = self.get_entry_lock(entry_key)
+                if not entry_lock.acquire(blocking=False):
+                    continue
+                try:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.cache_dir, f'{entry_key}.zip'))
+                finally:
+                    entry_lock.release()
+                evicted_entry_keys.append(entry_key)
+                total_size -= file_size
+            connection.executemany('DELETE FROM results WHERE entry_key = ?', [(key,) for key in evicted_entry_keys])
+            self.update_stat(connection, 'evictions', len(evicted_entry_keys))
+
+    def get_stats(self):
+        """
+        Gets the hit and miss counters and the download bytes saved by this process and by all processes
+        """
+        with self.connect() as connection:
+            totals = dict(connection.execute('SELECT name, value FROM stats').fetchall())
+            size, count = connection.execute('SELECT COALESCE(SUM(file_size), 0), COUNT(*) FROM results').fetchone()
+
+        with self.stats_lock:
+            result = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'total_hits': totals.get('hits', 0),
+                'total_misses': totals.get('misses', 0),
+                'total_bytes_saved': totals.get('bytes_saved', 0),
+                'total_evictions': totals.get('evictions', 0),
+                'cached_files': count,
+                'cached_bytes': size
+            }
+        return result
+
+    @staticmethod
+    def update_stat(connection, name, increment):
+        connection.execute(
+            'INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + ?',
+            (name, increment, increment))
+
+    def get_file_path(self, analysis_id):
+        result = os.path.join(self.cache_dir, f'{self.get_entry_key(analysis_id)}.zip')
+        return result
+
+    def get_entry_key(self, analysis_id):
+        result = hashlib.sha256(f'{self.service_base_url}|{analysis_id}'.encode('utf-8')).hexdigest()
+        return result
+
+    @contextlib.contextmanager
+    def connect(self):
+        # Connections are not shared between the threads; each operation is one transaction
+        connection = sqlite3.connect(
+            os.path.join(self.cache_dir, 'index.sqlite'),
+            timeout=INDEX_LOCK_TIMEOUT_IN_SECONDS)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
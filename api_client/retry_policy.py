@@ -0,0 +1,235 @@
+import time
+import logging
+import random
+import threading
+import urllib.parse
+import requests
+
+
+DEFAULT_MAX_RETRIES = 3
+MIN_RETRY_DELAY_IN_SECONDS = 1
+MAX_RETRY_DELAY_IN_SECONDS = 30
+# Longer Retry-After is not waited for, the response is returned to the caller
+MAX_RETRY_AFTER_IN_SECONDS = 300
+DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS = 30
+
+# Throttling and the failures of proxies and load balancers in front of a service
+RETRYABLE_STATUS_CODES = [429, 502, 503, 504]
+# The service is degraded, the circuit breaker counts these; 429 only means the service is busy
+FAILURE_STATUS_CODES = [502, 503, 504]
+# Methods which do not change the state on the server, so they are always safe to resend
+SAFE_METHODS = ['GET', 'HEAD', 'OPTIONS']
+
+
+class CircuitBreakerOpenError(requests.exceptions.ConnectionError):
+    """
+    The service has failed too many times in a row, the request has not been sent
+    """
+    def __init__(self, message, retry_after_in_seconds):
+        super().__init__(message)
+        self.retry_after_in_seconds = retry_after_in_seconds
+
+
+class RetryPolicy(object):
+    def __init__(
+            self,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            retry_unsafe_methods: bool = False,
+            min_delay_in_seconds: float = MIN_RETRY_DELAY_IN_SECONDS,
+            max_delay_in_seconds: float = MAX_RETRY_DELAY_IN_SECONDS,
+            circuit_breaker_failure_threshold: int = DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            circuit_breaker_reset_timeout_in_seconds: float = DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS):
+        """
+        Retries of the failed requests and the circuit breaker settings
+        :param max_retries: Maximum number of times a failed request is resent; 0 - do not retry
+        :param retry_unsafe_methods: True - resend POST, PUT and DELETE requests as well; False - GET requests only
+        :param min_delay_in_seconds: Delay before the first retry; it's doubled for every next retry
+        :param max_delay_in_seconds: Upper bound of the delay between retries
+        :param circuit_breaker_failure_threshold: Number of failures in a row which opens the circuit of a service;
+         0 - never open it
+        :param circuit_breaker_reset_timeout_in_seconds: How long the requests to a failing service are rejected
+         before a trial request is let through
+        """
+        self.max_retries = max_retries
+        self.retry_unsafe_methods = retry_unsafe_methods
+        self.min_delay_in_seconds = min_delay_in_seconds
+        self.max_delay_in_seconds = max_delay_in_seconds
+        self.circuit_breaker_failure_threshold = circuit_breaker_failure_threshold
+        self.circuit_breaker_reset_timeout_in_seconds = circuit_breaker_reset_timeout_in_seconds
+
+    def is_retryable_request(self, method, data=None):
+        # A streamed body is consumed by the first attempt and cannot be resent
+        if data is not None and (hasattr(data, 'read') or hasattr(data, '__next__')):
+            return False
+
+        result = method.upper() in SAFE_METHODS or self.retry_unsafe_methods
+        return result
+
+    def get_delay(self, retry_number, retry_after_in_seconds=None):
+        """
+        Computes the delay before the retry: exponential backoff with jitter, not shorter than requested by the server
+        :param retry_number: Retry number starting from 0
+        :param retry_after_in_seconds: Delay requested by the server (Retry-After header); None - not requested
+        :return: Delay in seconds
+        """
+        result = min(self.min_delay_in_seconds * 2 ** retry_number, self.max_delay_in_seconds)
+        result *= random.uniform(0.5, 1)
+
+        if retry_after_in_seconds is not None:
+            result = max(result, retry_after_in_seconds)
+
+        return result
+
+
+class CircuitBreaker(object):
+    """
+    Rejects the requests to a service after the given number of failures in a row, so a degraded service
+    gets fast failures instead of piled-up requests. After the reset timeout one trial request is let through:
+    its success closes the circuit, its failure opens it again.
+    """
+    def __init__(self, service_name, failure_threshold, reset_timeout_in_seconds):
+        self.service_name = service_name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_in_seconds = reset_timeout_in_seconds
+
+        self.lock = threading.Lock()
+        self.failure_count = 0
+        # None - circuit is closed
+        self.open_until_time = None
+        self.is_trial_request_sent = False
+
+    def before_request(self):
+        """
+        Checks whether the request can be sent
+        :return: True - it's the trial request, its outcome has to be recorded or it has to be cancelled
+        :raise CircuitBreakerOpenError: The circuit is open
+        """
+        with self.lock:
+            if self.open_until_time is None:
+                return False
+
+            time_left = self.open_until_time - time.monotonic()
+            if time_left <= 0 and not self.is_trial_request_sent:
+                self.is_trial_request_sent = True
+                return True
+
+        raise CircuitBreakerOpenError(
+            f"Service '{self.service_name}' has failed {self.failure_count} times in a row; "
+            f"the requests are rejected for up to {max(time_left, 0):.0f} s.",
+            max(time_left, 0))
+
+    def record_success(self):
+        with self.lock:
+            self.failure_count = 0
+            self.open_until_time = None
+            self.is_trial_request_sent = False
+
+    def cancel_trial_request(self):
+        """
+        Lets the next request through as the trial request, e.g. when the trial request has been interrupted
+        without an outcome; otherwise the circuit would stay open for good
+        """
+        with self.lock:
+            self.is_trial_request_sent = False
+
+    def record_failure(self):
+        """
+        Records the failure
+        :return: True - the circuit has been opened by this failure
+        """
+        with self.lock:
+            self.failure_count += 1
+            if not self.failure_threshold or self.failure_count < self.failure_threshold:
+                return False
+
+            result = self.open_until_time is None or self.is_trial_request_sent
+            self.open_until_time = time.monotonic() + self.reset_timeout_in_seconds
+            self.is_trial_request_sent = False
+            return result
+
+
+def get_service_name(url):
+    """
+    Gets the name the retries and the circuit breaker are tracked by: the services share the host
+    and differ by the first segment of the path, e.g. 'https://api.example.com/job'
+    """
+    parsed_url = urllib.parse.urlsplit(url)
+    first_path_segment = parsed_url.path.lstrip('/').split('/', 1)[0]
+    result = f'{parsed_url.scheme}://{parsed_url.netloc}/{first_path_segment}'
+    return result
+
+
+class ServiceCallGuard(object):
+    """
+    Retry policy with a circuit breaker per service and the retry metrics, shared by all requests of a transport
+    """
+    def __init__(self, retry_policy: RetryPolicy = None):
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        self.lock = threading.Lock()
+        self.circuit_breakers = {}
+        self.stats = {}
+
+    def before_request(self, service_name):
+        """
+        :return: True - it's the trial request of the service's half-open circuit
+        :raise CircuitBreakerOpenError: The service's circuit is open
+        """
+        try:
+            result = self.get_circuit_breaker(service_name).before_request()
+        except CircuitBreakerOpenError:
+            self.increment_stat(service_name, 'circuit_breaker_rejections')
+            raise
+
+        return result
+
+    def cancel_trial_request(self, service_name):
+        self.get_circuit_breaker(service_name).cancel_trial_request()
+
+    def record_response(self, service_name, status_code):
+        if status_code in FAILURE_STATUS_CODES:
+            self.record_failure(service_name)
+        else:
+            self.get_circuit_breaker(service_name).record_success()
+
+    def record_failure(self, service_name):
+        if self.get_circuit_breaker(service_name).record_failure():
+            self.increment_stat(service_name, 'circuit_breaker_openings')
+            logging.warning(
+                f"Service '{service_name}' has failed {self.retry_policy.circuit_breaker_failure_threshold} times "
+                f"in a row; its requests are rejected for "
+                f"{self.retry_policy.circuit_breaker_reset_timeout_in_seconds} s.")
+
+    def record_retry(self, service_name, method, url, reason, retry_number, delay):
+        self.increment_stat(service_name, 'retries')
+        logging.warning(
+            f"HTTP {method} {url} - {reason}; retry {retry_number} of {self.retry_policy.max_retries} "
+            f"in {delay:.1f} s.")
+
+    def get_circuit_breaker(self, service_name):
+        with self.lock:
+            result = self.circuit_breakers.get(service_name)
+            if result is None:
+                result = self.circuit_breakers[service_name] = CircuitBreaker(
+                    service_name,
+                    self.retry_policy.circuit_breaker_failure_threshold,
+                    self.retry_policy.circuit_breaker_reset_timeout_in_seconds)
+
+        return result
+
+    def increment_stat(self, service_name, stat_name):
+        with self.lock:
+            service_stats = self.stats.setdefault(
+                service_name, {'retries': 0, 'circuit_breaker_openings': 0, 'circuit_breaker_rejections': 0})
+            service_stats[stat_name] += 1
+
+    def get_stats(self):
+        """
+        Gets the retry metrics
+        :return: Number of retries, circuit openings and rejected requests per service
+        """
+        with self.lock:
+            result = {service_name: dict(service_stats) for service_name, service_stats in self.stats.items()}
+
+        return result
@@ -1,26 +1,48 @@
-import requests
 import urllib.parse
 import datetime
 import jwt
 import time
 import logging
+import threading
+from concurrent.futures import Future
+from api_client.errors import AuthenticationError
+from api_client.http_transport import HttpTransport
+from api_client.http_transport import HttpTransportSettings
+from api_client.token_cache import TokenCache
+from api_client.token_refresher import AuthTokenRefresher
 
 
 SSO_SVCS_BASE_URL = "https://sso.moodysanalytics.com"
 AUTH_TOKEN_RENEWAL_THRESHOLD_IN_SECONDS = 30
-
-
-class AuthenticationError(Exception):
-    pass
+PING_URL_PATH = '/sso-api/docs/'
 
 
 class Session(object):
-    def __init__(self, user_id: str, user_password: str, sso_svcs_base_url: str = SSO_SVCS_BASE_URL, proxies={}):
+    def __init__(
+            self,
+            user_id: str,
+            user_password: str,
+            sso_svcs_base_url: str = SSO_SVCS_BASE_URL,
+            proxies={},
+            transport_settings: HttpTransportSettings = None,
+            token_cache: TokenCache = None,
+            background_token_refresh: bool = False):
         self.sso_svcs_base_url = sso_svcs_base_url
         self.user_id = user_id
         self.user_password = user_password
         self.proxies = proxies
-
+        # Connection pool shared by the session and all service clients created in its scope
+        self.transport = HttpTransport(transport_settings, proxies)
+        # Optional cache of the tokens shared with other processes running with the same login
+        self.token_cache = token_cache
+        # Replace the token in a background thread before it expires instead of renewing it inline
+        self.background_token_refresh = background_token_refresh
+        self.token_refresher = None
+
+        # Guards replacing the token together with its expiration info
+        self.auth_token_lock = threading.Lock()
+        # Renewal in progress which the concurrent callers wait for; None - token is not being renewed
+        self.auth_token_renewal = None
         self.auth_token = None
         self.auth_token_claimset = None
         self.expiration_timestamp = None
@@ -35,34 +57,205 @@ class Session(object):
         self.close()
 
     def get_auth_token(self):
+        """
+        Gets a valid authentication token. It's safe to call from many threads: when the token has to be
+        renewed, one thread renews it and the other threads wait for the same result.
+        """
+        with self.auth_token_lock:
+            # Token has not expired
+            if self.auth_token is not None and not self.is_auth_token_renewal():
+                return self.auth_token
+
+            auth_token_renewal, is_renewing_thread = self.join_auth_token_renewal()
+
+        if not is_renewing_thread:
+            result = auth_token_renewal.result()
+            return result
+
+        result = self.run_auth_token_renewal(auth_token_renewal, self.acquire_auth_token)
+        return result
+
+    def join_auth_token_renewal(self):
+        """
+        Joins the token renewal in progress or starts a new one. It should be called holding the token lock.
+        :return: Renewal resolved with the new token, and True if the calling thread has to run the renewal
+        """
+        if self.auth_token_renewal is not None:
+            return self.auth_token_renewal, False
+
+        self.auth_token_renewal = Future()
+        return self.auth_token_renewal, True
+
+    def run_auth_token_renewal(self, auth_token_renewal, renew_function):
+        """
+        Runs the renewal started by join_auth_token_renewal() and resolves it with the new token
+        :param renew_function: Function replacing the token
+        :return: Result of the function
+        """
+        try:
+            result = renew_function()
+            auth_token_renewal.set_result(self.auth_token)
+        except BaseException as e:
+            auth_token_renewal.set_exception(e)
+            raise
+        finally:
+            with self.auth_token_lock:
+                self.auth_token_renewal = None
+
+        return result
+
+    def acquire_auth_token(self):
+        # Get authentication token from the cache shared with other processes, renew it there if needed
+        if self.token_cache is not None:
+            self.acquire_cached_auth_token()
+            self.start_token_refresher()
+            return self.auth_token
+
         # Get authentication token for the first time
         if self.auth_token is None:
-            self.auth_token = self.request_new_auth_token()
-            self.update_auth_token_claimset_expiration_info()
+            self.swap_auth_token(self.request_new_auth_token())
             logging.info(f"Security token has been generated.")
+            self.start_token_refresher()
             return self.auth_token
 
-        # If it's a renewal time, renew authentication token
-        if self.is_auth_token_renewal():
-            try:
-                self.auth_token = self.renew_auth_token()
-                self.update_auth_token_claimset_expiration_info()
-                return self.auth_token
-            except AuthenticationError:
-                # It can happen if token is fully expired. In this case, request new token
-                self.auth_token = self.request_new_auth_token()
-                self.update_auth_token_claimset_expiration_info()
-                return self.auth_token
+        # The background refresh has not succeeded in time. Replace the token without waiting for the revocation.
+        if self.token_refresher is not None:
+            replaced_auth_token = self.replace_auth_token()
+            if replaced_auth_token is not None:
+                self.token_refresher.schedule_revocation(replaced_auth_token)
+            return self.auth_token
 
-        # Token has not expired
-        result = self.auth_token
-        return result
+        # It's a renewal time, renew authentication token
+        try:
+            self.swap_auth_token(self.renew_auth_token())
+            return self.auth_token
+        except AuthenticationError:
+            # It can happen if token is fully expired. In this case, request new token
+            self.swap_auth_token(self.request_new_auth_token())
+            return self.auth_token
 
     def close(self):
-        if self.auth_token is None:
-            return
+        try:
+            if self.token_refresher is not None:
+                self.token_refresher.stop()
+                stats = self.token_refresher.get_stats()
+                if stats['refresh_count'] or stats['refresh_failure_count']:
+                    logging.info(
+                        f"Security token background refreshes: {stats['refresh_count']}, "
+                        f"failures: {stats['refresh_failure_count']}; "
+                        f"max latency: {(stats['refresh_latency_max_in_seconds'] or 0) * 1000:.0f} ms.")
+                self.token_refresher = None
+            # Cached token is reused by other processes, it is not revoked
+            if self.auth_token is not None and self.token_cache is None:
+                self.revoke_auth_token()
+            if self.token_cache is not None:
+                stats = self.token_cache.get_stats(self.user_id, self.sso_svcs_base_url)
+                logging.debug(
+                    f"Security token cache hits: {stats['hits']}, misses: {stats['misses']}; "
+                    f"all runs hits: {stats['total_hits']}, misses: {stats['total_misses']}.")
+        finally:
+            log_retry_stats(self.transport.service_call_guard.get_stats())
+            if self.transport.rate_limiter is not None:
+                log_rate_limiter_stats(self.transport.rate_limiter.get_stats())
+            self.transport.close()
+
+    def acquire_cached_auth_token(self):
+        # Hold the lock while renewing, so parallel processes wait for one token instead of requesting their own
+        with self.token_cache.lock(self.user_id, self.sso_svcs_base_url):
+            cached_auth_token = self.token_cache.load(self.user_id, self.sso_svcs_base_url)
+            if cached_auth_token is not None and self.try_use_auth_token(cached_auth_token):
+                self.token_cache.record_hit(self.user_id, self.sso_svcs_base_url)
+                logging.debug("Security token has been taken from the cache.")
+                return
+
+            self.token_cache.record_miss(self.user_id, self.sso_svcs_base_url)
+            # The expiring token is not revoked, other processes may still use it
+            self.swap_auth_token(self.request_new_auth_token())
+            self.token_cache.save(self.user_id, self.sso_svcs_base_url, self.auth_token)
+            logging.info("Security token has been generated and cached.")
+
+    def start_token_refresher(self):
+        if self.background_token_refresh and self.token_refresher is None:
+            self.token_refresher = AuthTokenRefresher(self)
+            self.token_refresher.start()
+
+    def refresh_auth_token(self):
+        """
+        Gets a new token and swaps it in place of the current one, which stays valid. It's called by the background
+        refresher and shares the renewal with the callers of get_auth_token(), so the token is requested once.
+        :return: Replaced token to be revoked by the caller; None - replaced token is shared or it has been replaced
+         by another thread, which revokes it
+        """
+        with self.auth_token_lock:
+            auth_token_renewal, is_renewing_thread = self.join_auth_token_renewal()
+
+        if not is_renewing_thread:
+            auth_token_renewal.result()
+            return None
+
+        result = self.run_auth_token_renewal(auth_token_renewal, self.replace_auth_token)
+        return result
 
-        self.revoke_auth_token()
+    def replace_auth_token(self):
+        """
+        Gets a new token and swaps it in place of the current one. It should be called by the renewing thread.
+        :return: Replaced token; None - replaced token is shared and must not be revoked
+        """
+        if self.token_cache is None:
+            result = self.swap_auth_token(self.request_new_auth_token())
+            return result
+
+        with self.token_cache.lock(self.user_id, self.sso_svcs_base_url):
+            # Another process may have already refreshed the shared token
+            cached_auth_token = self.token_cache.load(self.user_id, self.sso_svcs_base_url)
+            if cached_auth_token is not None and cached_auth_token != self.auth_token:
+                try:
+                    cached_expiration_timestamp = jwt.decode(cached_auth_token, verify=False)['exp']
+                except (jwt.InvalidTokenError, KeyError):
+                    cached_expiration_timestamp = None
+                if cached_expiration_timestamp is not None and cached_expiration_timestamp > self.expiration_timestamp:
+                    self.token_cache.record_hit(self.user_id, self.sso_svcs_base_url)
+                    self.swap_auth_token(cached_auth_token)
+                    return None
+
+            self.token_cache.record_miss(self.user_id, self.sso_svcs_base_url)
+            auth_token = self.request_new_auth_token()
+            self.token_cache.save(self.user_id, self.sso_svcs_base_url, auth_token)
+            self.swap_auth_token(auth_token)
+            return None
+
+    def swap_auth_token(self, auth_token):
+        """
+        Replaces the token together with its expiration info
+        :return: Replaced token
+        """
+        auth_token_claimset = jwt.decode(auth_token, verify=False)
+        expiration_timestamp = auth_token_claimset['exp']
+        with self.auth_token_lock:
+            result = self.auth_token
+            self.auth_token = auth_token
+            self.auth_token_claimset = auth_token_claimset
+            self.expiration_timestamp = expiration_timestamp
+            self.expiration_datetime = datetime.datetime.fromtimestamp(expiration_timestamp)
+
+        return result
+
+    def try_use_auth_token(self, auth_token):
+        """
+        Uses the token if it is not about to expire
+        :param auth_token: Authentication token
+        :return: True - token is used; False - token is malformed or has to be renewed
+        """
+        try:
+            expiration_timestamp = jwt.decode(auth_token, verify=False)['exp']
+        except (jwt.InvalidTokenError, KeyError):
+            return False
+
+        if Session.is_renewal_time(datetime.datetime.fromtimestamp(expiration_timestamp)):
+            return False
+
+        self.swap_auth_token(auth_token)
+        return True
 
     def request_new_auth_token(self):
         url_path = '/sso-api/v1/token'
@@ -75,11 +268,10 @@ class Session(object):
             'scope': 'openid'
         }
 
-        response = requests.post(
+        response = self.transport.post(
             url,
             data=request_new_auth_token_data,
-            auth=(self.user_id, self.user_password),
-            proxies=self.proxies
+            auth=(self.user_id, self.user_password)
         )
         response.raise_for_status()
 
@@ -101,16 +293,17 @@ class Session(object):
         url_path = '/sso-api/v1/token'
         url = urllib.parse.urljoin(self.sso_svcs_base_url, url_path)
 
-        response = requests.delete(url, headers=Session.create_auth_header(auth_token), proxies=self.proxies)
+        response = self.transport.delete(url, headers=Session.create_auth_header(auth_token))
         response.raise_for_status()
 
     def revoke_auth_token(self):
         self.delete_auth_token(self.auth_token)
 
-        self.auth_token = None
-        self.auth_token_claimset = None
-        self.expiration_timestamp = None
-        self.expiration_datetime = None
+        with self.auth_token_lock:
+            self.auth_token = None
+            self.auth_token_claimset = None
+            self.expiration_timestamp = None
+            self.expiration_datetime = None
 
     def renew_auth_token(self):
         # Revoke current token
@@ -123,11 +316,6 @@ class Session(object):
         result = self.request_new_auth_token()
         return result
 
-    def update_auth_token_claimset_expiration_info(self):
-        self.auth_token_claimset = jwt.decode(self.auth_token, verify=False)
-        self.expiration_timestamp = self.auth_token_claimset['exp']
-        self.expiration_datetime = datetime.datetime.fromtimestamp(self.expiration_timestamp)
-
     def is_auth_token_renewal(self):
         if self.expiration_datetime is None:
             raise AuthenticationError(
@@ -135,7 +323,12 @@ class Session(object):
                 "The token's expiration date/time is empty. "
                 "Get authentication token calling get_auth_token() first.")
 
-        time_left = self.expiration_datetime - self.get_current_date_time()
+        result = Session.is_renewal_time(self.expiration_datetime)
+        return result
+
+    @staticmethod
+    def is_renewal_time(expiration_datetime):
+        time_left = expiration_datetime - Session.get_current_date_time()
 
         if time_left.days == -1:
             return True
@@ -151,11 +344,9 @@ class Session(object):
         return result
 
     def ping(self):
-        url_path = "/sso-api/docs/"
+        url_path = PING_URL_PATH
         url = urllib.parse.urljoin(self.sso_svcs_base_url, url_path)
-        response = requests.get(
-            url,
-            proxies=self.proxies)
+        response = self.transport.get(url)
 
         if response.ok:
             logging.info(f"Single Sing-On (SSO) service connectivity test to '{self.sso_svcs_base_url}' - PASSED")
@@ -189,3 +380,20 @@ class Session(object):
     def create_auth_header(auth_token):
         result = {'Authorization': f'Bearer {auth_token}'}
         return result
+
+
+def log_retry_stats(retry_stats):
+    for service_name, service_stats in retry_stats.items():
+        logging.info(
+            f"Service '{service_name}' retries: {service_stats['retries']}; "
+            f"circuit breaker openings: {service_stats['circuit_breaker_openings']}, "
+            f"rejected requests: {service_stats['circuit_breaker_rejections']}.")
+
+
+def log_rate_limiter_stats(rate_limiter_stats):
+    for bucket_name, bucket_stats in rate_limiter_stats.items():
+        logging.info(
+            f"Rate limit of '{bucket_name}' - requests: {bucket_stats['requests']}, "
+            f"delayed: {bucket_stats['delayed_requests']}; "
+            f"wait time: {bucket_stats['wait_time_in_seconds']:.1f} s, "
+            f"max: {bucket_stats['max_wait_in_seconds']:.1f} s.")
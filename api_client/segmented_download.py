@@ -0,0 +1,217 @@
+import os
+import json
+import math
+import logging
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_EXCEPTION
+from concurrent.futures import wait
+
+
+# Bounds of the byte range fetched by one request. A download is split into at least as many segments
+# as there are parallel streams; smaller segments lose less work when the download is interrupted.
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+MAX_SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+class SegmentedDownloadError(Exception):
+    pass
+
+
+class SegmentedDownload(object):
+    """
+    Downloads a file in parallel byte ranges (HTTP Range requests) into a preallocated file.
+    Finished segments are recorded in a sidecar state file, so an interrupted download is resumed
+    from where it stopped when it is started again for the same destination file.
+    """
+    def __init__(self, session, url, destination_file_path, segment_count, chunk_size):
+        """
+        :param session: Authentication session with the shared HTTP transport
+        :param url: URL of the file to download
+        :param destination_file_path: Destination file path on the client side
+        :param segment_count: Number of byte ranges to fetch at once
+        :param chunk_size: Size of the chunks each byte range is streamed to the disk with
+        """
+        self.session = session
+        self.url = url
+        self.destination_file_path = destination_file_path
+        self.segment_count = segment_count
+        self.chunk_size = chunk_size
+
+        self.temp_file_path = f'{destination_file_path}.part'
+        self.state_file_path = f'{destination_file_path}.part.state'
+        self.state_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.cancel_event = threading.Event()
+
+        self.file_size = None
+        self.validator = None
+        self.state = None
+
+    def is_supported(self):
+        """
+        Checks whether the server supports byte ranges for the file
+        :return: True - file can be downloaded in segments; False - file has to be downloaded as a single stream
+        """
+        headers = self.session.get_auth_header()
+        headers['Range'] = 'bytes=0-0'
+
+        with self.session.transport.get(self.url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            result = self.read_probe_response(response)
+
+        return result
+
+    def read_probe_response(self, response):
+        """
+        Takes the file size and validator from the response to the 'Range: bytes=0-0' request, e.g. the one sent
+        by the caller to revalidate the file. The segments are requested with the validator in If-Range,
+        so they are all of the file version the response is of.
+        :param response: Successful response to the request of the first byte of the file
+        :return: True - file can be downloaded in segments; False - file has to be downloaded as a single stream
+        """
+        if response.status_code != 206:
+            return False
+
+        # Expected format: 'bytes 0-0/<file size>'
+        content_range = response.headers.get('Content-Range', '')
+        file_size_text = content_range.rpartition('/')[2]
+        if not file_size_text.isdigit():
+            return False
+
+        self.file_size = int(file_size_text)
+        self.validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+        return self.file_size > 0
+
+    def run(self):
+        self.state = self.load_state()
+        if self.state is None:
+            self.state = self.create_state()
+            self.preallocate_temp_file()
+        else:
+            logging.info(
+                f"Resuming download of '{self.destination_file_path}': "
+                f"{len(self.state['completed'])} of {len(self.state['segments'])} segments are already downloaded.")
+
+        pending_segments = [
+            index for index in range(len(self.state['segments'])) if index not in self.state['completed']]
+
+        executor = ThreadPoolExecutor(max_workers=self.segment_count)
+        try:
+            futures = [executor.submit(self.download_segment, index) for index in pending_segments]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                # Re-raise the first segment failure, if any
+                future.result()
+        except KeyboardInterrupt:
+            # Abort the segments in progress as well, the completed ones are kept for resuming
+            self.cancel_event.set()
+            self.stop_event.set()
+            executor.shutdown(wait=True)
+            self.log_interruption()
+            raise
+        except BaseException:
+            # Let the segments in progress finish, so they do not have to be downloaded again on resume
+            self.stop_event.set()
+            executor.shutdown(wait=True)
+            self.log_interruption()
+            raise
+
+        executor.shutdown(wait=True)
+
+        os.replace(self.temp_file_path, self.destination_file_path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.state_file_path)
+
+    def log_interruption(self):
+        logging.info(
+            f"Download of '{self.destination_file_path}' has been interrupted: "
+            f"{len(self.state['completed'])} of {len(self.state['segments'])} segments are downloaded. "
+            f"Run the command again to resume the download.")
+
+    def download_segment(self, index):
+        if self.stop_event.is_set():
+            return
+
+        segment_begin, segment_end = self.state['segments'][index]
+        headers = self.session.get_auth_header()
+        headers['Range'] = f'bytes={segment_begin}-{segment_end}'
+        if self.validator:
+            # Server returns the whole file instead of the range if it has changed since the download started
+            headers['If-Range'] = self.validator
+
+        with self.session.transport.get(self.url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise SegmentedDownloadError(
+                    f"The file '{self.url}' has changed during download. "
+                    f"Delete '{self.state_file_path}' and download the file again.")
+
+            position = segment_begin
+            with open(self.temp_file_path, 'r+b') as temp_file:
+                temp_file.seek(segment_begin)
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if self.cancel_event.is_set():
+                        return
+                    temp_file.write(chunk)
+                    position += len(chunk)
+
+        if position != segment_end + 1:
+            raise SegmentedDownloadError(
+                f"Segment {segment_begin}-{segment_end} of '{self.url}' is incomplete: "
+                f"received {position - segment_begin} of {segment_end - segment_begin + 1} bytes.")
+
+        with self.state_lock:
+            self.state['completed'].append(index)
+            self.save_state()
+
+    def create_state(self):
+        segment_size = math.ceil(self.file_size / self.segment_count)
+        segment_size = min(max(segment_size, MIN_SEGMENT_SIZE), MAX_SEGMENT_SIZE)
+
+        segments = [
+            [segment_begin, min(segment_begin + segment_size, self.file_size) - 1]
+            for segment_begin in range(0, self.file_size, segment_size)]
+
+        result = {
+            'url': self.url,
+            'file_size': self.file_size,
+            'validator': self.validator,
+            'segments': segments,
+            'completed': []
+        }
+        return result
+
+    def load_state(self):
+        """
+        Loads the state of the interrupted download
+        :return: Download state; None - there is no download to resume or it does not match the file on the server
+        """
+        try:
+            with open(self.state_file_path, 'r') as state_file:
+                state = json.load(state_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if state.get('url') != self.url \
+                or state.get('file_size') != self.file_size \
+                or state.get('validator') != self.validator:
+            return None
+
+        if not os.path.isfile(self.temp_file_path) or os.path.getsize(self.temp_file_path) != self.file_size:
+            return None
+
+        return state
+
+    def save_state(self):
+        temp_state_file_path = f'{self.state_file_path}.tmp'
+        with open(temp_state_file_path, 'w') as state_file:
+            json.dump(self.state, state_file)
+        os.replace(temp_state_file_path, self.state_file_path)
+
+    def preallocate_temp_file(self):
+        with open(self.temp_file_path, 'wb') as temp_file:
+            temp_file.truncate(self.file_size)
+        self.save_state()
@@ -0,0 +1,287 @@
+import os
+import zlib
+import struct
+import logging
+import zipfile
+import contextlib
+
+
+DEFAULT_MEMORY_LIMIT_IN_BYTES = 16 * 1024 * 1024
+# Size of the decompressed data written to the disk at once
+OUTPUT_CHUNK_SIZE = 1024 * 1024
+
+LOCAL_FILE_HEADER_SIGNATURE = b'PK\x03\x04'
+CENTRAL_DIRECTORY_SIGNATURE = b'PK\x01\x02'
+END_OF_CENTRAL_DIRECTORY_SIGNATURES = [b'PK\x05\x06', b'PK\x06\x06']
+LOCAL_FILE_HEADER_FORMAT = '<4sHHHHHIIIHH'
+LOCAL_FILE_HEADER_SIZE = struct.calcsize(LOCAL_FILE_HEADER_FORMAT)
+ZIP64_EXTRA_FIELD_ID = 0x0001
+ZIP64_SIZE_MARKER = 0xFFFFFFFF
+
+FLAG_ENCRYPTED = 0x0001
+FLAG_DATA_DESCRIPTOR = 0x0008
+FLAG_UTF8_NAME = 0x0800
+SUPPORTED_COMPRESSION_METHODS = [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]
+
+
+class StreamingUnzipFallback(Exception):
+    pass
+
+
+class StreamingZipExtractor(object):
+    """
+    Extracts the members of a zip archive from its bytes as they are downloaded, so the archive is not read again
+    from the disk after the download. Only the bytes of the current member header and one chunk of the decompressed
+    data are kept in memory.
+
+    The members are found by their local headers. Archives whose members cannot be extracted from the local headers
+    alone (data descriptors, encryption, other compression methods, unsafe member names) are extracted from the
+    downloaded file instead. When the download is finished, the extracted members are verified against
+    the central directory, and the archive is extracted from the downloaded file if they differ.
+    """
+    def __init__(self, output_dir, memory_limit_in_bytes=DEFAULT_MEMORY_LIMIT_IN_BYTES):
+        """
+        :param output_dir: Directory the members are extracted to
+        :param memory_limit_in_bytes: Maximum size of the received bytes waiting to be extracted
+        """
+        self.output_dir = output_dir
+        self.memory_limit_in_bytes = memory_limit_in_bytes
+
+        self.buffer = bytearray()
+        self.fallback_reason = None
+        self.is_finished = False
+        self.member = None
+        # Member name to its path, size and CRC-32
+        self.extracted_members = {}
+
+    def feed(self, data):
+        """
+        Extracts the members from the next bytes of the archive
+        :param data: Next bytes of the archive
+        """
+        if self.fallback_reason is not None or self.is_finished:
+            return
+
+        self.buffer += data
+        try:
+            while self.extract_next():
+                pass
+            if len(self.buffer) > self.memory_limit_in_bytes:
+                raise StreamingUnzipFallback(
+                    f'member header is larger than the memory limit of {self.memory_limit_in_bytes} bytes')
+        except StreamingUnzipFallback as e:
+            self.fall_back(e.args[0])
+
+    def finish(self, zip_file_path):
+        """
+        Verifies the extracted members against the central directory of the downloaded archive.
+        Extracts the archive from the file if the members could not be extracted while it was downloaded
+        or they differ from the central directory.
+        :param zip_file_path: Path of the downloaded archive
+        :return: Paths of the extracted files
+        """
+        is_fed = self.is_finished or self.fallback_reason is not None or self.buffer or self.extracted_members \
+            or self.member is not None
+        if is_fed and self.fallback_reason is None and not self.is_finished:
+            self.fall_back('archive has ended before its central directory')
+
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            zip_infos = zip_file.infolist()
+            if self.is_finished and self.fallback_reason is None:
+                mismatch = self.find_central_directory_mismatch(zip_infos)
+                if mismatch is not None:
+                    self.fall_back(f'central directory differs from the local headers ({mismatch})')
+
+            if not self.is_finished or self.fallback_reason is not None:
+                if self.fallback_reason is not None:
+                    logging.info(
+                        f"Zip archive '{zip_file_path}' is extracted after the download: {self.fallback_reason}.")
+                result = [zip_file.extract(zip_info, self.output_dir) for zip_info in zip_infos]
+                return result
+
+        result = [member_path for member_path, size, crc in self.extracted_members.values()]
+        return result
+
+    def extract_next(self):
+        """
+        Extracts the next part of the archive from the buffer
+        :return: True - there may be more to extract; False - more bytes are needed
+        """
+        if self.member is not None:
+            return self.extract_member_data()
+
+        if len(self.buffer) < 4:
+            return False
+        signature = bytes(self.buffer[:4])
+        if signature == CENTRAL_DIRECTORY_SIGNATURE or signature in END_OF_CENTRAL_DIRECTORY_SIGNATURES:
+            # All members have been extracted; the rest is verified when the download is finished
+            self.is_finished = True
+            self.buffer = bytearray()
+            return False
+        if signature != LOCAL_FILE_HEADER_SIGNATURE:
+            raise StreamingUnzipFallback('unexpected record between the members')
+
+        if len(self.buffer) < LOCAL_FILE_HEADER_SIZE:
+            return False
+        signature, version, flags, compression_method, modification_time, modification_date, crc, \
+            compressed_size, file_size, name_length, extra_length = \
+            struct.unpack(LOCAL_FILE_HEADER_FORMAT, self.buffer[:LOCAL_FILE_HEADER_SIZE])
+        header_size = LOCAL_FILE_HEADER_SIZE + name_length + extra_length
+        if len(self.buffer) < header_size:
+            return False
+
+        name_bytes = bytes(self.buffer[LOCAL_FILE_HEADER_SIZE:LOCAL_FILE_HEADER_SIZE + name_length])
+        extra = bytes(self.buffer[LOCAL_FILE_HEADER_SIZE + name_length:header_size])
+        name = name_bytes.decode('utf-8' if flags & FLAG_UTF8_NAME else 'cp437')
+        if flags & FLAG_ENCRYPTED:
+            raise StreamingUnzipFallback(f"member '{name}' is encrypted")
+        if flags & FLAG_DATA_DESCRIPTOR:
+            raise StreamingUnzipFallback(f"member '{name}' has its sizes in a data descriptor")
+        if compression_method not in SUPPORTED_COMPRESSION_METHODS:
+            raise StreamingUnzipFallback(f"member '{name}' is compressed with method {compression_method}")
+        if ZIP64_SIZE_MARKER in (compressed_size, file_size):
+            file_size, compressed_size = get_zip64_sizes(extra, file_size, compressed_size)
+
+        del self.buffer[:header_size]
+        self.open_member(name, compression_method, crc, compressed_size, file_size)
+        return True
+
+    def open_member(self, name, compression_method, crc, compressed_size, file_size):
+        name_parts = name.split('/')
+        if name.startswith('/') or '..' in name_parts or ':' in name_parts[0] or '\\' in name:
+            raise StreamingUnzipFallback(f"member name '{name}' is not a safe relative path")
+
+        member_path = os.path.join(self.output_dir, *[part for part in name_parts if part])
+        self.member = {
+            'name': name,
+            'path': member_path,
+            'is_dir': name.endswith('/'),
+            'file': None,
+            'decompressor': zlib.decompressobj(-zlib.MAX_WBITS)
+            if compression_method == zipfile.ZIP_DEFLATED else None,
+            'expected_crc': crc,
+            'expected_size': file_size,
+            'remaining_size': compressed_size,
+            'crc': 0,
+            'size': 0
+        }
+        if self.member['is_dir']:
+            os.makedirs(member_path, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(member_path), exist_ok=True)
+            self.member['file'] = open(member_path, 'wb')
+
+    def extract_member_data(self):
+        member = self.member
+        data = bytes(self.buffer[:min(len(self.buffer), member['remaining_size'])])
+        if member['decompressor'] is None:
+            self.write_member_data(data)
+            consumed_size = len(data)
+        else:
+            self.write_member_data(member['decompressor'].decompress(data, OUTPUT_CHUNK_SIZE))
+            consumed_size = len(data) - len(member['decompressor'].unconsumed_tail)
+
+        del self.buffer[:consumed_size]
+        member['remaining_size'] -= consumed_size
+        if member['remaining_size'] > 0:
+            # The decompressor has more output for the same data
+            return consumed_size > 0 or bool(member['decompressor'] and member['decompressor'].unconsumed_tail)
+
+        if member['decompressor'] is not None:
+            self.write_member_data(member['decompressor'].flush())
+        self.close_member()
+        return True
+
+    def write_member_data(self, data):
+        if not data:
+            return
+        if self.member['file'] is None:
+            raise StreamingUnzipFallback(f"directory member '{self.member['name']}' has data")
+        self.member['file'].write(data)
+        self.member['crc'] = zlib.crc32(data, self.member['crc'])
+        self.member['size'] += len(data)
+
+    def close_member(self):
+        member, self.member = self.member, None
+        if member['file'] is not None:
+            member['file'].close()
+        self.extracted_members[member['name']] = (member['path'], member['size'], member['crc'])
+
+        if member['size'] != member['expected_size'] or member['crc'] != member['expected_crc']:
+            raise StreamingUnzipFallback(f"member '{member['name']}' does not match the size or CRC of its header")
+
+    def find_central_directory_mismatch(self, zip_infos):
+        central_directory_names = set()
+        for zip_info in zip_infos:
+            central_directory_names.add(zip_info.filename)
+            extracted_member = self.extracted_members.get(zip_info.filename)
+            if extracted_member is None:
+                return f"member '{zip_info.filename}' has no local header"
+            if extracted_member[1:] != (zip_info.file_size, zip_info.CRC):
+                return f"member '{zip_info.filename}' has a different size or CRC"
+
+        for name in self.extracted_members:
+            if name not in central_directory_names:
+                return f"member '{name}' is not in the central directory"
+
+        return None
+
+    def fall_back(self, reason):
+        """
+        Stops extracting while downloading and removes the files extracted so far
+        """
+        self.fallback_reason = reason
+        self.buffer = bytearray()
+        if self.member is not None and self.member['file'] is not None:
+            self.member['file'].close()
+            self.extracted_members[self.member['name']] = (self.member['path'], None, None)
+        self.member = None
+
+        for member_path, size, crc in self.extracted_members.values():
+            if os.path.isdir(member_path):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(member_path)
+        self.extracted_members = {}
+
+
+def get_zip64_sizes(extra, file_size, compressed_size):
+    """
+    Gets the sizes of the member from its Zip64 extra field
+    :return: Size and compressed size of the member
+    """
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, field_size = struct.unpack('<HH', extra[position:position + 4])
+        if field_id == ZIP64_EXTRA_FIELD_ID:
+            field = extra[position + 4:position + 4 + field_size]
+            values = list(struct.unpack(f'<{len(field) // 8}Q', field[:len(field) // 8 * 8]))
+            if file_size == ZIP64_SIZE_MARKER:
+                if not values:
+                    break
+                file_size = values.pop(0)
+            if compressed_size == ZIP64_SIZE_MARKER:
+                if not values:
+                    break
+                compressed_size = values.pop(0)
+            return file_size, compressed_size
+        position += 4 + field_size
+
+    raise StreamingUnzipFallback('member has no valid Zip64 sizes')
+
+
+def extract_zip_file(zip_file_path, output_dir):
+    """
+    Extracts the downloaded archive
+    :return: Paths of the extracted files
+    """
+    result = StreamingZipExtractor(output_dir).finish(zip_file_path)
+    return result
+
+
+def get_extract_dir(zip_file_path):
+    """
+    Gets the directory the archive is extracted to: the folder next to it with the archive name without '.zip'
+    """
+    result = os.path.splitext(zip_file_path)[0]
+    return result
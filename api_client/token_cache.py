@@ -0,0 +1,106 @@
+import os
+import json
+import stat
+import hashlib
+import contextlib
+from api_client.file_lock import FileLock
+
+
+class TokenCache(object):
+    """
+    Authentication tokens cached on the disk, so they are reused by processes running with the same login.
+    The files are readable by the user only. Processes hold the cache entry lock while they read
+    and renew the token, so parallel processes share one token instead of requesting one each.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        # Counters of this process
+        self.hits = 0
+        self.misses = 0
+
+    def lock(self, user_id, sso_svcs_base_url):
+        # The lock creates the missing folder with the default mode
+        self.affirm_cache_dir()
+        result = FileLock(f'{self.get_file_path(user_id, sso_svcs_base_url)}.lock')
+        return result
+
+    def load(self, user_id, sso_svcs_base_url):
+        """
+        Loads cached token. It should be called holding the cache entry lock.
+        :return: Cached authentication token; None - there is no cached token
+        """
+        entry = self.load_entry(user_id, sso_svcs_base_url)
+        result = entry.get('auth_token')
+        return result
+
+    def save(self, user_id, sso_svcs_base_url, auth_token):
+        """
+        Saves the token to the cache. It should be called holding the cache entry lock.
+        """
+        entry = self.load_entry(user_id, sso_svcs_base_url)
+        entry['auth_token'] = auth_token
+        self.save_entry(user_id, sso_svcs_base_url, entry)
+
+    def delete(self, user_id, sso_svcs_base_url):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.get_file_path(user_id, sso_svcs_base_url))
+
+    def record_hit(self, user_id, sso_svcs_base_url):
+        self.hits += 1
+        self.update_counter(user_id, sso_svcs_base_url, 'hits')
+
+    def record_miss(self, user_id, sso_svcs_base_url):
+        self.misses += 1
+        self.update_counter(user_id, sso_svcs_base_url, 'misses')
+
+    def get_stats(self, user_id, sso_svcs_base_url):
+        """
+        Gets cache hit and miss counters of this process and of all processes since the entry has been created
+        """
+        entry = self.load_entry(user_id, sso_svcs_base_url)
+        result = {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': entry.get('hits', 0),
+            'total_misses': entry.get('misses', 0)
+        }
+        return result
+
+    def update_counter(self, user_id, sso_svcs_base_url, counter_name):
+        entry = self.load_entry(user_id, sso_svcs_base_url)
+        entry[counter_name] = entry.get(counter_name, 0) + 1
+        self.save_entry(user_id, sso_svcs_base_url, entry)
+
+    def load_entry(self, user_id, sso_svcs_base_url):
+        try:
+            with open(self.get_file_path(user_id, sso_svcs_base_url), 'r') as entry_file:
+                result = json.load(entry_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        return result
+
+    def save_entry(self, user_id, sso_svcs_base_url, entry):
+        self.affirm_cache_dir()
+        file_path = self.get_file_path(user_id, sso_svcs_base_url)
+        temp_file_path = f'{file_path}.{os.getpid()}.tmp'
+
+        # The token grants access to the user's data. Create the file readable by the user only.
+        file_descriptor = os.open(temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, 'w') as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(temp_file_path, file_path)
+
+    def affirm_cache_dir(self):
+        """
+        Creates the cache folder accessible by the user only. A folder created by an earlier version
+        with the default mode is restricted as well.
+        """
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        if stat.S_IMODE(os.stat(self.cache_dir).st_mode) & 0o077:
+            os.chmod(self.cache_dir, 0o700)
+
+    def get_file_path(self, user_id, sso_svcs_base_url):
+        entry_key = hashlib.sha256(f'{user_id}|{sso_svcs_base_url}'.encode('utf-8')).hexdigest()
+        result = os.path.join(self.cache_dir, f'{entry_key}.json')
+        return result
@@ -0,0 +1,127 @@
+import time
+import logging
+import threading
+
+
+# The token is replaced this long before it expires, or in the middle of its lifetime if it is shorter
+AUTH_TOKEN_REFRESH_LEAD_IN_SECONDS = 120
+# Replaced token is revoked after this delay, so the requests already sent with it are not rejected
+AUTH_TOKEN_REVOCATION_DELAY_IN_SECONDS = 10
+MIN_REFRESH_RETRY_DELAY_IN_SECONDS = 1
+MAX_REFRESH_RETRY_DELAY_IN_SECONDS = 30
+
+
+class AuthTokenRefresher(object):
+    """
+    Background thread which replaces the session's authentication token before it expires,
+    so service calls never wait for the token renewal. Replaced tokens are revoked by the thread as well.
+    """
+    def __init__(
+            self,
+            session,
+            lead_time_in_seconds=AUTH_TOKEN_REFRESH_LEAD_IN_SECONDS,
+            revocation_delay_in_seconds=AUTH_TOKEN_REVOCATION_DELAY_IN_SECONDS):
+        """
+        :param session: Authentication session holding the token
+        :param lead_time_in_seconds: How long before the expiration the token is replaced
+        :param revocation_delay_in_seconds: How long the replaced token is kept valid
+        """
+        self.session = session
+        self.lead_time_in_seconds = lead_time_in_seconds
+        self.revocation_delay_in_seconds = revocation_delay_in_seconds
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='auth-token-refresher', daemon=True)
+        self.pending_revocations_lock = threading.Lock()
+        self.pending_revocations = []
+        self.next_refresh_time = None
+        self.refresh_retry_delay_in_seconds = MIN_REFRESH_RETRY_DELAY_IN_SECONDS
+
+        # Metrics
+        self.refresh_count = 0
+        self.refresh_failure_count = 0
+        self.refresh_latencies_in_seconds = []
+
+    def start(self):
+        self.schedule_refresh()
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the thread. Replaced tokens which are not revoked yet are revoked right away.
+        """
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.revoke_replaced_tokens(revoke_all=True)
+
+    def schedule_revocation(self, auth_token):
+        with self.pending_revocations_lock:
+            self.pending_revocations.append((time.time() + self.revocation_delay_in_seconds, auth_token))
+
+    def schedule_refresh(self):
+        now = time.time()
+        time_left = self.session.expiration_timestamp - now
+        self.next_refresh_time = now + max(time_left - self.lead_time_in_seconds, time_left / 2, 0)
+        self.refresh_retry_delay_in_seconds = MIN_REFRESH_RETRY_DELAY_IN_SECONDS
+
+    def run(self):
+        while True:
+            with self.pending_revocations_lock:
+                wake_up_time = min([self.next_refresh_time] + [item[0] for item in self.pending_revocations])
+            if self.stop_event.wait(max(wake_up_time - time.time(), 0)):
+                return
+
+            self.revoke_replaced_tokens()
+            if time.time() >= self.next_refresh_time:
+                self.refresh()
+
+    def refresh(self):
+        refresh_begin = time.perf_counter()
+        try:
+            replaced_auth_token = self.session.refresh_auth_token()
+        except Exception as e:
+            # The session renews the token itself if it expires before the refresh succeeds
+            self.refresh_failure_count += 1
+            logging.warning(
+                f"Background refresh of the security token has failed; "
+                f"retrying in {self.refresh_retry_delay_in_seconds} s. Error: {e}")
+            self.next_refresh_time = time.time() + self.refresh_retry_delay_in_seconds
+            self.refresh_retry_delay_in_seconds = min(
+                self.refresh_retry_delay_in_seconds * 2, MAX_REFRESH_RETRY_DELAY_IN_SECONDS)
+            return
+
+        refresh_latency = time.perf_counter() - refresh_begin
+        self.refresh_count += 1
+        self.refresh_latencies_in_seconds.append(refresh_latency)
+        logging.debug(f"Security token has been refreshed in the background in {refresh_latency * 1000:.0f} ms.")
+
+        if replaced_auth_token is not None:
+            self.schedule_revocation(replaced_auth_token)
+        self.schedule_refresh()
+
+    def revoke_replaced_tokens(self, revoke_all=False):
+        now = time.time()
+        with self.pending_revocations_lock:
+            due_revocations = [item for item in self.pending_revocations if revoke_all or item[0] <= now]
+            self.pending_revocations = [item for item in self.pending_revocations if item not in due_revocations]
+
+        for revocation_time, auth_token in due_revocations:
+            try:
+                self.session.delete_auth_token(auth_token)
+            except Exception as e:
+                # The token expires on its own
+                logging.warning(f"Replaced security token has not been revoked. Error: {e}")
+
+    def get_stats(self):
+        """
+        Gets the background refresh metrics
+        """
+        latencies = self.refresh_latencies_in_seconds
+        result = {
+            'refresh_count': self.refresh_count,
+            'refresh_failure_count': self.refresh_failure_count,
+            'refresh_latency_avg_in_seconds': sum(latencies) / len(latencies) if latencies else None,
+            'refresh_latency_max_in_seconds': max(latencies) if latencies else None
+        }
+        return result
@@ -0,0 +1,165 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import contextlib
+
+
+HASH_READ_SIZE = 1024 * 1024
+# How long a process waits for another one writing to the index
+INDEX_LOCK_TIMEOUT_IN_SECONDS = 30
+
+
+def create_content_hash():
+    result = hashlib.sha256()
+    return result
+
+
+def compute_file_hash(file_path):
+    """
+    Computes the content hash of the file
+    :param file_path: Path of the file
+    :return: Content hash in hex
+    """
+    content_hash = create_content_hash()
+    with open(file_path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_READ_SIZE), b''):
+            content_hash.update(chunk)
+
+    result = content_hash.hexdigest()
+    return result
+
+
+class UploadIndex(object):
+    """
+    Files uploaded to the File Management Service indexed by the hash of their content, so a file delivered again
+    is not uploaded again and its import reuses the uploaded file. The index is an SQLite database
+    shared by the processes on the same host; its entries are bound to the service and the user.
+    """
+    def __init__(self, database_file_path, service_base_url, user_id):
+        """
+        :param database_file_path: Path of the index database
+        :param service_base_url: File Management Service base URL
+        :param user_id: User the uploaded files belong to
+        """
+        self.database_file_path = database_file_path
+        self.service_base_url = service_base_url
+        self.user_id = user_id
+
+        # Counters of this process
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        os.makedirs(os.path.dirname(database_file_path), mode=0o700, exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS uploads ('
+                'service_base_url TEXT NOT NULL, '
+                'user_id TEXT NOT NULL, '
+                'content_hash TEXT NOT NULL, '
+                'file_size INTEGER NOT NULL, '
+                'file_id TEXT NOT NULL, '
+                'file_name TEXT, '
+                'job_id TEXT, '
+                'uploaded_at REAL NOT NULL, '
+                'PRIMARY KEY (service_base_url, user_id, content_hash))')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS uploads_by_file_size ON uploads (service_base_url, user_id, file_size)')
+
+    def has_file_size(self, file_size):
+        """
+        Checks whether any indexed file has the size. Only then the file has to be hashed before the upload;
+        otherwise it's a new file and it's hashed while being uploaded.
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                'SELECT 1 FROM uploads WHERE service_base_url = ? AND user_id = ? AND file_size = ? LIMIT 1',
+                (self.service_base_url, self.user_id, file_size)).fetchone()
+
+        result = row is not None
+        return result
+
+    def find(self, content_hash):
+        """
+        Finds the uploaded file with the content
+        :param content_hash: Content hash in hex
+        :return: Uploaded file information (id, filename, size, job id and upload time); None - not uploaded
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                'SELECT file_id, file_name, file_size, job_id, uploaded_at FROM uploads '
+                'WHERE service_base_url = ? AND user_id = ? AND content_hash = ?',
+                (self.service_base_url, self.user_id, content_hash)).fetchone()
+
+        if row is None:
+            return None
+
+        result = {'id': row[0], 'filename': row[1], 'size': row[2], 'job_id': row[3], 'uploaded_at': row[4]}
+        return result
+
+    def record_upload(self, content_hash, file_size, file_info):
+        """
+        Records the uploaded file
+        :param content_hash: Content hash in hex
+        :param file_size: Size of the file in bytes
+        :param file_info: Information on the uploaded file returned by the File Management Service
+        """
+        with self.connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO uploads '
+                '(service_base_url, user_id, content_hash, file_size, file_id, file_name, job_id, uploaded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, NULL, ?)',
+                (self.service_base_url, self.user_id, content_hash, file_size, file_info['id'],
+                 file_info.get('filename'), time.time()))
+
+    def record_job(self, file_id, job_id):
+        """
+        Records the latest import job of the uploaded file
+        """
+        with self.connect() as connection:
+            connection.execute(
+                'UPDATE uploads SET job_id = ? WHERE service_base_url = ? AND user_id = ? AND file_id = ?',
+                (job_id, self.service_base_url, self.user_id, file_id))
+
+    def forget(self, file_id):
+        """
+        Removes the uploaded file from the index, e.g. when the service does not have it anymore
+        :return: True - the file has been in the index; False - it has not been there
+        """
+        with self.connect() as connection:
+            cursor = connection.execute(
+                'DELETE FROM uploads WHERE service_base_url = ? AND user_id = ? AND file_id = ?',
+                (self.service_base_url, self.user_id, file_id))
+
+        result = cursor.rowcount > 0
+        return result
+
+    def record_hit(self, file_size):
+        with self.stats_lock:
+            self.hits += 1
+            self.bytes_saved += file_size
+
+    def record_miss(self):
+        with self.stats_lock:
+            self.misses += 1
+
+    def get_stats(self):
+        """
+        Gets the index hit and miss counters and the upload bytes saved by this process
+        """
+        with self.stats_lock:
+            result = {'hits': self.hits, 'misses': self.misses, 'bytes_saved': self.bytes_saved}
+        return result
+
+    @contextlib.contextmanager
+    def connect(self):
+        # Connections are not shared between the threads; each operation is one transaction
+        connection = sqlite3.connect(self.database_file_path, timeout=INDEX_LOCK_TIMEOUT_IN_SECONDS)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,318 @@
+import os
+import time
+import zlib
+import struct
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_COMPRESSION_LEVEL = 6
+DEFAULT_COMPRESSION_WORKERS = 4
+# Size of the pieces of a file compressed independently. Every block is compressed with the preceding 32 KB
+# of the file as its dictionary, so splitting costs little compression ratio.
+COMPRESSION_BLOCK_SIZE = 1024 * 1024
+DICTIONARY_SIZE = 32 * 1024
+# Blocks being compressed or waiting to be sent per worker; it bounds the memory use
+BLOCKS_IN_FLIGHT_PER_WORKER = 2
+
+LOCAL_FILE_HEADER_SIGNATURE = 0x04034b50
+DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+CENTRAL_DIRECTORY_SIGNATURE = 0x02014b50
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06054b50
+ZIP64_END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06064b50
+ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR_SIGNATURE = 0x07064b50
+ZIP64_EXTRA_FIELD_ID = 0x0001
+# Members and archives over these limits are written with the Zip64 extensions
+ZIP64_SIZE_LIMIT = (1 << 31) - 1
+ZIP64_COUNT_LIMIT = 0xFFFF
+ZIP64_SIZE_MARKER = 0xFFFFFFFF
+
+FLAG_DATA_DESCRIPTOR = 0x0008
+FLAG_UTF8_NAME = 0x0800
+COMPRESSION_METHOD_DEFLATED = 8
+VERSION_DEFLATED = 20
+VERSION_ZIP64 = 45
+CREATE_SYSTEM_UNIX = 3
+FILE_EXTERNAL_ATTRIBUTES = 0o100644 << 16
+
+
+class DirectoryZipStream(object):
+    """
+    Zip archive of the files in a directory produced while it's read, e.g. to be streamed into an upload body
+    without writing the archive to the disk. The files are split into blocks compressed in parallel by a pool
+    of workers, so reading, compressing and sending the archive overlap. The members are written with data
+    descriptors, as their sizes and CRC-32 are known only after they are compressed.
+    """
+    def __init__(
+            self,
+            source_dir,
+            compression_level=DEFAULT_COMPRESSION_LEVEL,
+            worker_count=DEFAULT_COMPRESSION_WORKERS,
+            block_size=COMPRESSION_BLOCK_SIZE):
+        """
+        :param source_dir: Directory with the files to archive; the member names are the paths relative to it
+        :param compression_level: Deflate compression level from 0 (no compression) to 9 (best compression)
+        :param worker_count: Number of blocks compressed at once
+        :param block_size: Size of the blocks compressed independently
+        """
+        self.source_dir = source_dir
+        self.compression_level = compression_level
+        self.worker_count = worker_count
+        self.block_size = block_size
+
+        # Metrics
+        self.member_count = 0
+        self.file_size = 0
+        self.archive_size = 0
+        self.duration_in_seconds = None
+
+    def __iter__(self):
+        """
+        Produces the archive
+        :return: Iterator of the archive's chunks
+        """
+        begin_time = time.monotonic()
+        members = self.list_members()
+        central_directory_entries = []
+        offset = 0
+
+        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            for member, block_results in self.compress_members(executor, members):
+                local_header = create_local_header(member)
+                yield local_header
+
+                crc = 0
+                compressed_size = 0
+                for block, compressed_block in block_results:
+                    crc = zlib.crc32(block, crc)
+                    compressed_size += len(compressed_block)
+                    yield compressed_block
+
+                data_descriptor = create_data_descriptor(member, crc, compressed_size)
+                yield data_descriptor
+
+                central_directory_entries.append(
+                    create_central_directory_entry(member, crc, compressed_size, offset))
+                offset += len(local_header) + compressed_size + len(data_descriptor)
+                self.member_count += 1
+                self.file_size += member['size']
+
+        central_directory = b''.join(central_directory_entries)
+        end_of_central_directory = create_end_of_central_directory(
+            len(central_directory_entries), len(central_directory), offset)
+        yield central_directory + end_of_central_directory
+
+        self.archive_size = offset + len(central_directory) + len(end_of_central_directory)
+        self.duration_in_seconds = time.monotonic() - begin_time
+
+    def list_members(self):
+        result = []
+        for dir_path, dir_names, file_names in os.walk(self.source_dir):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(dir_path, file_name)
+                file_stat = os.stat(file_path)
+                result.append({
+                    'name': os.path.relpath(file_path, self.source_dir).replace(os.sep, '/'),
+                    'path': file_path,
+                    'size': file_stat.st_size,
+                    'modification_time': file_stat.st_mtime
+                })
+
+        return result
+
+    def compress_members(self, executor, members):
+        """
+        Compresses the blocks of all members in parallel, keeping a bounded number of blocks in flight
+        :return: Iterator of the members with the iterators of their blocks and compressed blocks in the file order
+        """
+        block_futures = collections.deque()
+        block_specs = iter(
+            (member_index, block_offset, min(self.block_size, member['size'] - block_offset))
+            for member_index, member in enumerate(members)
+            for block_offset in range(0, max(member['size'], 1), self.block_size))
+
+        def submit_blocks():
+            while len(block_futures) < self.worker_count * BLOCKS_IN_FLIGHT_PER_WORKER:
+                block_spec = next(block_specs, None)
+                if block_spec is None:
+                    return
+                member_index, block_offset, block_length = block_spec
+                block_futures.append((member_index, executor.submit(
+                    self.compress_block, members[member_index], block_offset, block_length)))
+
+        def iter_member_blocks(member_index):
+            while True:
+                submit_blocks()
+                if not block_futures or block_futures[0][0] != member_index:
+                    return
+                yield block_futures.popleft()[1].result()
+
+        try:
+            for member_index, member in enumerate(members):
+                yield member, iter_member_blocks(member_index)
+        finally:
+            for member_index, block_future in block_futures:
+                block_future.cancel()
+
+    def compress_block(self, member, block_offset, block_length):
+        """
+        Compresses the block of the file as a part of the member's deflate stream
+        :return: Block and compressed block
+        """
+        with open(member['path'], 'rb') as source_file:
+            dictionary_offset = max(block_offset - DICTIONARY_SIZE, 0)
+            source_file.seek(dictionary_offset)
+            dictionary = source_file.read(block_offset - dictionary_offset)
+            block = source_file.read(block_length)
+        if len(block) != block_length:
+            raise IOError(f"File '{member['path']}' has changed while being archived.")
+
+        if dictionary:
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        is_last_block = block_offset + block_length >= member['size']
+        # The blocks which are not the last end on a byte boundary, so the member's blocks are one deflate stream
+        compressed_block = compressor.compress(block) + compressor.flush(
+            zlib.Z_FINISH if is_last_block else zlib.Z_SYNC_FLUSH)
+
+        return block, compressed_block
+
+
+def is_zip64_member(member):
+    # Compressed data of incompressible files is slightly larger than the files
+    result = member['size'] > ZIP64_SIZE_LIMIT
+    return result
+
+
+def get_member_name_and_flags(member):
+    try:
+        result = member['name'].encode('ascii'), FLAG_DATA_DESCRIPTOR
+    except UnicodeEncodeError:
+        result = member['name'].encode('utf-8'), FLAG_DATA_DESCRIPTOR | FLAG_UTF8_NAME
+    return result
+
+
+def get_dos_date_time(timestamp):
+    local_time = time.localtime(timestamp)
+    if local_time.tm_year < 1980:
+        return 0, (1 << 5) | 1
+
+    dos_time = (local_time.tm_hour << 11) | (local_time.tm_min << 5) | (local_time.tm_sec // 2)
+    dos_date = ((local_time.tm_year - 1980) << 9) | (local_time.tm_mon << 5) | local_time.tm_mday
+    result = dos_time, dos_date
+    return result
+
+
+def create_local_header(member):
+    name, flags = get_member_name_and_flags(member)
+    dos_time, dos_date = get_dos_date_time(member['modification_time'])
+    if is_zip64_member(member):
+        version = VERSION_ZIP64
+        sizes = ZIP64_SIZE_MARKER
+        extra = struct.pack('<HHQQ', ZIP64_EXTRA_FIELD_ID, 16, 0, 0)
+    else:
+        version = VERSION_DEFLATED
+        sizes = 0
+        extra = b''
+
+    result = struct.pack(
+        '<IHHHHHIIIHH',
+        LOCAL_FILE_HEADER_SIGNATURE,
+        version,
+        flags,
+        COMPRESSION_METHOD_DEFLATED,
+        dos_time,
+        dos_date,
+        0,
+        sizes,
+        sizes,
+        len(name),
+        len(extra)) + name + extra
+    return result
+
+
+def create_data_descriptor(member, crc, compressed_size):
+    if is_zip64_member(member):
+        result = struct.pack('<IIQQ', DATA_DESCRIPTOR_SIGNATURE, crc, compressed_size, member['size'])
+    else:
+        result = struct.pack('<IIII', DATA_DESCRIPTOR_SIGNATURE, crc, compressed_size, member['size'])
+    return result
+
+
+def create_central_directory_entry(member, crc, compressed_size, offset):
+    name, flags = get_member_name_and_flags(member)
+    dos_time, dos_date = get_dos_date_time(member['modification_time'])
+
+    zip64_values = []
+    file_size = member['size']
+    if file_size > ZIP64_SIZE_LIMIT:
+        zip64_values.append(file_size)
+        file_size = ZIP64_SIZE_MARKER
+    if compressed_size > ZIP64_SIZE_LIMIT:
+        zip64_values.append(compressed_size)
+        compressed_size = ZIP64_SIZE_MARKER
+    if offset > ZIP64_SIZE_LIMIT:
+        zip64_values.append(offset)
+        offset = ZIP64_SIZE_MARKER
+    extra = b''
+    if zip64_values:
+        extra = struct.pack(f'<HH{len(zip64_values)}Q', ZIP64_EXTRA_FIELD_ID, 8 * len(zip64_values), *zip64_values)
+    version = VERSION_ZIP64 if zip64_values or is_zip64_member(member) else VERSION_DEFLATED
+
+    result = struct.pack(
+        '<IHHHHHHIIIHHHHHII',
+        CENTRAL_DIRECTORY_SIGNATURE,
+        (CREATE_SYSTEM_UNIX << 8) | version,
+        version,
+        flags,
+        COMPRESSION_METHOD_DEFLATED,
+        dos_time,
+        dos_date,
+        crc,
+        compressed_size,
+        file_size,
+        len(name),
+        len(extra),
+        0,
+        0,
+        0,
+        FILE_EXTERNAL_ATTRIBUTES,
+        offset) + name + extra
+    return result
+
+
+def create_end_of_central_directory(entry_count, central_directory_size, central_directory_offset):
+    result = b''
+    if entry_count > ZIP64_COUNT_LIMIT or central_directory_size > ZIP64_SIZE_LIMIT \
+            or central_directory_offset > ZIP64_SIZE_LIMIT:
+        zip64_end_offset = central_directory_offset + central_directory_size
+        result += struct.pack(
+            '<IQHHIIQQQQ',
+            ZIP64_END_OF_CENTRAL_DIRECTORY_SIGNATURE,
+            44,
+            (CREATE_SYSTEM_UNIX << 8) | VERSION_ZIP64,
+            VERSION_ZIP64,
+            0,
+            0,
+            entry_count,
+            entry_count,
+            central_directory_size,
+            central_directory_offset)
+        result += struct.pack('<IIQI', ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR_SIGNATURE, 0, zip64_end_offset, 1)
+        entry_count = min(entry_count, ZIP64_COUNT_LIMIT)
+        central_directory_size = min(central_directory_size, ZIP64_SIZE_MARKER)
+        central_directory_offset = min(central_directory_offset, ZIP64_SIZE_MARKER)
+
+    result += struct.pack(
+        '<IHHHHIIH',
+        END_OF_CENTRAL_DIRECTORY_SIGNATURE,
+        0,
+        0,
+        entry_count,
+        entry_count,
+        central_directory_size,
+        central_directory_offset,
+        0)
+    return result
@@ -1,24 +1,52 @@
 import sys
 import os
+import re
 import shutil
 import logging
-import time
 import contextlib
+import json
+import time
+import threading
+import urllib.parse
 from argparse import ArgumentParser
-from pyhocon import ConfigFactory
-from pyhocon import ConfigMissingException
+from argparse import ArgumentTypeError
+from concurrent.futures import ThreadPoolExecutor
 from types import SimpleNamespace
 from datetime import timedelta
-from datetime import datetime
-from api_client.security import Session
-from api_client.security import AuthenticationError
-from api_client.file_management_service_client import FileManagementServiceClient
-from api_client.dictionary_service_client import DictionaryServiceClient
-from api_client.job_service_client import JobServiceClient
-from api_client.project_service_client import ProjectServiceClient
+from api_client.errors import AuthenticationError
+
+# Configuration parser (pyhocon), HTTP stack (requests, jwt) and service clients take most of the start-up time.
+# They are imported by the functions which use them, so help, version and configure do not load them.
 
 LOGIN_ENV_VAR_NAME = 'MA_APIC_LOGIN'
 PASSWORD_ENV_VAR_NAME = 'MA_APIC_PASSWORD'
+DEFAULT_DOWNLOAD_SEGMENT_COUNT = 1
+DEFAULT_UPLOAD_PART_SIZE_IN_MEGABYTES = 16
+DEFAULT_UPLOAD_PARALLEL_PARTS = 4
+DEFAULT_MAX_IN_FLIGHT_ANALYSIS_JOBS = 10
+DEFAULT_ZIP_COMPRESSION_LEVEL = 6
+DEFAULT_ZIP_COMPRESSION_WORKERS = 4
+PIPELINE_DOWNLOAD_WORKERS = 4
+DEFAULT_WATCH_POLL_INTERVAL_IN_SECONDS = 5
+DEFAULT_WATCH_MAX_CONCURRENT_UPLOADS = 2
+DEFAULT_WATCH_MAX_CONCURRENT_IMPORT_JOBS = 4
+WATCH_PROGRESS_LOG_INTERVAL_IN_SECONDS = 60
+CONFIG_CACHE_VERSION = 1
+# Names of the substitutions in the configuration files, e.g. ${HTTP_PROXY} or ${?HTTP_PROXY}
+CONFIG_SUBSTITUTION_PATTERN = re.compile(r'\$\{\??\s*([\w.-]+)\s*\}')
+
+DAEMON_SOCKET_ENV_VAR_NAME = 'MA_APIC_DAEMON_SOCKET'
+# Commands forwarded to the 'serve' daemon when it's running
+DAEMON_COMMAND_NAMES = ['import', 'run-analysis', 'download-results', 'wait', 'pipeline']
+# Path options made absolute before forwarding, since the daemon runs in another directory
+DAEMON_PATH_ARG_NAMES = ['input_zip', 'input_dir', 'output_path', 'analysis_ids_file', 'summary_file', 'report_json']
+
+# Configuration cache hit and miss counters of this process
+config_stats = {'hits': 0, 'misses': 0}
+
+# Authentication sessions kept open by the 'serve' daemon and the 'watch' mode;
+# None - every command opens and closes its own session
+shared_sessions = None
 
 # Configure the logger
 logging.basicConfig(
@@ -35,6 +63,10 @@ def execute_command(current_dir, args):
     :param args: Parsed command-line arguments for given command
     """
     try:
+        # Enable debug logging (e.g. connection pool usage) if requested
+        if get_arg(args, 'debug'):
+            logging.getLogger().setLevel(logging.DEBUG)
+
         # Resolve ImpairmentStudio common option executor
         cmn_opt_executor = resolve_common_option_executor(args)
         if cmn_opt_executor is cmn_opt_exec_version:
@@ -45,19 +77,34 @@ def execute_command(current_dir, args):
         is_cmd_executor = resolve_is_command_executor(args)
 
         # Get credentials configuration (if any)
+        config_resolution_begin_time = time.perf_counter()
         credentials_config = get_credentials_config()
+        credentials_config_resolution_end_time = time.perf_counter()
 
         # Resolve user login and password using sources in the following order:
         # command-line arguments -> environment variables -> credentials configuration
         user_credentials = resolve_user_credentials(args, credentials_config)
-        # Validate user credentials if it's not 'configure' command
-        if is_cmd_executor is not cmd_exec_configure:
+        # Validate user credentials if it's not 'configure' command, connectivity test (it does not authenticate)
+        # or daemon (its requests bring their own credentials)
+        if is_cmd_executor not in [cmd_exec_configure, cmd_exec_serve] \
+                and cmn_opt_executor is not cmn_opt_exec_test_connect:
             validate_user_credentials(user_credentials)
 
         # Get and parse application configuration
+        app_config_resolution_begin_time = time.perf_counter()
         app_config = get_app_config()
         # Validate application configuration
         validate_app_config(app_config)
+        config_resolution_end_time = time.perf_counter()
+
+        if get_arg(args, 'config_timing'):
+            logging.info(
+                f"Configuration has been resolved in "
+                f"{(config_resolution_end_time - config_resolution_begin_time) * 1000:.1f} ms "
+                f"(credentials: "
+                f"{(credentials_config_resolution_end_time - config_resolution_begin_time) * 1000:.1f} ms; "
+                f"application: {(config_resolution_end_time - app_config_resolution_begin_time) * 1000:.1f} ms). "
+                f"Configuration cache hits: {config_stats['hits']}, misses: {config_stats['misses']}.")
 
         if cmn_opt_executor:
             # Run ImpairmentStudio common option executor with provided arguments and user credentials
@@ -74,12 +121,13 @@ def execute_command(current_dir, args):
     except ApicError as e:
         print(e.args[0])
         return 1
-    except AuthenticationError as e:
-        print(e.args[0])
-        return 2
     except KeyboardInterrupt as e:
+        # Segmented downloads keep their progress and are resumed by running the same command again
         print('\nOperation is canceled')
         return 3
+    except AuthenticationError as e:
+        print(e.args[0])
+        return 2
 
 
 def resolve_user_credentials(args, credentials_config):
@@ -131,10 +179,13 @@ def resolve_is_command_executor(args):
 
 
 def get_credentials_config():
+    from pyhocon import ConfigFactory
+
+    # The credentials file is not cached: the cache would be a second copy of the password
     credentials_file_path = get_credentials_file_path()
     if not credentials_file_path:
         return None
-    result = ConfigFactory.parse_file(credentials_file_path)
+    result = ConfigFactory.parse_file(credentials_file_path).as_plain_ordered_dict()
     return result
 
 
@@ -153,22 +204,119 @@ def get_credentials_file_path():
 
 
 def get_app_config():
+    # Use the resolved configuration cached by the previous run while its files have not changed
+    app_config_dir = get_app_config_dir()
+    app_config_file_path = os.path.join(app_config_dir, 'application.conf')
+    source_file_paths = [app_config_file_path, os.path.join(app_config_dir, 'env_data.conf')]
+    result = load_cached_config(app_config_file_path, source_file_paths)
+    if result is not None:
+        return result
+
     app_config_file_path = get_app_config_file_path()
     if not app_config_file_path:
         return None
-    result = ConfigFactory.parse_file(app_config_file_path)
+    result = parse_config_file(app_config_file_path, source_file_paths)
+    return result
+
+
+def parse_config_file(config_file_path, source_file_paths):
+    """
+    Parses the configuration file and caches the resolved configuration
+    :param config_file_path: Path of the configuration file
+    :param source_file_paths: Paths of the configuration file and the files it includes
+    :return: Resolved configuration as a dictionary
+    """
+    from pyhocon import ConfigFactory
+
+    config_stats['misses'] += 1
+    config = ConfigFactory.parse_file(config_file_path)
+
+    # Substitutions which are not defined in the files are resolved from the environment variables
+    substitution_names = set()
+    for source_file_path in source_file_paths:
+        with contextlib.suppress(FileNotFoundError):
+            with open(source_file_path, 'r') as source_file:
+                substitution_names.update(CONFIG_SUBSTITUTION_PATTERN.findall(source_file.read()))
+
+    config_cache = {
+        'version': CONFIG_CACHE_VERSION,
+        'source_files': get_config_source_files_info(source_file_paths),
+        'environment': {name: os.environ.get(name) for name in sorted(substitution_names)},
+        'config': config.as_plain_ordered_dict()
+    }
+    save_config_cache(get_config_cache_file_path(config_file_path), config_cache)
+
+    # The same plain dictionary as loaded from the cache
+    result = config_cache['config']
+    return result
+
+
+def load_cached_config(config_file_path, source_file_paths):
+    """
+    Loads the resolved configuration cached by a previous run
+    :param config_file_path: Path of the configuration file
+    :param source_file_paths: Paths of the configuration file and the files it includes
+    :return: Resolved configuration as a dictionary; None - there is no cached configuration or it is out of date
+    """
+    try:
+        with open(get_config_cache_file_path(config_file_path), 'r') as config_cache_file:
+            config_cache = json.load(config_cache_file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if config_cache.get('version') != CONFIG_CACHE_VERSION:
+        return None
+    # The cache is out of date if any of its source files has been changed, created or deleted
+    if config_cache['source_files'] != get_config_source_files_info(source_file_paths):
+        return None
+    if any(os.environ.get(name) != value for name, value in config_cache['environment'].items()):
+        return None
+
+    config_stats['hits'] += 1
+    result = config_cache['config']
     return result
 
 
+def get_config_source_files_info(source_file_paths):
+    result = {}
+    for source_file_path in source_file_paths:
+        try:
+            source_file_stat = os.stat(source_file_path)
+        except FileNotFoundError:
+            result[source_file_path] = None
+            continue
+        result[source_file_path] = [source_file_stat.st_mtime_ns, source_file_stat.st_size]
+
+    return result
+
+
+def get_config_cache_file_path(config_file_path):
+    result = os.path.join(get_app_config_dir(), 'config_cache', f'{os.path.basename(config_file_path)}.json')
+    return result
+
+
+def save_config_cache(config_cache_file_path, config_cache):
+    config_cache_dir = os.path.dirname(config_cache_file_path)
+    os.makedirs(config_cache_dir, mode=0o700, exist_ok=True)
+    temp_file_path = f'{config_cache_file_path}.{os.getpid()}.tmp'
+
+    # The cached configuration must be readable by the user only
+    file_descriptor = os.open(temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(file_descriptor, 'w') as config_cache_file:
+        json.dump(config_cache, config_cache_file, separators=(',', ':'))
+    os.replace(temp_file_path, config_cache_file_path)
+
+
 def validate_app_config(app_config):
+    if app_config:
+        return
+
     app_config_dir = get_app_config_dir()
-    app_config_file_path = get_app_config_file_path()
+    app_config_file_path = os.path.join(app_config_dir, 'application.conf')
     resolve_message = \
         f"Configuration file '{app_config_file_path}' either does not exist or corrupt. " \
         f"Delete all *.conf files in the folder '{app_config_dir}' and restart the application."
-
-    if not app_config:
-        raise ApicError(f"Configuration is empty. {resolve_message}")
+    raise ApicError(f"Configuration is empty. {resolve_message}")
 
 
 def get_app_config_file_path():
@@ -194,6 +342,11 @@ def get_app_config_dir():
     return result
 
 
+def get_upload_state_dir():
+    result = os.path.join(get_app_config_dir(), 'uploads')
+    return result
+
+
 def affirm_config_file(file_name, app_config_dir, default_config_dir, destination_file_name=None):
     if not destination_file_name:
         destination_file_name = file_name
@@ -223,6 +376,66 @@ def affirm_app_config_file(app_config_dir):
                 '\n',
                 'http_proxy = ${HTTP_PROXY}\n',
                 'https_proxy = ${HTTPS_PROXY}\n',
+                '\n',
+                '# Connection pool shared by all service clients\n',
+                'http_pool_connections = 10\n',
+                'http_pool_maxsize = 10\n',
+                'http_keep_alive = true\n',
+                '\n',
+                '# Number of byte ranges of the results file downloaded at once\n',
+                'download_segment_count = 4\n',
+                '\n',
+                '# Chunked, resumable upload of the input zip files\n',
+                'chunked_upload_enabled = false\n',
+                'upload_part_size_in_megabytes = 16\n',
+                'upload_parallel_parts = 4\n',
+                '\n',
+                '# Input directories are zipped while they are uploaded (import --input-dir)\n',
+                'zip_compression_level = 6\n',
+                'zip_compression_workers = 4\n',
+                '\n',
+                '# Maximum number of job status requests in flight when waiting for many jobs\n',
+                'max_concurrent_job_polls = 8\n',
+                '\n',
+                '# Maximum number of analysis jobs running at once when many analyses are run\n',
+                'max_in_flight_analysis_jobs = 10\n',
+                '\n',
+                '# Reuse authentication token across the runs (cached in ~/.ma/token_cache)\n',
+                'auth_token_cache_enabled = false\n',
+                '\n',
+                '# Replace authentication token in the background before it expires\n',
+                'auth_token_background_refresh_enabled = false\n',
+                '\n',
+                '# Retries of the failed requests (POST, PUT and DELETE only if unsafe methods are enabled)\n',
+                'http_max_retries = 3\n',
+                'http_retry_unsafe_methods = false\n',
+                '# Requests to a service are rejected for a while after this many failures in a row\n',
+                'circuit_breaker_failure_threshold = 5\n',
+                'circuit_breaker_reset_timeout_in_seconds = 30\n',
+                '\n',
+                '# Request budgets shared by all processes on this host (kept in ~/.ma/rate_limits); 0 - no limit\n',
+                'rate_limit_enabled = false\n',
+                'rate_limit_host_requests_per_second = 20\n',
+                'rate_limit_service_requests_per_second = 10\n',
+                'rate_limit_burst = 10\n',
+                '\n',
+                '# Watch mode: files are imported once their size has not changed for the stable time or\n',
+                '# their marker file (e.g. input.zip.done) is created\n',
+                'watch_poll_interval_in_seconds = 5\n',
+                'watch_stable_time_in_seconds = 10\n',
+                'watch_require_marker = false\n',
+                'watch_max_concurrent_uploads = 2\n',
+                'watch_max_concurrent_import_jobs = 4\n',
+                '\n',
+                '# Do not upload the input zips again if their content has been uploaded (index in ~/.ma)\n',
+                'upload_dedup_enabled = false\n',
+                '\n',
+                '# Analysis results kept in ~/.ma/results_cache and revalidated with conditional requests\n',
+                'results_cache_enabled = false\n',
+                'results_cache_max_size_in_megabytes = 1024\n',
+                '\n',
+                '# Folder of the Prometheus node exporter textfile collector the metrics of every run are written to\n',
+                'metrics_textfile_dir = null\n',
             ])
 
     return result
@@ -287,112 +500,1255 @@ def get_item_from_args(item_name, args):
     return result
 
 
-def cmd_exec_import(current_dir, args, user_credentials, app_config):
+def cmd_exec_import(current_dir, args, user_credentials, app_config, import_slots=None):
+    from api_client.file_management_service_client import FileManagementServiceClient
+    from api_client.dictionary_service_client import DictionaryServiceClient
+    from api_client.job_service_client import JobServiceClient
+
     # Get/resolve arguments
-    arg_input_zip_file_path = args.input_zip
+    arg_input_zip_file_path = get_arg(args, 'input_zip')
+    arg_input_dir = get_arg(args, 'input_dir')
     arg_overwrite = get_arg(args, 'overwrite', default=False)
     arg_job_name = get_arg(args, 'job_name', default='FileUpload')
     arg_error_files_dir = get_arg(args, 'output_path', default=current_dir)
+    arg_extract = get_arg(args, 'extract', default=False)
+    arg_chunked_upload = get_arg(
+        args,
+        'chunked_upload',
+        default=get_config_item(app_config, 'chunked_upload_enabled', False))
+    arg_force_upload = get_arg(args, 'force_upload', default=False)
 
     # Get configuration parameters
-    sso_service_base_url = app_config['sso_service_base_url']
     data_api_base_url = app_config['data_api_base_url']
     impairment_studio_api_base_url = app_config['impairment_studio_api_base_url']
     default_job_wait_timeout = timedelta(minutes=app_config['default_job_wait_timeout_in_minutes'])
-    proxies = get_requests_proxies(app_config)
+    upload_part_size = get_config_item(
+        app_config,
+        'upload_part_size_in_megabytes',
+        DEFAULT_UPLOAD_PART_SIZE_IN_MEGABYTES) * 1024 * 1024
+    upload_parallel_parts = get_config_item(app_config, 'upload_parallel_parts', DEFAULT_UPLOAD_PARALLEL_PARTS)
+    zip_compression_level = get_config_item(app_config, 'zip_compression_level', DEFAULT_ZIP_COMPRESSION_LEVEL)
+    zip_compression_workers = get_config_item(app_config, 'zip_compression_workers', DEFAULT_ZIP_COMPRESSION_WORKERS)
+    upload_index = create_upload_index(user_credentials, app_config)
+    # The watch mode bounds the number of uploads and import jobs running at once across the imported files
+    upload_slot = import_slots.upload if import_slots else contextlib.nullcontext()
+    job_slot = import_slots.job if import_slots else contextlib.nullcontext()
 
     # Run file import in the scope of the authentication session
-    with Session(user_credentials.login, user_credentials.password, sso_service_base_url, proxies) as session:
+    with create_command_report('import', args, app_config) as command_report, \
+            create_session(user_credentials, app_config) as session:
+        command_report.session = session
+        step_timings = command_report.step_timings
         fms_client = FileManagementServiceClient(session, data_api_base_url)
         ds_client = DictionaryServiceClient(session, data_api_base_url)
         js_client = JobServiceClient(session, impairment_studio_api_base_url)
 
         # Step 1: Upload ZIP file with inputs to the system's raw files location
-        logging.info(f"Importing of the input file '{arg_input_zip_file_path}' to the system has started.")
-        head, file_management_file_name = os.path.split(arg_input_zip_file_path)
-        files_info = fms_client.import_file(arg_input_zip_file_path, file_management_file_name, 'raw')
-        logging.info(f"Importing of the input file '{arg_input_zip_file_path}' to the system has finished.")
-
-        # Step 2.1: Schedule a job to move files from raw files location to processing location
-        file_info = files_info[0]
-        job_id = ds_client.import_file(
-            file_management_file_id=file_info['id'],
-            job_name=arg_job_name,
-            overwrite=arg_overwrite)
-        logging.info(
-            f"Moving input file '{file_info['filename']}' from raw files location "
-            f"to the processing location has started (job id: '{job_id}').")
-
-        # Step 2.2: Wait until file moving is done
-        job_final_status = job_wait(js_client, job_id, default_job_wait_timeout)
+        with upload_slot, step_timings.measure('import upload'):
+            if arg_input_dir:
+                file_info = upload_input_dir(fms_client, arg_input_dir, zip_compression_level, zip_compression_workers)
+            else:
+                file_info = upload_input_file(
+                    fms_client,
+                    arg_input_zip_file_path,
+                    arg_chunked_upload,
+                    upload_part_size,
+                    upload_parallel_parts,
+                    upload_index,
+                    arg_force_upload)
+
+        with job_slot:
+            # Step 2.1: Schedule a job to move files from raw files location to processing location
+            with step_timings.measure('import job submission'):
+                job_id = schedule_import_job(ds_client, file_info, arg_job_name, arg_overwrite, upload_index)
+            job_submit_time = time.monotonic()
+            logging.info(
+                f"Moving input file '{file_info['filename']}' from raw files location "
+                f"to the processing location has started (job id: '{job_id}').")
+
+            # Step 2.2: Wait until file moving is done
+            with step_timings.measure('import job wait'):
+                job_final_status = job_wait(js_client, job_id, default_job_wait_timeout, job_submit_time)
         # Step 2.3: Validate job status. If job failed, stop processing and log error.
-        validate_job(job_id, job_final_status, fms_client, arg_error_files_dir)
+        with step_timings.measure('import job validation'):
+            validate_job(job_id, job_final_status, fms_client, arg_error_files_dir, arg_extract)
         logging.info(
             f"Moving input file '{file_info['filename']}' from raw files location "
             f"to the processing location has finished (job id: '{job_id}').")
 
 
+def upload_input_file(
+        fms_client,
+        input_zip_file_path,
+        chunked_upload,
+        upload_part_size,
+        upload_parallel_parts,
+        upload_index=None,
+        force_upload=False):
+    """
+    Uploads ZIP file with inputs to the system's raw files location
+    :param fms_client: File management service client
+    :param input_zip_file_path: Path of the ZIP file with inputs
+    :param chunked_upload: True - upload the file in parts; False - upload the file in a single request
+    :param upload_part_size: Size of one part in bytes for the chunked upload
+    :param upload_parallel_parts: Number of parts uploaded at once for the chunked upload
+    :param upload_index: Index of the uploaded files; None - every file is uploaded and not indexed
+    :param force_upload: True - upload the file even if the same content has been uploaded before
+    :return: Information on the uploaded file
+    """
+    from api_client.upload_index import compute_file_hash
+    from api_client.upload_index import create_content_hash
+
+    file_size = os.path.getsize(input_zip_file_path)
+    file_hash = None
+    # A file is hashed before the upload only if an indexed file has the same size, otherwise it's hashed
+    # while being uploaded and the file is read once
+    if upload_index is not None and not force_upload and upload_index.has_file_size(file_size):
+        file_hash = compute_file_hash(input_zip_file_path)
+        indexed_file_info = upload_index.find(file_hash)
+        if indexed_file_info is not None:
+            upload_index.record_hit(file_size)
+            logging.info(
+                f"The input file '{input_zip_file_path}' has the same content as the file uploaded at "
+                f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(indexed_file_info['uploaded_at']))} "
+                f"(file id: '{indexed_file_info['id']}'). Its upload is skipped.")
+            return indexed_file_info
+
+    logging.info(f"Importing of the input file '{input_zip_file_path}' to the system has started.")
+    head, file_management_file_name = os.path.split(input_zip_file_path)
+    content_hash = create_content_hash() if upload_index is not None and file_hash is None else None
+    if chunked_upload:
+        files_info = fms_client.import_file_in_parts(
+            input_zip_file_path,
+            file_management_file_name,
+            'raw',
+            upload_part_size,
+            upload_parallel_parts,
+            get_upload_state_dir())
+    else:
+        files_info = fms_client.import_file(input_zip_file_path, file_management_file_name, 'raw', content_hash)
+    logging.info(f"Importing of the input file '{input_zip_file_path}' to the system has finished.")
+
+    result = files_info[0]
+    if upload_index is not None:
+        upload_index.record_miss()
+        if file_hash is None:
+            # Parts of the chunked upload are read out of order, so the file is hashed after it
+            file_hash = compute_file_hash(input_zip_file_path) if chunked_upload else content_hash.hexdigest()
+        upload_index.record_upload(file_hash, file_size, result)
+
+    return result
+
+
+def upload_input_dir(fms_client, input_dir, compression_level, compression_workers):
+    """
+    Uploads the files of the directory with inputs to the system's raw files location as a ZIP file.
+    The ZIP file is built while it's uploaded, with the files compressed in parallel, and it's not written to the disk.
+    :param fms_client: File management service client
+    :param input_dir: Path of the directory with inputs
+    :param compression_level: Deflate compression level from 0 to 9
+    :param compression_workers: Number of file blocks compressed at once
+    :return: Information on the uploaded file
+    """
+    from api_client.zip_stream import DirectoryZipStream
+
+    if not os.path.isdir(input_dir):
+        raise ApicError(f"The input directory '{input_dir}' does not exist.")
+    file_management_file_name = f'{os.path.basename(os.path.abspath(input_dir))}.zip'
+    zip_stream = DirectoryZipStream(input_dir, compression_level, compression_workers)
+    if not zip_stream.list_members():
+        raise ApicError(f"The input directory '{input_dir}' has no files.")
+
+    logging.info(
+        f"Importing of the input directory '{input_dir}' to the system "
+        f"as the file '{file_management_file_name}' has started.")
+    files_info = fms_client.import_file_stream(zip_stream, file_management_file_name, 'raw')
+    logging.info(
+        f"Importing of the input directory '{input_dir}' to the system has finished: "
+        f"{zip_stream.member_count} files, {zip_stream.file_size / (1024 * 1024):.1f} MB compressed to "
+        f"{zip_stream.archive_size / (1024 * 1024):.1f} MB in {zip_stream.duration_in_seconds:.1f} s.")
+
+    result = files_info[0]
+    return result
+
+
+def schedule_import_job(ds_client, file_info, job_name, overwrite, upload_index=None):
+    """
+    Schedules a job to move the uploaded file from raw files location to processing location
+    :param ds_client: Dictionary service client
+    :param file_info: Information on the uploaded file
+    :param job_name: Name of the job
+    :param overwrite: True - overwrite portfolio of the same name
+    :param upload_index: Index of the uploaded files; None - the files are not indexed
+    :return: Job id
+    """
+    import requests
+
+    try:
+        result = ds_client.import_file(
+            file_management_file_id=file_info['id'],
+            job_name=job_name,
+            overwrite=overwrite)
+    except requests.exceptions.HTTPError as e:
+        if upload_index is None or e.response is None or e.response.status_code != 404 \
+                or not upload_index.forget(file_info['id']):
+            raise
+        raise ApicError(
+            f"The input file uploaded before (file id: '{file_info['id']}') is not in the system anymore. "
+            f"It has been removed from the upload index; run the command again to upload the file.")
+
+    if upload_index is not None:
+        upload_index.record_job(file_info['id'], result)
+    return result
+
+
+def create_upload_index(user_credentials, app_config):
+    """
+    Creates the index of the uploaded files if it's enabled
+    :return: Upload index; None - it's not enabled
+    """
+    from api_client.upload_index import UploadIndex
+
+    if not get_config_item(app_config, 'upload_dedup_enabled', False):
+        return None
+
+    result = UploadIndex(
+        os.path.join(get_app_config_dir(), 'upload_index.sqlite'),
+        app_config['data_api_base_url'],
+        user_credentials.login)
+    return result
+
+
 def cmd_exec_analysis(current_dir, args, user_credentials, app_config):
+    from api_client.file_management_service_client import FileManagementServiceClient
+    from api_client.job_service_client import JobServiceClient
+    from api_client.project_service_client import ProjectServiceClient
+    from api_client.job_waiter import DEFAULT_MAX_CONCURRENT_POLLS
+
     # Get/resolve arguments
-    arg_analysis_id = args.analysis_id
+    arg_analysis_ids = resolve_analysis_ids(args)
     arg_error_files_dir = get_arg(args, 'output_path', default=current_dir)
     arg_no_wait = get_arg(args, 'no_wait', default=False)
+    arg_max_in_flight = get_arg(
+        args,
+        'max_in_flight',
+        default=get_config_item(app_config, 'max_in_flight_analysis_jobs', DEFAULT_MAX_IN_FLIGHT_ANALYSIS_JOBS))
+    arg_summary_file_path = get_arg(args, 'summary_file')
 
     # Get configuration parameters
-    sso_service_base_url = app_config['sso_service_base_url']
     data_api_base_url = app_config['data_api_base_url']
     impairment_studio_api_base_url = app_config['impairment_studio_api_base_url']
     default_job_wait_timeout = timedelta(minutes=app_config['default_job_wait_timeout_in_minutes'])
-    proxies = get_requests_proxies(app_config)
+    max_concurrent_job_polls = get_positive_int_config_item(
+        app_config,
+        'max_concurrent_job_polls',
+        DEFAULT_MAX_CONCURRENT_POLLS)
 
     # Run analysis in the scope of the authentication session
-    with Session(user_credentials.login, user_credentials.password, sso_service_base_url, proxies) as session:
+    with create_command_report('run-analysis', args, app_config) as command_report, \
+            create_session(user_credentials, app_config) as session:
+        command_report.session = session
+        step_timings = command_report.step_timings
         ps_client = ProjectServiceClient(session, impairment_studio_api_base_url)
         js_client = JobServiceClient(session, impairment_studio_api_base_url)
         fms_client = FileManagementServiceClient(session, data_api_base_url)
 
+        if len(arg_analysis_ids) > 1 or arg_summary_file_path:
+            # Run many analyses sharing the session, with a limited number of jobs in flight
+            analysis_batch_summary = run_analysis_batch(
+                ps_client,
+                js_client,
+                fms_client,
+                arg_analysis_ids,
+                arg_max_in_flight,
+                max_concurrent_job_polls,
+                default_job_wait_timeout,
+                arg_error_files_dir,
+                arg_no_wait,
+                step_timings=step_timings)
+            write_analysis_batch_summary(analysis_batch_summary, arg_summary_file_path)
+            validate_analysis_batch_summary(analysis_batch_summary)
+            return
+
+        arg_analysis_id = arg_analysis_ids[0]
         # Step 3.1: Schedule calculation job
-        analysis_job_id = ps_client.run_analysis(arg_analysis_id)
+        with step_timings.measure('analysis job submission'):
+            analysis_job_id = ps_client.run_analysis(arg_analysis_id)
+        analysis_job_submit_time = time.monotonic()
         logging.info(f"Analysis calculation (job id: '{analysis_job_id}') has started.")
 
         if arg_no_wait:
             return
 
         # Step 3.2: Wait until calculation is done
-        analysis_job_final_status = job_wait(
-            js_client,
-            analysis_job_id,
-            default_job_wait_timeout)
+        with step_timings.measure('analysis job wait'):
+            analysis_job_final_status = job_wait(
+                js_client,
+                analysis_job_id,
+                default_job_wait_timeout,
+                analysis_job_submit_time)
         # Step 3.1: Validate job status. If job failed, stop processing and log error.
-        validate_job(analysis_job_id, analysis_job_final_status, fms_client, arg_error_files_dir)
+        with step_timings.measure('analysis job validation'):
+            validate_job(analysis_job_id, analysis_job_final_status, fms_client, arg_error_files_dir)
         logging.info(f"Analysis calculation (job id: '{analysis_job_id}') has finished. ")
 
 
+def resolve_analysis_ids(args):
+    """
+    Resolves analysis ids from the command-line options and the file of analysis ids
+    :param args: Parsed command-line arguments
+    :return: Analysis ids without duplicates in the order they are specified
+    """
+    result = list(get_arg(args, 'analysis_id', default=[]))
+
+    analysis_ids_file_path = get_arg(args, 'analysis_ids_file')
+    if analysis_ids_file_path:
+        with open(analysis_ids_file_path, 'r') as analysis_ids_file:
+            for line in analysis_ids_file:
+                # One analysis id per line. Empty lines and comments are ignored
+                analysis_id = line.split('#', 1)[0].strip()
+                if analysis_id:
+                    result.append(analysis_id)
+
+    result = list(dict.fromkeys(result))
+    if not result:
+        raise ApicError("Analysis id is not specified. Use --analysis-id or --analysis-ids-file options.")
+
+    return result
+
+
+def run_analysis_batch(
+        ps_client,
+        js_client,
+        fms_client,
+        analysis_ids,
+        max_in_flight,
+        max_concurrent_job_polls,
+        wait_timeout: timedelta,
+        error_files_dir,
+        no_wait=False,
+        analysis_completed_callback=None,
+        step_timings=None):
+    """
+    Runs analyses keeping at most the given number of analysis jobs in flight and waits for them concurrently
+    :param ps_client: Project service client
+    :param js_client: Job service client
+    :param fms_client: File management service client for downloading error files
+    :param analysis_ids: Ids of the analyses to run
+    :param max_in_flight: Maximum number of analysis jobs in flight
+    :param max_concurrent_job_polls: Maximum number of job status requests in flight
+    :param wait_timeout: Wait time of every job on the client side
+    :param error_files_dir: Destination directory for error files on the client side
+    :param no_wait: True - submit all analyses and do not wait for their completion
+    :param analysis_completed_callback: Function called with analysis id, job id, job final status and summary item
+     as soon as an analysis job reaches terminal state. If set, it's responsible for downloading the error files.
+    :param step_timings: Step timings the submission and the wait of every analysis job are added to; None - not timed
+    :return: Summary of every analysis run: analysis id, job id, job status, duration and error file path
+    """
+    import requests
+    from api_client.job_waiter import JobWaitTimeoutError
+
+    job_waiter = js_client.create_job_waiter(
+        wait_timeout.total_seconds(),
+        max_concurrent_job_polls,
+        get_job_duration_history())
+    pending_analysis_ids = list(analysis_ids)
+    summary_items = {
+        analysis_id: {
+            'analysis_id': analysis_id,
+            'job_id': None,
+            'status': 'NOT_SUBMITTED',
+            'duration_in_seconds': None,
+            'error_file': None
+        } for analysis_id in analysis_ids}
+    job_submit_times = {}
+    job_analysis_ids = {}
+
+    def submit_pending_analyses():
+        while pending_analysis_ids and (no_wait or len(job_waiter) < max_in_flight):
+            analysis_id = pending_analysis_ids.pop(0)
+            summary_item = summary_items[analysis_id]
+            submission_begin_time = time.monotonic()
+            try:
+                job_id = ps_client.run_analysis(analysis_id)
+            except (requests.exceptions.RequestException, ApicError) as e:
+                logging.error(f"Analysis calculation (analysis id: '{analysis_id}') has not started: {e}")
+                summary_item['status'] = 'SUBMISSION_FAILED'
+                continue
+
+            logging.info(f"Analysis calculation (analysis id: '{analysis_id}'; job id: '{job_id}') has started.")
+            summary_item['job_id'] = job_id
+            summary_item['status'] = 'SUBMITTED'
+            job_submit_times[job_id] = time.monotonic()
+            job_analysis_ids[job_id] = analysis_id
+            if step_timings is not None:
+                step_timings.add(
+                    f"analysis job submission (analysis id: '{analysis_id}')",
+                    submission_begin_time,
+                    job_submit_times[job_id])
+            if not no_wait:
+                job_waiter.add(job_id, job_submit_times[job_id])
+
+    submit_pending_analyses()
+    if no_wait:
+        return list(summary_items.values())
+
+    for job_id, job_final_status, wait_error in job_waiter.iter_completed():
+        analysis_id = job_analysis_ids[job_id]
+        summary_item = summary_items[analysis_id]
+        if wait_error is not None:
+            # The wait of this job has failed or timed out; the other jobs are still awaited
+            summary_item['status'] = 'WAIT_TIMEOUT' if isinstance(wait_error, JobWaitTimeoutError) else 'WAIT_FAILED'
+            logging.error(
+                f"Waiting for the analysis calculation (analysis id: '{analysis_id}'; job id: '{job_id}') "
+                f"has failed. Error: {wait_error}")
+            submit_pending_analyses()
+            continue
+
+        summary_item['status'] = job_final_status['status']
+        summary_item['duration_in_seconds'] = round(time.monotonic() - job_submit_times[job_id], 1)
+        if step_timings is not None:
+            step_timings.add(
+                f"analysis job wait (analysis id: '{analysis_id}')",
+                job_submit_times[job_id],
+                time.monotonic())
+        if is_job_failed(job_final_status):
+            error_file_message = ''
+            if analysis_completed_callback is None:
+                # The other jobs are still awaited, a failed download must not abort the batch
+                try:
+                    error_file_path = download_error_file(job_id, job_final_status, fms_client, error_files_dir)
+                except (requests.exceptions.RequestException, OSError) as e:
+                    error_file_message = f" The error file has not been downloaded: {e}"
+                else:
+                    summary_item['error_file'] = os.path.abspath(error_file_path)
+                    error_file_message = f" The errors are in the file '{summary_item['error_file']}'."
+            logging.error(
+                f"Analysis calculation (analysis id: '{analysis_id}'; job id: '{job_id}') "
+                f"stopped by error with status '{job_final_status['status']}'.{error_file_message}")
+        else:
+            logging.info(
+                f"Analysis calculation (analysis id: '{analysis_id}'; job id: '{job_id}') has finished.")
+
+        if analysis_completed_callback:
+            analysis_completed_callback(analysis_id, job_id, job_final_status, summary_item)
+
+        # A job has left the flight, submit the next analysis
+        submit_pending_analyses()
+
+    return list(summary_items.values())
+
+
+def write_analysis_batch_summary(analysis_batch_summary, summary_file_path=None):
+    summary_text = json.dumps(analysis_batch_summary, indent=2)
+    if summary_file_path:
+        with open(summary_file_path, 'w') as summary_file:
+            summary_file.write(summary_text)
+        logging.info(f"Analysis run summary has been written to the file '{os.path.abspath(summary_file_path)}'.")
+    else:
+        print(summary_text)
+
+
+def validate_analysis_batch_summary(analysis_batch_summary):
+    failed_summary_items = [
+        summary_item for summary_item in analysis_batch_summary
+        if summary_item['status'] in ['NOT_SUBMITTED', 'SUBMISSION_FAILED', 'WAIT_TIMEOUT', 'WAIT_FAILED']
+        or is_job_failed(summary_item)]
+    if failed_summary_items:
+        raise ApicError(
+            f"{len(failed_summary_items)} of {len(analysis_batch_summary)} analysis runs have not completed "
+            f"successfully. Analysis ids: {', '.join(item['analysis_id'] for item in failed_summary_items)}.")
+
+
 def cmd_exec_download_results(current_dir, args, user_credentials, app_config):
+    from api_client.file_management_service_client import FileManagementServiceClient
+
     # Get/resolve arguments
     arg_analysis_id = args.analysis_id
     arg_output_dir = get_arg(args, 'output_path', default=current_dir)
+    arg_extract = get_arg(args, 'extract', default=False)
 
     # Get configuration parameters
-    sso_service_base_url = app_config['sso_service_base_url']
     data_api_base_url = app_config['data_api_base_url']
-    proxies = get_requests_proxies(app_config)
+    download_segment_count = get_arg(
+        args,
+        'segments',
+        default=get_config_item(app_config, 'download_segment_count', DEFAULT_DOWNLOAD_SEGMENT_COUNT))
+    results_cache = create_results_cache(app_config)
 
     # Run download results in the scope of the authentication session
-    with Session(user_credentials.login, user_credentials.password, sso_service_base_url, proxies) as session:
+    with create_command_report('download-results', args, app_config) as command_report, \
+            create_session(user_credentials, app_config) as session:
+        command_report.session = session
+        step_timings = command_report.step_timings
         fms_client = FileManagementServiceClient(session, data_api_base_url)
 
         # Step 4: Download results
         logging.info(f"Downloading analysis results to the folder '{arg_output_dir}' has started.")
         destination_results_file_name = f"analysis_{arg_analysis_id}_results.zip"
         destination_results_file_path = os.path.join(arg_output_dir, destination_results_file_name)
-        fms_client.download_analysis_result_file(arg_analysis_id, destination_results_file_path)
+        with step_timings.measure('results download'):
+            if results_cache is None and arg_extract:
+                # The file is extracted from the bytes downloaded in order, so it's downloaded as a single stream
+                download_and_extract_zip_file(
+                    lambda chunk_consumer: fms_client.download_analysis_result_file(
+                        arg_analysis_id,
+                        destination_results_file_path,
+                        chunk_consumer=chunk_consumer),
+                    destination_results_file_path)
+            elif results_cache is None:
+                fms_client.download_analysis_result_file(
+                    arg_analysis_id,
+                    destination_results_file_path,
+                    download_segment_count)
+            else:
+                download_results_file_through_cache(
+                    fms_client,
+                    results_cache,
+                    arg_analysis_id,
+                    destination_results_file_path,
+                    download_segment_count)
+                if arg_extract:
+                    # Cached files are not downloaded, they are extracted from the disk
+                    download_and_extract_zip_file(None, destination_results_file_path)
         logging.info(
             f"Downloading analysis results to the file '{destination_results_file_path}' "
             f"in the folder '{arg_output_dir}' has finished.")
         logging.info(f"Analysis run (analysis id: '{arg_analysis_id}') has finished.")
 
 
+def download_results_file_through_cache(
+        fms_client,
+        results_cache,
+        analysis_id,
+        destination_results_file_path,
+        download_segment_count):
+    """
+    Copies the analysis results file from the cache if it has not changed, otherwise downloads it to the cache first
+    :param fms_client: File management service client
+    :param results_cache: Results cache
+    :param analysis_id: Analysis id
+    :param destination_results_file_path: Destination file path
+    :param download_segment_count: Number of byte ranges downloaded at once
+    """
+    with results_cache.lock(analysis_id):
+        validators = fms_client.download_analysis_result_file_if_modified(
+            analysis_id,
+            results_cache.get_download_file_path(analysis_id),
+            results_cache.get_validators(analysis_id),
+            download_segment_count)
+        if validators is None:
+            results_cache.record_hit(analysis_id)
+            logging.info(f"Analysis results (analysis id: '{analysis_id}') have not changed; the cached file is used.")
+        else:
+            results_cache.store(analysis_id, validators)
+        results_cache.copy_to(analysis_id, destination_results_file_path)
+
+    logging.debug(f"Results cache: {results_cache.get_stats()}")
+
+
+def create_results_cache(app_config):
+    """
+    Creates the analysis results cache if it's enabled
+    :return: Results cache; None - it's not enabled
+    """
+    from api_client.results_cache import ResultsCache
+    from api_client.results_cache import DEFAULT_MAX_SIZE_IN_MEGABYTES
+
+    if not get_config_item(app_config, 'results_cache_enabled', False):
+        return None
+
+    result = ResultsCache(
+        os.path.join(get_app_config_dir(), 'results_cache'),
+        app_config['data_api_base_url'],
+        get_config_item(app_config, 'results_cache_max_size_in_megabytes', DEFAULT_MAX_SIZE_IN_MEGABYTES) * 1024 * 1024)
+    return result
+
+
+def cmd_exec_wait(current_dir, args, user_credentials, app_config):
+    from api_client.file_management_service_client import FileManagementServiceClient
+    from api_client.job_service_client import JobServiceClient
+    from api_client.job_waiter import DEFAULT_MAX_CONCURRENT_POLLS
+
+    # Get/resolve arguments
+    arg_job_ids = args.job_id
+    arg_error_files_dir = get_arg(args, 'output_path', default=current_dir)
+
+    # Get configuration parameters
+    data_api_base_url = app_config['data_api_base_url']
+    impairment_studio_api_base_url = app_config['impairment_studio_api_base_url']
+    default_job_wait_timeout = timedelta(minutes=app_config['default_job_wait_timeout_in_minutes'])
+    max_concurrent_job_polls = get_positive_int_config_item(
+        app_config,
+        'max_concurrent_job_polls',
+        DEFAULT_MAX_CONCURRENT_POLLS)
+
+    # Wait for the jobs in the scope of the authentication session
+    with create_session(user_credentials, app_config) as session:
+        js_client = JobServiceClient(session, impairment_studio_api_base_url)
+        fms_client = FileManagementServiceClient(session, data_api_base_url)
+
+        logging.info(f"Waiting for {len(set(arg_job_ids))} jobs has started.")
+        failed_job_errors = []
+        for job_id, job_final_status, wait_error in js_client.wait_jobs(
+                arg_job_ids,
+                default_job_wait_timeout.total_seconds(),
+                max_concurrent_job_polls):
+            # Validate every job on its own, so a failed job or wait does not stop waiting for the others
+            if wait_error is not None:
+                error_message = f"Waiting for the job (job id: '{job_id}') has failed. Error: {wait_error}"
+                logging.error(error_message)
+                failed_job_errors.append(error_message)
+                continue
+            try:
+                validate_job(job_id, job_final_status, fms_client, arg_error_files_dir)
+                logging.info(
+                    f"The job (job id: '{job_id}') has finished with status '{job_final_status['status']}'.")
+            except ApicError as e:
+                logging.error(e.args[0])
+                failed_job_errors.append(e.args[0])
+
+        if failed_job_errors:
+            raise ApicError(f"{len(failed_job_errors)} of {len(set(arg_job_ids))} jobs have failed.")
+        logging.info(f"Waiting for {len(set(arg_job_ids))} jobs has finished.")
+
+
+def cmd_exec_pipeline(current_dir, args, user_credentials, app_config):
+    from api_client.file_management_service_client import FileManagementServiceClient
+    from api_client.dictionary_service_client import DictionaryServiceClient
+    from api_client.job_service_client import JobServiceClient
+    from api_client.project_service_client import ProjectServiceClient
+    from api_client.job_waiter import DEFAULT_MAX_CONCURRENT_POLLS
+
+    # Get/resolve arguments
+    arg_input_zip_file_path = args.input_zip
+    arg_analysis_ids = resolve_analysis_ids(args)
+    arg_overwrite = get_arg(args, 'overwrite', default=False)
+    arg_job_name = get_arg(args, 'job_name', default='FileUpload')
+    arg_output_dir = get_arg(args, 'output_path', default=current_dir)
+    arg_chunked_upload = get_arg(
+        args,
+        'chunked_upload',
+        default=get_config_item(app_config, 'chunked_upload_enabled', False))
+    arg_force_upload = get_arg(args, 'force_upload', default=False)
+    arg_max_in_flight = get_arg(
+        args,
+        'max_in_flight',
+        default=get_config_item(app_config, 'max_in_flight_analysis_jobs', DEFAULT_MAX_IN_FLIGHT_ANALYSIS_JOBS))
+    arg_summary_file_path = get_arg(args, 'summary_file')
+    download_segment_count = get_arg(
+        args,
+        'segments',
+        default=get_config_item(app_config, 'download_segment_count', DEFAULT_DOWNLOAD_SEGMENT_COUNT))
+
+    # Get configuration parameters
+    data_api_base_url = app_config['data_api_base_url']
+    impairment_studio_api_base_url = app_config['impairment_studio_api_base_url']
+    default_job_wait_timeout = timedelta(minutes=app_config['default_job_wait_timeout_in_minutes'])
+    upload_part_size = get_config_item(
+        app_config,
+        'upload_part_size_in_megabytes',
+        DEFAULT_UPLOAD_PART_SIZE_IN_MEGABYTES) * 1024 * 1024
+    upload_parallel_parts = get_config_item(app_config, 'upload_parallel_parts', DEFAULT_UPLOAD_PARALLEL_PARTS)
+    max_concurrent_job_polls = get_positive_int_config_item(
+        app_config,
+        'max_concurrent_job_polls',
+        DEFAULT_MAX_CONCURRENT_POLLS)
+    upload_index = create_upload_index(user_credentials, app_config)
+
+    pipeline_errors = []
+    background_downloads = []
+
+    # Run the whole chain in the scope of one authentication session and connection pool
+    with create_command_report('pipeline', args, app_config) as command_report, \
+            create_session(user_credentials, app_config) as session, \
+            ThreadPoolExecutor(max_workers=PIPELINE_DOWNLOAD_WORKERS) as download_executor:
+        command_report.session = session
+        step_timings = command_report.step_timings
+        fms_client = FileManagementServiceClient(session, data_api_base_url)
+        ds_client = DictionaryServiceClient(session, data_api_base_url)
+        js_client = JobServiceClient(session, impairment_studio_api_base_url)
+        ps_client = ProjectServiceClient(session, impairment_studio_api_base_url)
+
+        def download_error_file_in_background(job_id, job_final_status, summary_item=None):
+            def download():
+                with step_timings.measure(f"error file download (job id: '{job_id}')"):
+                    error_file_path = download_error_file(job_id, job_final_status, fms_client, arg_output_dir)
+                error_file_abs_path = os.path.abspath(error_file_path)
+                if summary_item is not None:
+                    summary_item['error_file'] = error_file_abs_path
+                logging.info(f"The errors of the job (job id: '{job_id}') are in the file '{error_file_abs_path}'.")
+
+            background_downloads.append(download_executor.submit(download))
+
+        def download_results_in_background(analysis_id, summary_item):
+            def download():
+                results_file_path = os.path.join(arg_output_dir, f"analysis_{analysis_id}_results.zip")
+                with step_timings.measure(f"results download (analysis id: '{analysis_id}')"):
+                    fms_client.download_analysis_result_file(analysis_id, results_file_path, download_segment_count)
+                summary_item['results_file'] = os.path.abspath(results_file_path)
+                logging.info(
+                    f"Downloading analysis results to the file '{summary_item['results_file']}' has finished.")
+
+            background_downloads.append(download_executor.submit(download))
+
+        def handle_completed_analysis(analysis_id, job_id, job_final_status, summary_item):
+            analysis_end_time = time.monotonic()
+            step_timings.add(
+                f"analysis (analysis id: '{analysis_id}')",
+                analysis_end_time - summary_item['duration_in_seconds'],
+                analysis_end_time)
+            # Start downloading as soon as the analysis job is terminal, while other analyses are running
+            if is_job_failed(job_final_status):
+                download_error_file_in_background(job_id, job_final_status, summary_item)
+            else:
+                download_results_in_background(analysis_id, summary_item)
+
+        # Step 1: Upload ZIP file with inputs to the system's raw files location
+        with step_timings.measure('import upload'):
+            file_info = upload_input_file(
+                fms_client,
+                arg_input_zip_file_path,
+                arg_chunked_upload,
+                upload_part_size,
+                upload_parallel_parts,
+                upload_index,
+                arg_force_upload)
+
+        # Step 2: Move files from raw files location to processing location
+        with step_timings.measure('import job'):
+            import_job_id = schedule_import_job(ds_client, file_info, arg_job_name, arg_overwrite, upload_index)
+            import_job_submit_time = time.monotonic()
+            logging.info(
+                f"Moving input file '{file_info['filename']}' from raw files location "
+                f"to the processing location has started (job id: '{import_job_id}').")
+            import_job_final_status = job_wait(
+                js_client,
+                import_job_id,
+                default_job_wait_timeout,
+                import_job_submit_time)
+
+        if import_job_final_status['status'] == 'FAILED':
+            # Nothing to analyse. Stop processing and log error.
+            validate_job(import_job_id, import_job_final_status, fms_client, arg_output_dir)
+        if is_job_failed(import_job_final_status):
+            # Some records have not been imported. Analyses run on the imported ones while the errors are downloaded.
+            download_error_file_in_background(import_job_id, import_job_final_status)
+            pipeline_errors.append(
+                f"The job 'job type: {import_job_final_status['type']}; job id: {import_job_id}' "
+                f"finished with status '{import_job_final_status['status']}'.")
+            logging.warning(pipeline_errors[-1])
+        else:
+            logging.info(
+                f"Moving input file '{file_info['filename']}' from raw files location "
+                f"to the processing location has finished (job id: '{import_job_id}').")
+
+        # Step 3: Run analyses and download the results of every analysis as soon as it's finished
+        analysis_batch_summary = run_analysis_batch(
+            ps_client,
+            js_client,
+            fms_client,
+            arg_analysis_ids,
+            arg_max_in_flight,
+            max_concurrent_job_polls,
+            default_job_wait_timeout,
+            arg_output_dir,
+            analysis_completed_callback=handle_completed_analysis)
+
+        # Step 4: Wait for the background downloads
+        for background_download in background_downloads:
+            try:
+                background_download.result()
+            except Exception as e:
+                pipeline_errors.append(f"Download has failed: {e}")
+                logging.error(pipeline_errors[-1])
+
+        # The outcome is decided in the scope of the run report, so a failed pipeline is reported as failed
+        step_timings.log_breakdown('Pipeline')
+
+        if arg_summary_file_path:
+            write_analysis_batch_summary(analysis_batch_summary, arg_summary_file_path)
+        if pipeline_errors:
+            raise ApicError(' '.join(pipeline_errors))
+        validate_analysis_batch_summary(analysis_batch_summary)
+
+
+class StepTimings(object):
+    """
+    Durations of the steps of a command which may run concurrently
+    """
+    def __init__(self):
+        self.begin_time = time.monotonic()
+        self.steps = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def measure(self, step_name):
+        step_begin_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(step_name, step_begin_time, time.monotonic())
+
+    def add(self, step_name, step_begin_time, step_end_time):
+        with self.lock:
+            self.steps.append((step_name, step_begin_time, step_end_time))
+
+    def get_steps(self):
+        """
+        :return: Steps in the order they have started with their start time relative to the command start and duration
+        """
+        with self.lock:
+            steps = sorted(self.steps, key=lambda step: step[1])
+
+        result = [
+            {
+                'name': step_name,
+                'started_at_in_seconds': round(step_begin_time - self.begin_time, 3),
+                'duration_in_seconds': round(step_end_time - step_begin_time, 3)
+            } for step_name, step_begin_time, step_end_time in steps]
+        return result
+
+    def log_breakdown(self, command_name):
+        wall_clock_duration = time.monotonic() - self.begin_time
+        steps_duration = 0
+        for step_name, step_begin_time, step_end_time in sorted(self.steps, key=lambda step: step[1]):
+            steps_duration += step_end_time - step_begin_time
+            logging.info(
+                f"{command_name} step '{step_name}' took {step_end_time - step_begin_time:.1f} s "
+                f"(started at {step_begin_time - self.begin_time:.1f} s).")
+
+        logging.info(
+            f"{command_name} has finished in {wall_clock_duration:.1f} s. "
+            f"Its steps took {steps_duration:.1f} s in total; "
+            f"running them concurrently has saved {max(steps_duration - wall_clock_duration, 0):.1f} s.")
+
+
+class CommandReport(object):
+    """
+    Step timings of a command and the request metrics of its session. When the command finishes or fails,
+    they are written to the JSON report file and to the Prometheus textfile in the metrics folder, if requested.
+    In the daemon and the watch mode the session is shared, so its request metrics cover all commands which used it.
+    """
+    def __init__(self, command_name, report_file_path=None, metrics_textfile_dir=None):
+        """
+        :param command_name: Command name, e.g. 'import'
+        :param report_file_path: Path of the JSON report file; None - the report is not written
+        :param metrics_textfile_dir: Folder of the Prometheus textfile collector; None - the metrics are not written
+        """
+        self.command_name = command_name
+        self.report_file_path = report_file_path
+        self.metrics_textfile_dir = metrics_textfile_dir
+
+        self.step_timings = StepTimings()
+        self.started_at = time.time()
+        self.duration_in_seconds = None
+        self.error = None
+        # Session whose request metrics are reported; None - the command has not opened it
+        self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.duration_in_seconds = time.monotonic() - self.step_timings.begin_time
+        if exception_type is not None:
+            self.error = str(exception) or exception_type.__name__
+
+        try:
+            if self.report_file_path:
+                with open(self.report_file_path, 'w') as report_file:
+                    json.dump(self.get_report(), report_file, indent=2)
+                logging.info(f"Run report has been written to the file '{os.path.abspath(self.report_file_path)}'.")
+            if self.metrics_textfile_dir:
+                self.write_metrics_textfile()
+        except OSError as e:
+            # The command's own result is not replaced by the failure to report it
+            logging.warning(f"Run report has not been written. Error: {e}")
+
+    def get_report(self):
+        result = {
+            'command': self.command_name,
+            'status': 'failed' if self.error is not None else 'succeeded',
+            'error': self.error,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            'duration_in_seconds': round(self.duration_in_seconds, 3),
+            'steps': self.step_timings.get_steps(),
+            'requests': self.session.transport.metrics.get_stats() if self.session is not None else {}
+        }
+        return result
+
+    def write_metrics_textfile(self):
+        from api_client.metrics import format_metric_header
+        from api_client.metrics import format_sample
+        from api_client.metrics import write_prometheus_textfile
+
+        labels = {'command': self.command_name}
+        lines = format_metric_header('apic_command_success', 'gauge', 'Whether the last run has succeeded')
+        lines.append(format_sample('apic_command_success', labels, int(self.error is None)))
+        lines += format_metric_header('apic_command_last_run_timestamp_seconds', 'gauge', 'Start time of the last run')
+        lines.append(format_sample('apic_command_last_run_timestamp_seconds', labels, round(self.started_at, 3)))
+        lines += format_metric_header('apic_command_duration_seconds', 'gauge', 'Duration of the last run')
+        lines.append(format_sample('apic_command_duration_seconds', labels, round(self.duration_in_seconds, 3)))
+        lines += format_metric_header('apic_step_duration_seconds', 'gauge', 'Duration of the steps of the last run')
+        # A series appears once in the file, so the durations of the steps with the same name are added up
+        step_durations = {}
+        for step in self.step_timings.get_steps():
+            step_durations[step['name']] = step_durations.get(step['name'], 0) + step['duration_in_seconds']
+        for step_name, step_duration in step_durations.items():
+            lines.append(format_sample(
+                'apic_step_duration_seconds', dict(labels, step=step_name), round(step_duration, 3)))
+        if self.session is not None:
+            lines += self.session.transport.metrics.format_prometheus(labels)
+
+        os.makedirs(self.metrics_textfile_dir, exist_ok=True)
+        write_prometheus_textfile(
+            os.path.join(self.metrics_textfile_dir, f"apic_{self.command_name.replace('-', '_')}.prom"),
+            lines)
+
+
+def create_command_report(command_name, args, app_config):
+    result = CommandReport(
+        command_name,
+        get_arg(args, 'report_json'),
+        get_config_item(app_config, 'metrics_textfile_dir'))
+    return result
+
+
+def cmd_exec_serve(current_dir, args, user_credentials, app_config):
+    from api_client.daemon import DaemonServer
+    from api_client.daemon import DaemonClient
+    from api_client.daemon import DaemonError
+    from api_client.daemon import ThreadOutputRouter
+    from api_client.daemon import is_daemon_supported
+
+    global shared_sessions
+
+    if not is_daemon_supported():
+        raise ApicError("The daemon requires Unix domain sockets, which are not supported on this platform.")
+
+    socket_path = get_daemon_socket_path()
+
+    if get_arg(args, 'status') or get_arg(args, 'stop'):
+        daemon_client = DaemonClient(socket_path)
+        if not daemon_client.is_running():
+            raise ApicError(f"Daemon is not running on the socket '{socket_path}'.")
+        for message in daemon_client.send({'type': 'status' if get_arg(args, 'status') else 'stop'}):
+            if 'status' in message:
+                print(json.dumps(message['status'], indent=2))
+        if get_arg(args, 'stop'):
+            logging.info(f"Daemon on the socket '{socket_path}' has been stopped.")
+        return
+
+    output_router = ThreadOutputRouter()
+
+    def handle_daemon_request(request, send_message):
+        request_args = SimpleNamespace(**request['args'])
+        is_command_name = get_arg(request_args, 'is_command_name')
+        if request['type'] not in DAEMON_COMMAND_NAMES or is_command_name != request['type']:
+            # The other commands take over the daemon's sessions or its console
+            send_message({'error': f"Command '{is_command_name}' cannot be run by the daemon."})
+            return 1
+
+        with output_router.route(send_message):
+            if get_arg(request_args, 'debug'):
+                # The log level is shared by all requests the daemon is running
+                logging.warning("Debug logging is not enabled by the daemon. Run the command with --no-daemon.")
+                request_args.debug = False
+            result = execute_command(request['current_dir'], request_args)
+        return result
+
+    shared_sessions = SharedSessions()
+    daemon_server = DaemonServer(
+        socket_path,
+        handle_daemon_request,
+        lambda: {'sessions': len(shared_sessions)})
+    output_router.install()
+    try:
+        daemon_server.serve_forever()
+    except DaemonError as e:
+        raise ApicError(e.args[0])
+    except KeyboardInterrupt:
+        logging.info("Daemon is stopping.")
+    finally:
+        output_router.uninstall()
+        shared_sessions.close()
+        shared_sessions = None
+
+
+class SharedSessions(object):
+    """
+    Authentication sessions with their connection pools kept open between the commands
+    run by the daemon or the watch mode
+    """
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_credentials, app_config):
+        """
+        Gets the session of the credentials and configuration, it's opened by the first request using them
+        """
+        import hashlib
+
+        session_key = hashlib.sha256(json.dumps(
+            [user_credentials.login, user_credentials.password, app_config],
+            sort_keys=True,
+            default=str).encode('utf-8')).hexdigest()
+
+        with self.lock:
+            result = self.sessions.get(session_key)
+            if result is None:
+                result = self.sessions[session_key] = create_new_session(user_credentials, app_config)
+                logging.info(f"Shared session has been opened for user '{user_credentials.login}'.")
+
+        return result
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                logging.warning(f"Shared session has not been closed. Error: {e}")
+
+
+def forward_to_daemon(current_dir, args):
+    """
+    Runs the command in the 'serve' daemon if it's running
+    :param current_dir: Current, application's directory
+    :param args: Parsed command-line arguments
+    :return: Exit code of the command; None - daemon is not running, the command has to be run by this process
+    """
+    from api_client.daemon import DaemonClient
+
+    daemon_client = DaemonClient(get_daemon_socket_path())
+    if not os.path.exists(daemon_client.socket_path):
+        return None
+
+    request_args = dict(args.__dict__)
+    for arg_name in DAEMON_PATH_ARG_NAMES:
+        if request_args.get(arg_name):
+            request_args[arg_name] = os.path.abspath(request_args[arg_name])
+    # The daemon does not see this process' environment variables
+    request_args['login'] = get_arg(args, 'login', default=os.environ.get(LOGIN_ENV_VAR_NAME))
+    request_args['password'] = get_arg(args, 'password', default=os.environ.get(PASSWORD_ENV_VAR_NAME))
+
+    try:
+        messages = daemon_client.send({
+            'type': args.is_command_name,
+            'args': request_args,
+            'current_dir': os.path.abspath(current_dir)})
+    except OSError:
+        # The socket file is left behind by a daemon which has not been shut down
+        return None
+
+    logging.debug(f"Command is forwarded to the daemon on the socket '{daemon_client.socket_path}'.")
+    try:
+        for message in messages:
+            if 'log' in message:
+                logging.log(message['log']['level'], message['log']['message'])
+            if 'output' in message:
+                sys.stdout.write(message['output'])
+            if 'error' in message:
+                logging.error(f"Daemon has failed to run the command. Error: {message['error']}")
+            if 'exit_code' in message:
+                return message['exit_code']
+    except OSError as e:
+        print(f"Connection to the daemon has been lost. Error: {e}")
+        return 1
+
+    print("Connection to the daemon has been closed before the command has finished.")
+    return 1
+
+
+def get_daemon_socket_path():
+    result = os.environ.get(DAEMON_SOCKET_ENV_VAR_NAME) or os.path.join(os.path.expanduser('~'), '.ma', 'apic.sock')
+    return result
+
+
+def cmd_exec_watch(current_dir, args, user_credentials, app_config):
+    from concurrent.futures import wait
+    from concurrent.futures import FIRST_COMPLETED
+    from api_client.folder_watch import FolderWatch
+    from api_client.folder_watch import DEFAULT_STABLE_TIME_IN_SECONDS
+
+    global shared_sessions
+
+    # Get/resolve arguments
+    arg_input_dir = args.input_dir
+    arg_processed_dir = get_arg(args, 'processed_dir', default=os.path.join(arg_input_dir, 'processed'))
+    arg_failed_dir = get_arg(args, 'failed_dir', default=os.path.join(arg_input_dir, 'failed'))
+    arg_max_uploads = get_arg(
+        args,
+        'max_uploads',
+        default=get_config_item(app_config, 'watch_max_concurrent_uploads', DEFAULT_WATCH_MAX_CONCURRENT_UPLOADS))
+    arg_max_import_jobs = get_arg(
+        args,
+        'max_import_jobs',
+        default=get_config_item(
+            app_config,
+            'watch_max_concurrent_import_jobs',
+            DEFAULT_WATCH_MAX_CONCURRENT_IMPORT_JOBS))
+    arg_once = get_arg(args, 'once', default=False)
+
+    # Get configuration parameters
+    poll_interval = get_config_item(
+        app_config, 'watch_poll_interval_in_seconds', DEFAULT_WATCH_POLL_INTERVAL_IN_SECONDS)
+    stable_time = get_config_item(app_config, 'watch_stable_time_in_seconds', DEFAULT_STABLE_TIME_IN_SECONDS)
+    require_marker = get_config_item(app_config, 'watch_require_marker', False)
+
+    if not os.path.isdir(arg_input_dir):
+        raise ApicError(f"The watched folder '{arg_input_dir}' does not exist.")
+    os.makedirs(arg_processed_dir, exist_ok=True)
+    os.makedirs(arg_failed_dir, exist_ok=True)
+
+    folder_watch = FolderWatch(arg_input_dir, stable_time_in_seconds=stable_time, require_marker=require_marker)
+    import_slots = SimpleNamespace(upload=ConcurrencySlot(arg_max_uploads), job=ConcurrencySlot(arg_max_import_jobs))
+    watch_stats = WatchStats()
+    imports = {}
+
+    def import_file(file_path):
+        import_args = SimpleNamespace(
+            input_zip=file_path,
+            output_path=arg_failed_dir,
+            job_name=get_arg(args, 'job_name'),
+            overwrite=get_arg(args, 'overwrite', default=False),
+            chunked_upload=get_arg(args, 'chunked_upload'),
+            force_upload=get_arg(args, 'force_upload', default=False))
+        cmd_exec_import(current_dir, import_args, user_credentials, app_config, import_slots)
+
+    def complete_import(future):
+        file_path, file_size = imports.pop(future)
+        error = future.exception()
+        if error is None:
+            moved_file_path = move_to_dir(file_path, arg_processed_dir)
+            logging.info(f"Input file '{file_path}' has been imported and moved to '{moved_file_path}'.")
+        else:
+            # The error zip of a failed job is already downloaded to the failed files folder
+            moved_file_path = move_to_dir(file_path, arg_failed_dir)
+            with open(f'{moved_file_path}.error.txt', 'w') as error_file:
+                error_file.write(f'{error}\n')
+            logging.error(f"Input file '{file_path}' has failed to import and moved to '{moved_file_path}'. "
+                          f"Error: {error}")
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(folder_watch.get_marker_file_path(file_path))
+        watch_stats.add(file_size, error is None)
+
+    def log_progress():
+        logging.info(
+            f"Watch: {watch_stats.processed_count} imported, {watch_stats.failed_count} failed; "
+            f"queue: {len(imports) - import_slots.upload.active_count - import_slots.job.active_count} waiting, "
+            f"{import_slots.upload.active_count} uploading, {import_slots.job.active_count} import jobs, "
+            f"{folder_watch.get_unready_file_count()} being written; "
+            f"throughput: {watch_stats.get_files_per_minute():.1f} files/min, "
+            f"{watch_stats.get_megabytes_per_minute():.1f} MB/min.")
+
+    logging.info(f"Watching the folder '{os.path.abspath(arg_input_dir)}' for input zip files.")
+    shared_sessions = SharedSessions()
+    import_executor = ThreadPoolExecutor(max_workers=arg_max_uploads + arg_max_import_jobs)
+    last_progress_log_time = time.monotonic()
+    try:
+        while True:
+            for file_path in folder_watch.poll():
+                imports[import_executor.submit(import_file, file_path)] = (file_path, os.path.getsize(file_path))
+                logging.info(f"Input file '{file_path}' has been queued for importing.")
+
+            if imports:
+                completed_imports, _ = wait(list(imports), timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in completed_imports:
+                    complete_import(future)
+                progress_log_due_time = last_progress_log_time + WATCH_PROGRESS_LOG_INTERVAL_IN_SECONDS
+                if completed_imports or time.monotonic() >= progress_log_due_time:
+                    log_progress()
+                    last_progress_log_time = time.monotonic()
+            elif arg_once and not folder_watch.get_unready_file_count():
+                break
+            else:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logging.info("Watching is stopping; the imports which have started are being finished.")
+        for future in imports:
+            future.cancel()
+    finally:
+        import_executor.shutdown(wait=True)
+        shared_sessions.close()
+        shared_sessions = None
+
+    if watch_stats.failed_count:
+        raise ApicError(
+            f"{watch_stats.failed_count} of {watch_stats.processed_count + watch_stats.failed_count} input files "
+            f"have failed to import. They are in the folder '{os.path.abspath(arg_failed_dir)}'.")
+
+
+class ConcurrencySlot(object):
+    """
+    Bounds the number of threads running a step at once and counts the threads running it
+    """
+    def __init__(self, limit):
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock()
+        self.active_count = 0
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        with self.lock:
+            self.active_count += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self.lock:
+            self.active_count -= 1
+        self.semaphore.release()
+
+
+class WatchStats(object):
+    """
+    Counts and throughput of the input files imported by the watch mode
+    """
+    def __init__(self):
+        self.begin_time = time.monotonic()
+        self.processed_count = 0
+        self.failed_count = 0
+        self.byte_count = 0
+
+    def add(self, file_size, is_processed):
+        if is_processed:
+            self.processed_count += 1
+        else:
+            self.failed_count += 1
+        self.byte_count += file_size
+
+    def get_files_per_minute(self):
+        result = (self.processed_count + self.failed_count) * 60 / max(time.monotonic() - self.begin_time, 1)
+        return result
+
+    def get_megabytes_per_minute(self):
+        result = self.byte_count / (1024 * 1024) * 60 / max(time.monotonic() - self.begin_time, 1)
+        return result
+
+
+def move_to_dir(file_path, dir_path):
+    """
+    Moves the file to the directory, keeping the file there with the same name
+    :return: Path of the moved file
+    """
+    file_name = os.path.basename(file_path)
+    result = os.path.join(dir_path, file_name)
+    if os.path.exists(result):
+        file_name_root, file_name_ext = os.path.splitext(file_name)
+        result = os.path.join(dir_path, f"{file_name_root}_{time.strftime('%Y%m%d%H%M%S')}{file_name_ext}")
+    shutil.move(file_path, result)
+
+    return result
+
+
 def cmd_exec_configure(user_credentials):
     save_to_file_flag = False
     if user_credentials.login:
@@ -433,39 +1789,171 @@ def update_credentials_file(user_credentials):
 
 
 def cmn_opt_exec_test_connect(current_dir, args, user_credentials, app_config):
+    from api_client import security
+    from api_client import file_management_service_client
+    from api_client import dictionary_service_client
+    from api_client import project_service_client
+    from api_client import job_service_client
+    from api_client.connectivity_probe import ConnectivityProbe
+    from api_client.connectivity_probe import run_probes
+
+    # Get/resolve arguments
+    arg_repeat = get_arg(args, 'repeat', default=1)
+    arg_json = get_arg(args, 'json', default=False)
+
     logging.info(f"Connectivity to the services test has started")
     # Get configuration parameters
     sso_service_base_url = app_config['sso_service_base_url']
     data_api_base_url = app_config['data_api_base_url']
     impairment_studio_api_base_url = app_config['impairment_studio_api_base_url']
-    default_job_wait_timeout = timedelta(minutes=app_config['default_job_wait_timeout_in_minutes'])
     proxies = get_requests_proxies(app_config)
 
-    # Run connectivity test in the scope of the authentication session
-    test_result = True
-    with Session(user_credentials.login, user_credentials.password, sso_service_base_url, proxies) as session:
-        test_result = session.ping() and test_result
+    # Ping endpoints do not need authentication. Probe them all at once over new connections.
+    services = [
+        ('Single Sing-On (SSO)', sso_service_base_url, security.PING_URL_PATH),
+        ('File Management', data_api_base_url, file_management_service_client.PING_URL_PATH),
+        ('Dictionary', data_api_base_url, dictionary_service_client.PING_URL_PATH),
+        ('Project', impairment_studio_api_base_url, project_service_client.PING_URL_PATH),
+        ('Job', impairment_studio_api_base_url, job_service_client.PING_URL_PATH),
+    ]
+    probes = [
+        ConnectivityProbe(service_name, urllib.parse.urljoin(service_base_url, ping_url_path), proxies)
+        for service_name, service_base_url, ping_url_path in services]
+
+    test_begin_time = time.perf_counter()
+    probe_reports = run_probes(probes, arg_repeat)
+    test_duration = time.perf_counter() - test_begin_time
+
+    for probe_report in probe_reports:
+        log_connectivity_probe_report(probe_report)
+
+    test_result = all(probe_report['passed'] for probe_report in probe_reports)
+    if test_result:
+        logging.info(f"Connectivity to the services test - PASSED in {test_duration * 1000:.0f} ms")
+    else:
+        logging.error(f"Connectivity to the services test - FAILED in {test_duration * 1000:.0f} ms")
 
-        fms_client = FileManagementServiceClient(session, data_api_base_url)
-        ds_client = DictionaryServiceClient(session, data_api_base_url)
-        ps_client = ProjectServiceClient(session, impairment_studio_api_base_url)
-        js_client = JobServiceClient(session, impairment_studio_api_base_url)
+    if arg_json:
+        connectivity_report = {
+            'passed': test_result,
+            'duration_in_ms': round(test_duration * 1000, 3),
+            'services': probe_reports
+        }
+        print(json.dumps(connectivity_report, indent=2))
 
-        test_result = fms_client.ping() and test_result
-        test_result = ds_client.ping() and test_result
-        test_result = ps_client.ping() and test_result
-        test_result = js_client.ping() and test_result
 
-        if test_result:
-            logging.info('Connectivity to the services test - PASSED')
-        else:
-            logging.error('Connectivity to the services test - FAILED')
+def log_connectivity_probe_report(probe_report):
+    timings = ', '.join(
+        f"{phase}: {format_probe_timing(percentiles['p50'])}"
+        + (f" (p99: {format_probe_timing(percentiles['p99'])})" if probe_report['samples'] > 1 else '')
+        for phase, percentiles in probe_report['timings_in_ms'].items())
+
+    route = f"via proxy '{probe_report['proxy']}'" if probe_report['proxy'] else 'direct'
+    if probe_report['passed']:
+        logging.info(
+            f"{probe_report['service']} service connectivity test to '{probe_report['url']}' ({route}) - PASSED. "
+            f"Status code: {probe_report['status_code']}; {timings}")
+    else:
+        failure = f"Error: {probe_report['error']}" if probe_report['error'] \
+            else f"Status code: {probe_report['status_code']}"
+        logging.error(
+            f"{probe_report['service']} service connectivity test to '{probe_report['url']}' ({route}) - FAILED. "
+            f"{failure}; failed requests: {probe_report['failed_samples']} of {probe_report['samples']}; {timings}")
+
+
+def format_probe_timing(duration_in_ms):
+    if duration_in_ms is None:
+        return 'n/a'
+
+    result = f'{duration_in_ms:.1f} ms'
+    return result
 
 
 def cmn_opt_exec_version():
     print('API client version 1.0')
 
 
+def create_session(user_credentials, app_config):
+    """
+    Creates authentication session with the connection pool shared by all service clients.
+    In the 'serve' daemon and the 'watch' mode the session is shared by the commands with the same credentials
+    and configuration and is kept open after the command.
+    :param user_credentials: User credentials
+    :param app_config: Application configuration
+    :return: Authentication session used as a context manager
+    """
+    if shared_sessions is not None:
+        result = contextlib.nullcontext(shared_sessions.get(user_credentials, app_config))
+        return result
+
+    result = create_new_session(user_credentials, app_config)
+    return result
+
+
+def create_new_session(user_credentials, app_config):
+    from api_client.token_cache import TokenCache
+    from api_client.security import Session
+
+    sso_service_base_url = app_config['sso_service_base_url']
+    proxies = get_requests_proxies(app_config)
+    transport_settings = get_http_transport_settings(app_config)
+    token_cache = None
+    if get_config_item(app_config, 'auth_token_cache_enabled', False):
+        token_cache = TokenCache(os.path.join(get_app_config_dir(), 'token_cache'))
+    background_token_refresh = get_config_item(app_config, 'auth_token_background_refresh_enabled', False)
+
+    result = Session(
+        user_credentials.login,
+        user_credentials.password,
+        sso_service_base_url,
+        proxies,
+        transport_settings,
+        token_cache,
+        background_token_refresh)
+    return result
+
+
+def get_http_transport_settings(app_config):
+    from api_client.http_transport import HttpTransportSettings
+    from api_client.http_transport import DEFAULT_POOL_CONNECTIONS
+    from api_client.http_transport import DEFAULT_POOL_MAXSIZE
+    from api_client.retry_policy import RetryPolicy
+    from api_client.retry_policy import DEFAULT_MAX_RETRIES
+    from api_client.retry_policy import DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    from api_client.retry_policy import DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS
+    from api_client.rate_limiter import RateLimiter
+    from api_client.rate_limiter import DEFAULT_HOST_REQUESTS_PER_SECOND
+    from api_client.rate_limiter import DEFAULT_SERVICE_REQUESTS_PER_SECOND
+    from api_client.rate_limiter import DEFAULT_BURST
+
+    retry_policy = RetryPolicy(
+        max_retries=get_config_item(app_config, 'http_max_retries', DEFAULT_MAX_RETRIES),
+        retry_unsafe_methods=get_config_item(app_config, 'http_retry_unsafe_methods', False),
+        circuit_breaker_failure_threshold=get_config_item(
+            app_config, 'circuit_breaker_failure_threshold', DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD),
+        circuit_breaker_reset_timeout_in_seconds=get_config_item(
+            app_config, 'circuit_breaker_reset_timeout_in_seconds', DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS))
+
+    rate_limiter = None
+    if get_config_item(app_config, 'rate_limit_enabled', False):
+        rate_limiter = RateLimiter(
+            os.path.join(get_app_config_dir(), 'rate_limits'),
+            host_requests_per_second=get_config_item(
+                app_config, 'rate_limit_host_requests_per_second', DEFAULT_HOST_REQUESTS_PER_SECOND),
+            service_requests_per_second=get_config_item(
+                app_config, 'rate_limit_service_requests_per_second', DEFAULT_SERVICE_REQUESTS_PER_SECOND),
+            burst=get_config_item(app_config, 'rate_limit_burst', DEFAULT_BURST))
+
+    result = HttpTransportSettings(
+        pool_connections=get_config_item(app_config, 'http_pool_connections', DEFAULT_POOL_CONNECTIONS),
+        pool_maxsize=get_config_item(app_config, 'http_pool_maxsize', DEFAULT_POOL_MAXSIZE),
+        keep_alive=get_config_item(app_config, 'http_keep_alive', True),
+        retry_policy=retry_policy,
+        rate_limiter=rate_limiter)
+
+    return result
+
+
 def get_requests_proxies(app_config):
     result = {}
 
@@ -490,43 +1978,95 @@ def get_arg(args, item_name, default=None):
     return default
 
 
-def get_config_item(config, item_name):
+def parse_positive_int(text):
+    # get_arg() treats 0 as not set, so the counts which must be positive are checked when they are parsed
     try:
-        return config[item_name]
-    except ConfigMissingException:
-        return None
+        result = int(text)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid number '{text}'")
+    if result < 1:
+        raise ArgumentTypeError(f"must be at least 1, got {result}")
+
+    return result
+
+
+def get_config_item(config, item_name, default=None):
+    try:
+        result = config[item_name]
+    except KeyError:
+        # Either missing in the cached configuration or pyhocon's ConfigMissingException
+        return default
 
+    if result is None:
+        return default
 
-def job_wait(js_client,  job_id, wait_timeout: timedelta):
+    return result
+
+
+def get_positive_int_config_item(config, item_name, default):
+    """
+    Gets the configuration item which must be a positive integer, e.g. the number of requests in flight
+    """
+    result = get_config_item(config, item_name, default)
+    if isinstance(result, bool) or not isinstance(result, int) or result < 1:
+        raise ApicError(
+            f"Configuration item '{item_name}' must be a positive integer, got '{result}'. "
+            f"Correct it in the file '{get_app_config_file_path()}'.")
+
+    return result
+
+
+def job_wait(js_client, job_id, wait_timeout: timedelta, job_submit_time=None, job_duration_history=None):
     """
     Waits until job is complete successfully or with failures.
+    Polls fast at first, then backs off with jitter, polls densely around the finish time predicted
+    from the recorded durations of the past jobs of the same type and honours the service's Retry-After.
     :param js_client: Job service client
     :param job_id: Job id
     :param wait_timeout: Wait time on the client side in seconds.
+    :param job_submit_time: Monotonic time the job has been submitted at; None - the job has been submitted before,
+     its duration is not recorded in the history
+    :param job_duration_history: Recorded durations of the past jobs; None - use the history in the user's folder
     :return: Job final status
     """
-    wait_begin_datetime = datetime.now()
+    from api_client.job_waiter import JobWaitTimeoutError
+
+    if job_duration_history is None:
+        job_duration_history = get_job_duration_history()
+
+    job_waiter = js_client.create_job_waiter(
+        wait_timeout.total_seconds(),
+        max_concurrent_polls=1,
+        job_duration_history=job_duration_history)
+    job_waiter.add(job_id, job_submit_time)
+
+    for completed_job_id, result, wait_error in job_waiter.iter_completed():
+        if isinstance(wait_error, JobWaitTimeoutError):
+            raise ApicError(f"Job wait has been terminated by timeout. Job id: {job_id}; timeout: {wait_timeout}.")
+        if wait_error is not None:
+            raise wait_error
+        return result
+
 
-    while datetime.now() <= wait_begin_datetime + wait_timeout:
-        result = js_client.get_job(job_id)
-        if result['status'] != 'RUNNING':
-            return result
-        # Put less load on the job service. Make a delay before the next call
-        time.sleep(10)
+def get_job_duration_history():
+    from api_client.job_polling import JobDurationHistory
 
-    raise ApicError(f"Job wait has been terminated by timeout. Job id: {job_id}; timeout: {wait_timeout}.")
+    result = JobDurationHistory(os.path.join(get_app_config_dir(), 'job_history.json'))
+    return result
 
 
-def validate_job(job_id, job_final_status, fms_client, error_files_dir):
+def validate_job(job_id, job_final_status, fms_client, error_files_dir, extract=False):
     """
     Validates job for failed statues and downloads errors to the defined directory
     :param job_id: Job id
     :param job_final_status: The final status of the job to validate
     :param fms_client: File management service client for downloading an error file
     :param error_files_dir: Destination directory for error files on the client side
+    :param extract: True - extract the error file while it's downloaded
     """
     if is_job_failed(job_final_status):
-        destination_error_file_path = download_error_file(job_id, job_final_status, fms_client, error_files_dir)
+        destination_error_file_path = download_error_file(
+            job_id, job_final_status, fms_client, error_files_dir, extract)
         destination_error_file_abs_path = os.path.abspath(destination_error_file_path)
         raise ApicError(
             f"The job 'job type: {job_final_status['type']}; job id: {job_id}' "
@@ -546,27 +2086,67 @@ def is_job_failed(job_status):
     return False
 
 
-def download_error_file(job_id, job_final_status, fms_client, error_files_dir):
+def download_error_file(job_id, job_final_status, fms_client, error_files_dir, extract=False):
     """
     Downloads error file for the failed jobs or jobs with calculation errors
     :param job_id: Job id
     :param job_final_status: The final status of the job
     :param fms_client: File management service client for downloading an error file
     :param error_files_dir: Destination directory for error files on the client side
+    :param extract: True - extract the error file to the folder next to it while it's downloaded
     :return: Destination error file path (full name of the file)
     """
     destination_error_file_name = f"job_{job_final_status['type']}_{job_id}_errors.zip"
     destination_error_file_path = os.path.join(error_files_dir, destination_error_file_name)
-    fms_client.download_job_import_error_file(job_id, destination_error_file_path)
+    if extract:
+        download_and_extract_zip_file(
+            lambda chunk_consumer: fms_client.download_job_import_error_file(
+                job_id, destination_error_file_path, chunk_consumer),
+            destination_error_file_path)
+    else:
+        fms_client.download_job_import_error_file(job_id, destination_error_file_path)
 
     return destination_error_file_path
 
 
+def download_and_extract_zip_file(download_function, zip_file_path):
+    """
+    Downloads the zip file and extracts it to the folder next to it (named as the file without '.zip')
+    while it's downloaded
+    :param download_function: Function downloading the file, called with the function consuming the downloaded chunks;
+     None - the file is already downloaded and it's extracted from the disk
+    :param zip_file_path: Path of the zip file
+    :return: Path of the folder with the extracted files
+    """
+    from api_client.streaming_unzip import StreamingZipExtractor
+    from api_client.streaming_unzip import get_extract_dir
+
+    result = get_extract_dir(zip_file_path)
+    zip_extractor = StreamingZipExtractor(result)
+    if download_function is not None:
+        try:
+            download_function(zip_extractor.feed)
+        except BaseException:
+            # The members extracted so far and the member being written must not be taken for the results
+            zip_extractor.fall_back('download has failed')
+            raise
+    extracted_file_paths = zip_extractor.finish(zip_file_path)
+    logging.info(
+        f"Extracting '{zip_file_path}' to the folder '{os.path.abspath(result)}' has finished "
+        f"(extracted entries: {len(extracted_file_paths)}).")
+
+    return result
+
+
 # ImpairmentStudio™ command to executor mapping
 is_command_executor_mapping = {
     'import': cmd_exec_import,
     'run-analysis': cmd_exec_analysis,
     'download-results': cmd_exec_download_results,
+    'wait': cmd_exec_wait,
+    'pipeline': cmd_exec_pipeline,
+    'serve': cmd_exec_serve,
+    'watch': cmd_exec_watch,
     'configure': cmd_exec_configure,
 }
 
@@ -580,110 +2160,383 @@ def add_global_options_to_arg_parser(arguments_parser):
         '--password',
         metavar='<user password>',
         help='Specifies the user password to overwrite the environment variable and configuration file')
-    # arguments_parser.add_argument(
-    #     '--debug',
-    #     action='store_true',
-    #     help='A switch that enables debug logging')
-
-
-# Define top-level command arguments parser and options
-arg_parser = ArgumentParser('apic is')
-arg_parser.add_argument(
-    '--test-connect',
-    action='store_true',
-    default=False,
-    help='Test connections to the API servers. Test will be performed on APIs that support ping endpoint')
-arg_parser.add_argument(
-    '--version',
-    action='store_true',
-    default=False,
-    help="Displays the version of CLI that's currently used")
-
-add_global_options_to_arg_parser(arg_parser)
-
-# Define ImpairmentStudio™ commands and their options
-commands_subparser = arg_parser.add_subparsers(help='ImpairmentStudio™ commands')
-# 'import' command's argument parser
-import_cmd_parser = commands_subparser.add_parser(
-    'import',
-    help='Imports a zip file containing the data files for ImpairmentStudio™ input')
-import_cmd_parser.set_defaults(is_command_name='import')
-
-import_cmd_parser.add_argument(
-    '--input-zip',
-    required=True,
-    metavar='<path to source zip import file>',
-    help='The local path to the where output files will be copied to')
-
-import_cmd_parser.add_argument(
-    '--output-path',
-    metavar='<path to place output files>',
-    help='path to place output files')
-
-import_cmd_parser.add_argument(
-    '--job-name',
-    metavar='<import job name>',
-    help='The name of the job to help it get identified in the application')
-
-import_cmd_parser.add_argument(
-    '--overwrite',
-    action='store_true',
-    default=False,
-    help='Specifies whether to overwrite portfolio of the same name or not')
-
-add_global_options_to_arg_parser(import_cmd_parser)
-
-# 'run-analysis' command's argument parser
-run_analysis_cmd_parser = commands_subparser.add_parser(
-    'run-analysis',
-    help='Runs an ImpairmentStudio™ analysis')
-run_analysis_cmd_parser.set_defaults(is_command_name='run-analysis')
-
-run_analysis_cmd_parser.add_argument(
-    '--analysis-id',
-    metavar='<analysis id>',
-    required=True,
-    help='The unique identifier of an analysis that is in ImpairmentStudio™')
-
-run_analysis_cmd_parser.add_argument(
-    '--output-path',
-    metavar='<path to place output files>',
-    help='The local path to the where output files will be downloaded to '
-         'after analysis is completed either with error or successfully')
-
-run_analysis_cmd_parser.add_argument(
-    '--no-wait',
-    action='store_true',
-    default=False,
-    help='Do not wait for job completion')
-
-add_global_options_to_arg_parser(run_analysis_cmd_parser)
-
-# 'download-results' command's argument parser
-download_results_cmd_parser = commands_subparser.add_parser(
-    'download-results',
-    help='Downloads the output of an analysis that has been executed')
-download_results_cmd_parser.set_defaults(is_command_name='download-results')
-
-download_results_cmd_parser.add_argument(
-    '--analysis-id',
-    metavar='<analysis id>',
-    required=True,
-    help='The unique identifier of an analysis that is in ImpairmentStudio™')
-
-download_results_cmd_parser.add_argument(
-    '--output-path',
-    metavar='<path to place output files>',
-    help='The local path to the where output files will be downloaded to '
-         'after analysis is completed either with error or successfully')
-
-add_global_options_to_arg_parser(download_results_cmd_parser)
-
-# 'configure' command's argument parser
-configure_cmd_parser = commands_subparser.add_parser(
-    'configure',
-    help="Prompts for user credentials in saves to user's credential file")
-configure_cmd_parser.set_defaults(is_command_name='configure')
+    arguments_parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='A switch that enables debug logging')
+    arguments_parser.add_argument(
+        '--config-timing',
+        action='store_true',
+        help='A switch that logs the time spent on resolving the configuration')
+    arguments_parser.add_argument(
+        '--no-daemon',
+        action='store_true',
+        help='A switch that runs the command in this process even if the daemon is running')
+
+
+def create_arg_parser(is_command_names=None):
+    """
+    Creates the command-line arguments parser. All commands are listed, but only the options of the given
+    commands are defined, so the start-up does not pay for building the parsers of the other commands.
+    :param is_command_names: Names of the commands to define the options for; None - all commands
+    :return: Arguments parser
+    """
+    # Define top-level command arguments parser and options
+    result = ArgumentParser('apic is')
+    result.add_argument(
+        '--test-connect',
+        action='store_true',
+        default=False,
+        help='Test connections to the API servers. Test will be performed on APIs that support ping endpoint')
+    result.add_argument(
+        '--version',
+        action='store_true',
+        default=False,
+        help="Displays the version of CLI that's currently used")
+    result.add_argument(
+        '--repeat',
+        type=parse_positive_int,
+        metavar='<number of requests>',
+        help='The number of requests sent to every API server by --test-connect to get p50 and p99 timings')
+    result.add_argument(
+        '--json',
+        action='store_true',
+        default=False,
+        help='Prints the --test-connect report in JSON to the standard output')
+
+    add_global_options_to_arg_parser(result)
+
+    # Define ImpairmentStudio™ commands and their options
+    commands_subparser = result.add_subparsers(help='ImpairmentStudio™ commands')
+    for is_command_name, (is_command_help, add_is_command_arguments) in is_command_arg_parsers.items():
+        command_parser = commands_subparser.add_parser(is_command_name, help=is_command_help)
+        command_parser.set_defaults(is_command_name=is_command_name)
+        if add_is_command_arguments and (is_command_names is None or is_command_name in is_command_names):
+            add_is_command_arguments(command_parser)
+
+    return result
+
+
+def add_import_cmd_arguments(command_parser):
+    input_group = command_parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument(
+        '--input-zip',
+        metavar='<path to source zip import file>',
+        help='The local path to the where output files will be copied to')
+
+    input_group.add_argument(
+        '--input-dir',
+        metavar='<path to source import directory>',
+        help='The local directory with the input files. They are zipped while being uploaded, '
+             'several files or parts of a file compressed at a time')
+
+    command_parser.add_argument(
+        '--output-path',
+        metavar='<path to place output files>',
+        help='path to place output files')
+
+    command_parser.add_argument(
+        '--job-name',
+        metavar='<import job name>',
+        help='The name of the job to help it get identified in the application')
+
+    command_parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        default=False,
+        help='Specifies whether to overwrite portfolio of the same name or not')
+
+    command_parser.add_argument(
+        '--chunked-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zip in parts, several parts at a time. '
+             'An interrupted upload is resumed when the command is run again')
+
+    command_parser.add_argument(
+        '--extract',
+        action='store_true',
+        default=False,
+        help='Extracts the error zip to the folder next to it while it is downloaded')
+
+    command_parser.add_argument(
+        '--force-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zip even if the same content has been uploaded before')
+
+    add_report_json_argument(command_parser)
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_run_analysis_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--analysis-id',
+        metavar='<analysis id>',
+        action='append',
+        help='The unique identifier of an analysis that is in ImpairmentStudio™. '
+             'Can be specified many times to run many analyses')
+
+    command_parser.add_argument(
+        '--analysis-ids-file',
+        metavar='<path to file of analysis ids>',
+        help='The local path to the file with the identifiers of the analyses to run, one per line')
+
+    command_parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        metavar='<number of jobs>',
+        help='The maximum number of analysis jobs running at once when many analyses are run')
+
+    command_parser.add_argument(
+        '--summary-file',
+        metavar='<path to summary file>',
+        help='The local path to the JSON file with the summary of the analysis runs. '
+             'When many analyses are run and the file is not specified, the summary is printed to the standard output')
+
+    command_parser.add_argument(
+        '--output-path',
+        metavar='<path to place output files>',
+        help='The local path to the where output files will be downloaded to '
+             'after analysis is completed either with error or successfully')
+
+    command_parser.add_argument(
+        '--no-wait',
+        action='store_true',
+        default=False,
+        help='Do not wait for job completion')
+
+    add_report_json_argument(command_parser)
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_download_results_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--analysis-id',
+        metavar='<analysis id>',
+        required=True,
+        help='The unique identifier of an analysis that is in ImpairmentStudio™')
+
+    command_parser.add_argument(
+        '--output-path',
+        metavar='<path to place output files>',
+        help='The local path to the where output files will be downloaded to '
+             'after analysis is completed either with error or successfully')
+
+    command_parser.add_argument(
+        '--segments',
+        type=int,
+        metavar='<number of segments>',
+        help='The number of byte ranges of the results file downloaded at once. '
+             'An interrupted segmented download is resumed when the command is run again')
+
+    command_parser.add_argument(
+        '--extract',
+        action='store_true',
+        default=False,
+        help='Extracts the results zip to the folder next to it while it is downloaded. '
+             'The file is downloaded as a single stream')
+
+    add_report_json_argument(command_parser)
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_wait_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--job-id',
+        metavar='<job id>',
+        required=True,
+        action='append',
+        help='The unique identifier of a job to wait for. Can be specified many times')
+
+    command_parser.add_argument(
+        '--output-path',
+        metavar='<path to place output files>',
+        help='The local path to the where error files of the failed jobs will be downloaded to')
+
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_pipeline_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--input-zip',
+        required=True,
+        metavar='<path to source zip import file>',
+        help='The local path to the zip file containing the data files for ImpairmentStudio™ input')
+
+    command_parser.add_argument(
+        '--analysis-id',
+        metavar='<analysis id>',
+        action='append',
+        help='The unique identifier of an analysis to run after import. Can be specified many times')
+
+    command_parser.add_argument(
+        '--analysis-ids-file',
+        metavar='<path to file of analysis ids>',
+        help='The local path to the file with the identifiers of the analyses to run, one per line')
+
+    command_parser.add_argument(
+        '--output-path',
+        metavar='<path to place output files>',
+        help='The local path to the where results and error files will be downloaded to')
+
+    command_parser.add_argument(
+        '--job-name',
+        metavar='<import job name>',
+        help='The name of the import job to help it get identified in the application')
+
+    command_parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        default=False,
+        help='Specifies whether to overwrite portfolio of the same name or not')
+
+    command_parser.add_argument(
+        '--chunked-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zip in parts, several parts at a time')
+
+    command_parser.add_argument(
+        '--force-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zip even if the same content has been uploaded before')
+
+    command_parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        metavar='<number of jobs>',
+        help='The maximum number of analysis jobs running at once')
+
+    command_parser.add_argument(
+        '--segments',
+        type=int,
+        metavar='<number of segments>',
+        help='The number of byte ranges of each results file downloaded at once')
+
+    command_parser.add_argument(
+        '--summary-file',
+        metavar='<path to summary file>',
+        help='The local path to the JSON file with the summary of the analysis runs')
+
+    add_report_json_argument(command_parser)
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_report_json_argument(command_parser):
+    command_parser.add_argument(
+        '--report-json',
+        metavar='<path to report file>',
+        help='The local path to the JSON file with the timings of the command steps and the requests '
+             'per endpoint (counts, status codes, retries, bytes and latencies)')
+
+
+def add_serve_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--status',
+        action='store_true',
+        default=False,
+        help='Prints the status and throughput of the running daemon')
+
+    command_parser.add_argument(
+        '--stop',
+        action='store_true',
+        default=False,
+        help='Stops the running daemon')
+
+    add_global_options_to_arg_parser(command_parser)
+
+
+def add_watch_cmd_arguments(command_parser):
+    command_parser.add_argument(
+        '--input-dir',
+        required=True,
+        metavar='<path to the watched folder>',
+        help='The local folder where the input zip files are dropped')
+
+    command_parser.add_argument(
+        '--processed-dir',
+        metavar='<path to place imported files>',
+        help='The folder where the imported zip files are moved to. Default: the "processed" subfolder')
+
+    command_parser.add_argument(
+        '--failed-dir',
+        metavar='<path to place failed files>',
+        help='The folder where the zip files which have failed to import are moved to together with their errors. '
+             'Default: the "failed" subfolder')
+
+    command_parser.add_argument(
+        '--max-uploads',
+        type=int,
+        metavar='<number of uploads>',
+        help='The maximum number of zip files uploaded at once')
+
+    command_parser.add_argument(
+        '--max-import-jobs',
+        type=int,
+        metavar='<number of jobs>',
+        help='The maximum number of import jobs running at once')
+
+    command_parser.add_argument(
+        '--job-name',
+        metavar='<import job name>',
+        help='The name of the import jobs to help them get identified in the application')
+
+    command_parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        default=False,
+        help='Specifies whether to overwrite portfolio of the same name or not')
+
+    command_parser.add_argument(
+        '--chunked-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zips in parts, several parts at a time')
+
+    command_parser.add_argument(
+        '--force-upload',
+        action='store_true',
+        default=False,
+        help='Uploads the input zips even if the same content has been uploaded before')
+
+    command_parser.add_argument(
+        '--once',
+        action='store_true',
+        default=False,
+        help='Imports the files which are in the folder and exits instead of watching it')
+
+    add_global_options_to_arg_parser(command_parser)
+
+
+# ImpairmentStudio™ command to its help and the function adding its options to the arguments parser
+is_command_arg_parsers = {
+    'import': (
+        'Imports a zip file containing the data files for ImpairmentStudio™ input',
+        add_import_cmd_arguments),
+    'run-analysis': (
+        'Runs an ImpairmentStudio™ analysis',
+        add_run_analysis_cmd_arguments),
+    'download-results': (
+        'Downloads the output of an analysis that has been executed',
+        add_download_results_cmd_arguments),
+    'wait': (
+        'Waits for the completion of one or many ImpairmentStudio™ jobs',
+        add_wait_cmd_arguments),
+    'pipeline': (
+        'Imports a zip file, runs analyses and downloads their results in one session',
+        add_pipeline_cmd_arguments),
+    'serve': (
+        'Runs the daemon which keeps the sessions and connections open and runs the commands sent by the CLI',
+        add_serve_cmd_arguments),
+    'watch': (
+        'Watches a folder and imports the zip files dropped into it',
+        add_watch_cmd_arguments),
+    'configure': (
+        "Prompts for user credentials in saves to user's credential file",
+        None),
+}
 
 
 class ApicError(Exception):
@@ -695,18 +2548,19 @@ def main():
 
     # Because of new API selector option the help should be enforced implicitly for this use case
     if len(sys.argv) <= 1:
-        arg_parser.print_help()
+        create_arg_parser(is_command_names=[]).print_help()
         exit(1)
 
     # Check for API selector option 'is'
     # Current implementation is supports just 'is' API (API to ImpairmentStudio)
     api_selector_option = sys.argv[1]
     if api_selector_option != 'is':
-        arg_parser.print_help()
+        create_arg_parser(is_command_names=[]).print_help()
         exit(1)
 
-    # Get 'is' API options and parse them
+    # Get 'is' API options and parse them. Only the options of the command being run are defined.
     is_args = sys.argv[2:]
+    arg_parser = create_arg_parser(is_command_names=[arg for arg in is_args if arg in is_command_arg_parsers])
     commandline_args = arg_parser.parse_args(is_args)
 
     is_command_name = get_arg(commandline_args, 'is_command_name')
@@ -716,6 +2570,12 @@ def main():
         arg_parser.print_help()
         exit(1)
 
+    # Run the command in the daemon if it's running, so the command reuses its sessions and connections
+    if is_command_name in DAEMON_COMMAND_NAMES and not get_arg(commandline_args, 'no_daemon'):
+        exit_code = forward_to_daemon(app_path, commandline_args)
+        if exit_code is not None:
+            exit(exit_code)
+
     exit_code = execute_command(app_path, commandline_args)
     exit(exit_code)
 
@@ -3,6 +3,7 @@ import os
 import setuptools
 
 REQUIRED = ['pyhocon>=0.3.54', 'requests>=2.23.0', 'PyJWT>=1.7.1']
+EXTRAS = {'async': ['aiohttp>=3.7']}
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -20,5 +21,6 @@ setuptools.setup(name=about['__name__'],
                  author=about['__author__'],
                  author_email=about['__author_email__'],
                  python_requires='>=3.6',
-                 packages=['api_client'],
-                 install_requires=REQUIRED)
+                 packages=['api_client', 'api_client.aio'],
+                 install_requires=REQUIRED,
+                 extras_require=EXTRAS)
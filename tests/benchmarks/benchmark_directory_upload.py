@@ -0,0 +1,113 @@
+"""
+Compares importing a directory by zipping it to a temporary file and uploading the file with uploading the zip
+built on the fly (import --input-dir). The upload goes to a local stand-in of the File Management Service,
+so the numbers show the client side cost only.
+
+Usage: python tests/benchmarks/benchmark_directory_upload.py [--size-in-megabytes 200] [--file-count 20]
+"""
+import os
+import sys
+import time
+import zipfile
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'unit_tests'))
+
+from api_client.zip_stream import DirectoryZipStream  # noqa: E402
+from api_client.security import Session  # noqa: E402
+from api_client.file_management_service_client import FileManagementServiceClient  # noqa: E402
+from local_services import LocalService  # noqa: E402
+from local_services import LocalServiceRequestHandler  # noqa: E402
+
+READ_SIZE = 1024 * 1024
+
+
+class UploadSinkRequestHandler(LocalServiceRequestHandler):
+    """
+    Reads and drops the uploaded body, sent with a content length or chunked
+    """
+    def do_POST(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            while True:
+                chunk_size = int(self.rfile.readline().strip(), 16)
+                self.drain(chunk_size)
+                self.rfile.readline()
+                if chunk_size == 0:
+                    break
+        else:
+            self.drain(int(self.headers['Content-Length']))
+        self.send_json(200, [{'id': 'file_1', 'filename': 'input.zip'}])
+
+    def drain(self, size):
+        while size:
+            size -= len(self.rfile.read(min(size, READ_SIZE)))
+
+
+def create_input_dir(input_dir, size_in_megabytes, file_count):
+    """
+    Creates CSV files resembling portfolio data, which compress to about a quarter of their size
+    """
+    file_size = size_in_megabytes * 1024 * 1024 // file_count
+    for file_number in range(file_count):
+        with open(os.path.join(input_dir, f'portfolio_{file_number}.csv'), 'w') as input_file:
+            input_file.write('instrument_id,as_of_date,balance,rate,rating,segment\n')
+            row_number = 0
+            while input_file.tell() < file_size:
+                input_file.write(
+                    f'{file_number}-{row_number},2019-08-31,{(row_number * 7919) % 1000003}.{row_number % 100:02},'
+                    f'{(row_number % 997) / 10000:.4f},{"ABC"[row_number % 3]},segment_{row_number % 17}\n')
+                row_number += 1
+
+
+def zip_then_upload(fms_client, input_dir, temp_dir, compression_level):
+    zip_file_path = os.path.join(temp_dir, 'input.zip')
+    with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compression_level) as zip_file:
+        for file_name in sorted(os.listdir(input_dir)):
+            zip_file.write(os.path.join(input_dir, file_name), file_name)
+    fms_client.import_file(zip_file_path, 'input.zip', 'raw')
+    result = os.path.getsize(zip_file_path)
+    os.remove(zip_file_path)
+    return result
+
+
+def stream_upload(fms_client, input_dir, compression_level, worker_count):
+    zip_stream = DirectoryZipStream(input_dir, compression_level, worker_count)
+    fms_client.import_file_stream(zip_stream, 'input.zip', 'raw')
+    result = zip_stream.archive_size
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the directory import.')
+    parser.add_argument('--size-in-megabytes', type=int, default=200)
+    parser.add_argument('--file-count', type=int, default=20)
+    parser.add_argument('--compression-level', type=int, default=6)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir, LocalService(UploadSinkRequestHandler) as service:
+        input_dir = os.path.join(temp_dir, 'input')
+        os.makedirs(input_dir)
+        create_input_dir(input_dir, args.size_in_megabytes, args.file_count)
+
+        session = Session('user', 'password', service.base_url)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer benchmark'}
+        fms_client = FileManagementServiceClient(session, service.base_url)
+
+        print(f'{args.size_in_megabytes} MB in {args.file_count} files, compression level {args.compression_level}')
+        begin_time = time.monotonic()
+        archive_size = zip_then_upload(fms_client, input_dir, temp_dir, args.compression_level)
+        print(f'zip then upload:           {time.monotonic() - begin_time:6.2f} s, {archive_size / 1048576:.1f} MB')
+
+        for worker_count in args.workers:
+            begin_time = time.monotonic()
+            archive_size = stream_upload(fms_client, input_dir, args.compression_level, worker_count)
+            print(
+                f'stream upload, {worker_count:2} workers: '
+                f'{time.monotonic() - begin_time:6.2f} s, {archive_size / 1048576:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
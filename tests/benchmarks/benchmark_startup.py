@@ -0,0 +1,88 @@
+"""
+Measures the start-up time of the CLI for the commands which do not call the services: help and version.
+
+Cold start runs each command with an empty bytecode cache, warm start with the cache filled by a previous run.
+
+Usage: python tests/benchmarks/benchmark_startup.py [--repeat <number of runs>] [--json-file <path to results file>]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+from argparse import ArgumentParser
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPOSITORY_DIR)
+
+import apic  # noqa: E402
+
+
+def get_benchmark_commands():
+    result = [['--version'], ['--help']]
+    result += [[is_command_name, '--help'] for is_command_name in apic.is_command_arg_parsers]
+    return result
+
+
+def run_command(command_args, pycache_dir):
+    """
+    Runs the CLI command in a new interpreter
+    :return: Run time in seconds
+    """
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_dir)
+    # Warm start needs the bytecode cache written by the previous run
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    begin = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(REPOSITORY_DIR, 'apic.py'), 'is'] + command_args,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True)
+    result = time.perf_counter() - begin
+    return result
+
+
+def measure_command(command_args, repeat):
+    cold_times = []
+    warm_times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as pycache_dir:
+            cold_times.append(run_command(command_args, pycache_dir))
+            warm_times.append(run_command(command_args, pycache_dir))
+
+    result = {
+        'command': ' '.join(command_args),
+        'cold_min_in_ms': min(cold_times) * 1000,
+        'cold_median_in_ms': statistics.median(cold_times) * 1000,
+        'warm_min_in_ms': min(warm_times) * 1000,
+        'warm_median_in_ms': statistics.median(warm_times) * 1000
+    }
+    return result
+
+
+def main():
+    arg_parser = ArgumentParser('benchmark_startup')
+    arg_parser.add_argument('--repeat', type=int, default=10, help='The number of runs of each command')
+    arg_parser.add_argument('--json-file', help='The local path to the JSON file to save the results to')
+    args = arg_parser.parse_args()
+
+    results = []
+    print(f"{'command':<30}{'cold min':>12}{'cold median':>14}{'warm min':>12}{'warm median':>14}")
+    for command_args in get_benchmark_commands():
+        result = measure_command(command_args, args.repeat)
+        results.append(result)
+        print(
+            f"{result['command']:<30}"
+            f"{result['cold_min_in_ms']:>10.0f}ms{result['cold_median_in_ms']:>12.0f}ms"
+            f"{result['warm_min_in_ms']:>10.0f}ms{result['warm_median_in_ms']:>12.0f}ms")
+
+    if args.json_file:
+        with open(args.json_file, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
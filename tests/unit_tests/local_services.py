@@ -0,0 +1,116 @@
+import json
+import time
+import threading
+import http.server
+from types import SimpleNamespace
+import jwt
+
+
+SSO_TOKEN_PATH = '/sso-api/v1/token'
+
+
+class LocalServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Base request handler of the local stand-ins of the services
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; do not let the delayed ACK stall kept-alive connections
+    disable_nagle_algorithm = True
+
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            result = b''
+            while True:
+                chunk_size = int(self.rfile.readline().strip(), 16)
+                result += self.rfile.read(chunk_size)
+                self.rfile.readline()
+                if chunk_size == 0:
+                    return result
+
+        content_length = int(self.headers.get('Content-Length', 0))
+        result = self.rfile.read(content_length) if content_length else b''
+        return result
+
+    def send_json(self, status_code, body):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_empty(self, status_code):
+        self.send_response(status_code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalService(object):
+    """
+    Local stand-in of a service running on a random port in a background thread
+    """
+    def __init__(self, request_handler_class):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), request_handler_class)
+        self.server.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def create_sso_handler_class(token_lifetime_in_seconds=3600, **state_items):
+    """
+    Creates a local stand-in of the SSO token endpoint. Handlers of the other services derive from it
+    and call send_token() for the token requests.
+    :param state_items: Initial items of the service state shared by the derived handler, e.g. uploads=0
+    :return: Handler class and the service state with the issued and revoked tokens
+    """
+    state = SimpleNamespace(issued_tokens=[], revoked_tokens=[], lock=threading.Lock(), **state_items)
+
+    class SsoRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            self.read_body()
+            self.send_token()
+
+        def do_DELETE(self):
+            with state.lock:
+                state.revoked_tokens.append(self.headers['Authorization'])
+            self.send_empty(204)
+
+        def send_token(self):
+            with state.lock:
+                token = jwt.encode(
+                    {'exp': int(time.time()) + token_lifetime_in_seconds, 'n': len(state.issued_tokens)},
+                    'secret').decode('ascii')
+                state.issued_tokens.append(token)
+            self.send_json(200, {'id_token': token, 'token_type': 'Bearer'})
+
+    return SsoRequestHandler, state
+
+
+def configure_local_services(tmp_path, base_url, app_config_lines=()):
+    """
+    Points the configuration in the home folder to the local services. HOME has to be set to tmp_path.
+    :param app_config_lines: Lines added to application.conf, e.g. 'results_cache_enabled = true'
+    """
+    import apic
+
+    app_config_file_path = apic.get_app_config_file_path()
+    with open(app_config_file_path, 'a') as app_config_file:
+        app_config_file.writelines(f'{line}\n' for line in app_config_lines)
+    (tmp_path / '.ma' / 'env_data.conf').write_text(
+        f'SSO_SERVICE_BASE_URL="{base_url}"\n'
+        f'DATA_API_BASE_URL="{base_url}"\n'
+        f'IMPAIRMENT_STUDIO_API_BASE_URL="{base_url}"\n'
+        f'DEFAULT_JOB_WAIT_TIMEOUT_IN_MINUTES=1\n'
+        f'HTTP_PROXY=null\n'
+        f'HTTPS_PROXY=null\n')
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from api_client.security import Session
+from api_client.file_management_service_client import FileManagementServiceClient
+from api_client.job_service_client import JobServiceClient
+from api_client.project_service_client import ProjectServiceClient
+from local_services import LocalService
+from local_services import create_sso_handler_class
+import apic
+
+ANALYSIS_IDS = ['1', 'stuck', '2', 'rejected', '3', 'unreadable', 'failing', '4']
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the Project, Job and File Management services tracking the jobs in flight.
+    The submission of analysis 'rejected' is refused; the job of analysis 'failing' fails and its error file
+    cannot be downloaded. The job of analysis 'stuck' keeps running and the status of the job of analysis
+    'unreadable' is refused.
+    """
+    sso_handler_class, state = create_sso_handler_class(in_flight_jobs=set(), max_in_flight_jobs=0)
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            analysis_id = self.path.split('/')[4]
+            if analysis_id == 'rejected':
+                self.send_json(400, {'message': 'Analysis cannot be run'})
+                return
+            with state.lock:
+                state.in_flight_jobs.add(f'job_{analysis_id}')
+                state.max_in_flight_jobs = max(state.max_in_flight_jobs, len(state.in_flight_jobs))
+            self.send_json(200, {'jobId': f'job_{analysis_id}'})
+
+        def do_GET(self):
+            if self.path.startswith('/job/v1/jobs/'):
+                job_id = self.path.rsplit('/', 1)[1]
+                if job_id == 'job_stuck':
+                    self.send_json(200, {'type': 'ANALYSIS', 'status': 'RUNNING'})
+                    return
+                with state.lock:
+                    state.in_flight_jobs.discard(job_id)
+                if job_id == 'job_unreadable':
+                    self.send_json(403, {'message': 'Forbidden'})
+                    return
+                status = 'FAILED' if job_id == 'job_failing' else 'COMPLETED'
+                self.send_json(200, {'type': 'ANALYSIS', 'status': status})
+            else:
+                self.send_json(404, {'message': 'Not found'})
+
+    return ServiceRequestHandler, state
+
+
+def test_analysis_batch_keeps_bounded_jobs_in_flight(tmp_path, monkeypatch):
+    handler_class, state = create_service_handler_class()
+    monkeypatch.setenv('HOME', str(tmp_path))
+
+    with LocalService(handler_class) as service:
+        session = Session('user_123', 'top_secret', service.base_url)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+        analysis_batch_summary = apic.run_analysis_batch(
+            ProjectServiceClient(session, service.base_url),
+            JobServiceClient(session, service.base_url),
+            FileManagementServiceClient(session, service.base_url),
+            ANALYSIS_IDS,
+            max_in_flight=2,
+            max_concurrent_job_polls=2,
+            wait_timeout=timedelta(seconds=1.5),
+            error_files_dir=str(tmp_path))
+
+    assert state.max_in_flight_jobs == 2
+    assert state.in_flight_jobs == {'job_stuck'}
+    # Neither the refused submission, the failed waits nor the failed error file download stops the batch.
+    # The timeout of one job does not end the waits of the jobs submitted after it.
+    summary_items = {item['analysis_id']: item for item in analysis_batch_summary}
+    assert {analysis_id: item['status'] for analysis_id, item in summary_items.items()} == {
+        '1': 'COMPLETED',
+        'stuck': 'WAIT_TIMEOUT',
+        '2': 'COMPLETED',
+        'rejected': 'SUBMISSION_FAILED',
+        '3': 'COMPLETED',
+        'unreadable': 'WAIT_FAILED',
+        'failing': 'FAILED',
+        '4': 'COMPLETED'}
+    assert summary_items['failing']['error_file'] is None
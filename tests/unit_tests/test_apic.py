@@ -1,6 +1,9 @@
 import apic
 import os
+import sys
 import contextlib
+import subprocess
+import pytest
 from types import SimpleNamespace
 from pyhocon import ConfigFactory
 
@@ -153,6 +156,50 @@ def test_get_config_item():
     assert actual == 'https://sso.moodysanalytics.com'
 
 
+def test_get_positive_int_config_item(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    assert apic.get_positive_int_config_item({}, 'max_concurrent_job_polls', 8) == 8
+    assert apic.get_positive_int_config_item({'max_concurrent_job_polls': 2}, 'max_concurrent_job_polls', 8) == 2
+
+    for value in [0, -1, '4', True]:
+        with pytest.raises(apic.ApicError, match="'max_concurrent_job_polls' must be a positive integer"):
+            apic.get_positive_int_config_item({'max_concurrent_job_polls': value}, 'max_concurrent_job_polls', 8)
+
+
+def test_get_app_config_is_cached_until_config_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setitem(apic.config_stats, 'hits', 0)
+    monkeypatch.setitem(apic.config_stats, 'misses', 0)
+
+    first = apic.get_app_config()
+    second = apic.get_app_config()
+    assert second == first
+    assert apic.config_stats == {'hits': 1, 'misses': 1}
+
+    env_data_conf_file_path = tmp_path / '.ma' / 'env_data.conf'
+    env_data_conf_file_path.write_text(
+        env_data_conf_file_path.read_text().replace('HTTP_PROXY=null', 'HTTP_PROXY="http://proxy.example.com:1234"'))
+
+    actual = apic.get_app_config()
+    assert apic.config_stats == {'hits': 1, 'misses': 2}
+    assert apic.get_requests_proxies(actual) == {'http': 'http://proxy.example.com:1234'}
+    assert apic.get_config_item(actual, 'non_existing_item') is None
+
+
+def test_get_credentials_config_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    (tmp_path / '.ma').mkdir()
+    (tmp_path / '.ma' / 'apic').write_text('ma_apic_login = user_abc\nma_apic_password = top_secret\n')
+
+    actual = apic.get_credentials_config()
+    assert actual == {'ma_apic_login': 'user_abc', 'ma_apic_password': 'top_secret'}
+    apic.validate_app_config(apic.get_app_config())
+
+    config_cache_dir = tmp_path / '.ma' / 'config_cache'
+    assert all('top_secret' not in cache_file.read_text() for cache_file in config_cache_dir.iterdir())
+    assert not (config_cache_dir / 'apic.json').exists()
+
+
 def test_get_arg():
     args = SimpleNamespace(
         job_name=None
@@ -175,6 +222,54 @@ def test_get_arg():
     assert actual == 'File_Upload'
 
 
+def test_resolve_analysis_ids(tmp_path):
+    analysis_ids_file_path = tmp_path / 'analysis_ids.txt'
+    analysis_ids_file_path.write_text('# Month-end close\n101\n\n102  # Stage 2\n7\n')
+    args = SimpleNamespace(
+        analysis_id=['7', '8'],
+        analysis_ids_file=str(analysis_ids_file_path))
+
+    actual = apic.resolve_analysis_ids(args)
+
+    assert actual == ['7', '8', '101', '102']
+
+
+def test_create_arg_parser_defines_options_of_given_commands_only():
+    arg_parser = apic.create_arg_parser(is_command_names=['import'])
+
+    actual = arg_parser.parse_args(['import', '--input-zip', 'input.zip'])
+    assert actual.is_command_name == 'import'
+    assert actual.input_zip == 'input.zip'
+
+    actual = arg_parser.parse_args(['configure'])
+    assert actual.is_command_name == 'configure'
+
+    with pytest.raises(SystemExit):
+        arg_parser.parse_args(['download-results', '--analysis-id', '7'])
+
+
+def test_version_does_not_load_service_clients(tmp_path):
+    # Help and version must not pay for loading the configuration parser and the HTTP stack
+    app_path = os.path.dirname(os.path.abspath(apic.__file__))
+    script = \
+        'import sys, apic\n' \
+        'sys.argv = ["apic", "is", "--version"]\n' \
+        'try:\n' \
+        '    apic.main()\n' \
+        'except SystemExit:\n' \
+        '    pass\n' \
+        'print(sorted(\n' \
+        '    name for name in sys.modules\n' \
+        '    if name in ("pyhocon", "requests", "jwt") or name.startswith("api_client.")))\n'
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=app_path)
+
+    completed = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+
+    # Only the lightweight error types are loaded up front
+    assert completed.stdout.splitlines() == ['API client version 1.0', "['api_client.errors']"]
+    assert os.listdir(tmp_path) == []
+
+
 def create_credentials_file(item1_name, item1_value, item2_name, item2_value):
     credentials_file_path = apic.get_credentials_file_path()
     with contextlib.suppress(FileNotFoundError):
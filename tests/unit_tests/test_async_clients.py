@@ -0,0 +1,117 @@
+import time
+import asyncio
+import pytest
+from local_services import LocalService
+from local_services import SSO_TOKEN_PATH
+from local_services import create_sso_handler_class
+
+pytest.importorskip('aiohttp')
+
+from api_client.aio.security import AsyncSession  # noqa: E402
+from api_client.aio.job_service_client import AsyncJobServiceClient  # noqa: E402
+from api_client.aio.file_management_service_client import AsyncFileManagementServiceClient  # noqa: E402
+
+
+JOB_DURATION_IN_SECONDS = 0.5
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO, Job and File Management services
+    """
+    sso_handler_class, state = create_sso_handler_class(job_start_times={}, job_polls=0, uploads=[])
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            body = self.read_body()
+            if self.path == SSO_TOKEN_PATH:
+                self.send_token()
+            else:
+                state.uploads.append((self.headers['Content-Type'], body))
+                self.send_json(200, {'id': 'file_1'})
+
+        def do_GET(self):
+            if self.path.startswith('/job/v1/jobs/'):
+                job_id = self.path.rsplit('/', 1)[1]
+                with state.lock:
+                    state.job_polls += 1
+                    job_start_time = state.job_start_times.setdefault(job_id, time.monotonic())
+                is_running = time.monotonic() - job_start_time < JOB_DURATION_IN_SECONDS
+                self.send_json(200, {'type': 'ANALYSIS', 'status': 'RUNNING' if is_running else 'COMPLETED'})
+            else:
+                content = bytes(range(256)) * 8192
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+    return ServiceRequestHandler, state
+
+
+def test_async_job_service_client_waits_for_thousands_of_jobs():
+    handler_class, state = create_service_handler_class()
+    job_ids = [f'job_{n}' for n in range(2000)]
+
+    async def wait_jobs(base_url):
+        async with AsyncSession('user_123', 'top_secret', base_url) as session:
+            js_client = AsyncJobServiceClient(session, base_url, max_concurrent_polls=32)
+            # Duplicate job ids are awaited once
+            result = [item async for item in js_client.wait_jobs(job_ids + job_ids[:10], 60)]
+        return result
+
+    with LocalService(handler_class) as service:
+        completed_jobs = asyncio.run(wait_jobs(service.base_url))
+
+    assert sorted(job_id for job_id, job_status, wait_error in completed_jobs) == sorted(job_ids)
+    assert all(job_status['status'] == 'COMPLETED' for job_id, job_status, wait_error in completed_jobs)
+    assert all(wait_error is None for job_id, job_status, wait_error in completed_jobs)
+    # All coroutines have shared one token, which is revoked when the session is closed
+    assert len(state.issued_tokens) == 1
+    assert len(state.revoked_tokens) == 1
+    assert state.job_polls >= 2 * len(job_ids)
+
+
+def test_async_job_service_client_bounds_polls_in_every_event_loop():
+    handler_class, state = create_service_handler_class()
+    job_ids = [f'job_{n}' for n in range(4)]
+
+    with LocalService(handler_class) as service:
+        # The client is created before asyncio.run() starts the event loops its polls contend in
+        session = AsyncSession('user_123', 'top_secret', service.base_url)
+        js_client = AsyncJobServiceClient(session, service.base_url, max_concurrent_polls=1)
+
+        async def wait_jobs():
+            async with session:
+                result = [item async for item in js_client.wait_jobs(job_ids, 60)]
+            return result
+
+        completed_jobs = [asyncio.run(wait_jobs()) for _ in range(2)]
+
+    for completed_jobs_in_loop in completed_jobs:
+        assert sorted(job_id for job_id, job_status, wait_error in completed_jobs_in_loop) == job_ids
+        assert all(wait_error is None for job_id, job_status, wait_error in completed_jobs_in_loop)
+
+
+def test_async_file_management_service_client_streams_files(tmp_path):
+    handler_class, state = create_service_handler_class()
+    source_file_path = tmp_path / 'input.zip'
+    source_file_path.write_bytes(b'0123456789' * 300000)
+    destination_file_path = tmp_path / 'results.zip'
+
+    async def transfer_files(base_url):
+        async with AsyncSession('user_123', 'top_secret', base_url) as session:
+            fms_client = AsyncFileManagementServiceClient(session, base_url)
+            file_info = await fms_client.import_file(str(source_file_path), 'file', '/input')
+            await fms_client.download_analysis_result_file(42, str(destination_file_path))
+        return file_info
+
+    with LocalService(handler_class) as service:
+        file_info = asyncio.run(transfer_files(service.base_url))
+
+    assert file_info == {'id': 'file_1'}
+    content_type, body = state.uploads[0]
+    assert content_type.startswith('multipart/form-data; boundary=')
+    assert b'0123456789' * 300000 in body
+    assert b'name="path"\r\n\r\n/input\r\n' in body
+    assert destination_file_path.read_bytes() == bytes(range(256)) * 8192
+    assert not (tmp_path / 'results.zip.part').exists()
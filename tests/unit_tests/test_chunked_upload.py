@@ -0,0 +1,144 @@
+import os
+import re
+import base64
+import hashlib
+import pytest
+import requests
+from types import SimpleNamespace
+from api_client.security import Session
+from api_client.file_management_service_client import FileManagementServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+PART_SIZE = 64 * 1024
+
+
+def create_fms_handler_class(chunked_upload_supported=True, failing_part_numbers=()):
+    """
+    Creates a local stand-in of the FMS import endpoints
+    """
+    state = SimpleNamespace(
+        uploads={},
+        uploaded_part_numbers=[],
+        failing_part_numbers=set(failing_part_numbers),
+        single_shot_uploads=[],
+        imported_files={})
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            if self.path == '/fms/v1/files/job/import':
+                body = self.read_body()
+                state.single_shot_uploads.append(body)
+                self.send_json(200, [{'id': 'single-shot-file-id', 'filename': 'input.zip'}])
+                return
+
+            if not chunked_upload_supported:
+                self.read_body()
+                self.send_empty(404)
+                return
+
+            if self.path == '/fms/v1/files/job/import/uploads':
+                self.read_body()
+                upload_id = f'upload-{len(state.uploads) + 1}'
+                state.uploads[upload_id] = {}
+                self.send_json(201, {'uploadId': upload_id})
+                return
+
+            match = re.fullmatch(r'/fms/v1/files/job/import/uploads/([^/]+)/complete', self.path)
+            if match:
+                self.read_body()
+                parts = state.uploads[match.group(1)]
+                state.imported_files[match.group(1)] = b''.join(parts[number][0] for number in sorted(parts))
+                self.send_json(200, [{'id': f'{match.group(1)}-file-id', 'filename': 'input.zip'}])
+                return
+
+            self.send_empty(404)
+
+        def do_PUT(self):
+            match = re.fullmatch(r'/fms/v1/files/job/import/uploads/([^/]+)/parts/(\d+)', self.path)
+            body = self.read_body()
+            part_number = int(match.group(2))
+            if part_number in state.failing_part_numbers:
+                state.failing_part_numbers.remove(part_number)
+                self.send_empty(502)
+                return
+
+            checksum = base64.b64encode(hashlib.sha256(body).digest()).decode('ascii')
+            assert self.headers['Digest'] == f'SHA-256={checksum}'
+            state.uploads[match.group(1)][part_number] = (body, checksum)
+            state.uploaded_part_numbers.append(part_number)
+            self.send_json(200, {'partNumber': part_number, 'checksum': checksum})
+
+        def do_GET(self):
+            match = re.fullmatch(r'/fms/v1/files/job/import/uploads/([^/]+)', self.path)
+            parts = state.uploads.get(match.group(1))
+            if parts is None:
+                self.send_empty(404)
+                return
+            self.send_json(200, {
+                'parts': [{'partNumber': number, 'checksum': part[1]} for number, part in parts.items()]})
+
+    return FmsRequestHandler, state
+
+
+def create_fms_client(base_url):
+    session = Session('user_123', 'top_secret', base_url)
+    session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+    result = FileManagementServiceClient(session, base_url)
+    return result
+
+
+def create_input_file(tmp_path, size):
+    content = os.urandom(size)
+    input_file_path = tmp_path / 'input.zip'
+    input_file_path.write_bytes(content)
+    return str(input_file_path), content
+
+
+def test_import_file_in_parts(tmp_path):
+    input_file_path, expected = create_input_file(tmp_path, PART_SIZE * 5 + 123)
+    handler_class, state = create_fms_handler_class()
+
+    with LocalService(handler_class) as fms:
+        fms_client = create_fms_client(fms.base_url)
+        actual = fms_client.import_file_in_parts(
+            input_file_path, 'input.zip', 'raw', PART_SIZE, 3, str(tmp_path / 'uploads'))
+
+    assert actual[0]['id'] == 'upload-1-file-id'
+    assert state.imported_files['upload-1'] == expected
+    assert sorted(state.uploaded_part_numbers) == [1, 2, 3, 4, 5, 6]
+    assert os.listdir(tmp_path / 'uploads') == []
+
+
+def test_import_file_in_parts_resumes_interrupted_upload(tmp_path):
+    input_file_path, expected = create_input_file(tmp_path, PART_SIZE * 4)
+    handler_class, state = create_fms_handler_class(failing_part_numbers=[3])
+    state_dir = str(tmp_path / 'uploads')
+
+    with LocalService(handler_class) as fms:
+        fms_client = create_fms_client(fms.base_url)
+        with pytest.raises(requests.HTTPError):
+            fms_client.import_file_in_parts(input_file_path, 'input.zip', 'raw', PART_SIZE, 1, state_dir)
+        assert 3 not in state.uploaded_part_numbers
+
+        actual = fms_client.import_file_in_parts(input_file_path, 'input.zip', 'raw', PART_SIZE, 1, state_dir)
+
+    # Parts received before the failure are not uploaded again
+    assert actual[0]['id'] == 'upload-1-file-id'
+    assert sorted(state.uploaded_part_numbers) == [1, 2, 3, 4]
+    assert state.imported_files['upload-1'] == expected
+
+
+def test_import_file_in_parts_falls_back_to_single_shot_upload(tmp_path):
+    input_file_path, expected = create_input_file(tmp_path, PART_SIZE * 2)
+    handler_class, state = create_fms_handler_class(chunked_upload_supported=False)
+
+    with LocalService(handler_class) as fms:
+        fms_client = create_fms_client(fms.base_url)
+        actual = fms_client.import_file_in_parts(
+            input_file_path, 'input.zip', 'raw', PART_SIZE, 2, str(tmp_path / 'uploads'))
+
+    assert actual[0]['id'] == 'single-shot-file-id'
+    assert len(state.single_shot_uploads) == 1
+    assert expected in state.single_shot_uploads[0]
+    assert state.uploaded_part_numbers == []
@@ -0,0 +1,106 @@
+import time
+import pytest
+from api_client.connectivity_probe import ConnectivityProbe
+from api_client.connectivity_probe import run_probes
+from api_client.connectivity_probe import get_percentile
+from api_client.connectivity_probe import get_ca_bundle_path
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+import apic
+
+RESPONSE_DELAY_IN_SECONDS = 0.2
+
+
+class SlowPingRequestHandler(LocalServiceRequestHandler):
+    def do_GET(self):
+        time.sleep(RESPONSE_DELAY_IN_SECONDS)
+        if self.path == '/missing/docs/':
+            self.send_empty(404)
+        else:
+            self.send_json(200, {'docs': 'x' * 100000})
+
+
+def test_run_probes_concurrently_with_timings_breakdown():
+    with LocalService(SlowPingRequestHandler) as service:
+        probes = [
+            ConnectivityProbe('First', f'{service.base_url}/first/docs/'),
+            ConnectivityProbe('Second', f'{service.base_url}/second/docs/'),
+            ConnectivityProbe('Missing', f'{service.base_url}/missing/docs/')]
+
+        begin_time = time.perf_counter()
+        actual = run_probes(probes, repeat=2)
+        duration = time.perf_counter() - begin_time
+
+    # Total time is set by the slowest endpoint rather than by the sum
+    assert duration < RESPONSE_DELAY_IN_SECONDS * 2 * 2
+    assert [report['passed'] for report in actual] == [True, True, False]
+    assert [report['status_code'] for report in actual] == [200, 200, 404]
+    for report in actual:
+        timings = report['timings_in_ms']
+        assert report['proxy'] is None
+        assert report['samples'] == 2 and report['failed_samples'] == 0
+        assert timings['tls'] == {'p50': 0, 'p99': 0}
+        assert timings['ttfb']['p50'] >= RESPONSE_DELAY_IN_SECONDS * 1000
+        assert timings['total']['p99'] >= timings['total']['p50'] >= timings['ttfb']['p50']
+
+
+def test_probe_reports_connection_error():
+    with LocalService(SlowPingRequestHandler) as service:
+        url = f'{service.base_url}/first/docs/'
+
+    # The service is stopped
+    actual = ConnectivityProbe('Stopped', url, timeout_in_seconds=1).run()
+
+    assert actual['passed'] is False
+    assert actual['failed_samples'] == 1
+    assert actual['error'].startswith('ConnectionRefusedError')
+    assert actual['timings_in_ms']['total'] == {'p50': None, 'p99': None}
+
+
+def test_probe_goes_through_proxy_from_environment(monkeypatch):
+    proxied_paths = []
+
+    class ProxyRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            proxied_paths.append(self.path)
+            self.send_empty(200)
+
+    with LocalService(ProxyRequestHandler) as proxy:
+        monkeypatch.setenv('HTTP_PROXY', proxy.base_url)
+        monkeypatch.delenv('NO_PROXY', raising=False)
+        monkeypatch.delenv('no_proxy', raising=False)
+        actual = ConnectivityProbe('Proxied', 'http://service.invalid/docs/').run()
+
+    assert actual['passed'] is True
+    assert actual['proxy'] == proxy.base_url.split('//', 1)[1]
+    # Plain HTTP requests are sent to the proxy with the absolute URL
+    assert proxied_paths == ['http://service.invalid/docs/']
+
+
+def test_ca_bundle_is_taken_from_environment(monkeypatch):
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', '/etc/company/ca.pem')
+    assert get_ca_bundle_path() == '/etc/company/ca.pem'
+
+    monkeypatch.delenv('REQUESTS_CA_BUNDLE')
+    monkeypatch.delenv('CURL_CA_BUNDLE', raising=False)
+    assert get_ca_bundle_path().endswith('.pem')
+
+
+def test_repeat_must_be_positive():
+    with pytest.raises(ValueError):
+        ConnectivityProbe('Any', 'http://127.0.0.1:9/docs/').run(repeat=0)
+
+    arg_parser = apic.create_arg_parser()
+    assert arg_parser.parse_args(['--test-connect', '--repeat', '3']).repeat == 3
+    for repeat in ['0', '-1', 'x']:
+        with pytest.raises(SystemExit):
+            arg_parser.parse_args(['--test-connect', '--repeat', repeat])
+
+
+def test_get_percentile():
+    values = list(range(1, 101))
+
+    assert get_percentile(values, 50) == 50
+    assert get_percentile(values, 99) == 99
+    assert get_percentile([7], 99) == 7
+    assert get_percentile([], 50) is None
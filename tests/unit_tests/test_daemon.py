@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+import logging
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from api_client.daemon import DaemonClient
+from api_client.daemon import ThreadOutputRouter
+from api_client.daemon import is_daemon_supported
+from local_services import LocalService
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+pytestmark = pytest.mark.skipif(not is_daemon_supported(), reason='Unix domain sockets are not supported')
+
+REQUEST_COUNT = 16
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO and Job services
+    """
+    sso_handler_class, state = create_sso_handler_class(job_polls=0)
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_GET(self):
+            with state.lock:
+                state.job_polls += 1
+            # Slow enough for the requests to overlap
+            time.sleep(0.2)
+            self.send_json(200, {'type': 'ANALYSIS', 'status': 'COMPLETED'})
+
+    return ServiceRequestHandler, state
+
+
+def wait_for_daemon(socket_path):
+    for _ in range(100):
+        if DaemonClient(socket_path).is_running():
+            return
+        time.sleep(0.05)
+    raise TimeoutError('Daemon has not started.')
+
+
+def test_commands_are_forwarded_to_daemon_sharing_one_session(tmp_path, monkeypatch, capsys):
+    handler_class, state = create_service_handler_class()
+    socket_path = str(tmp_path / 'apic.sock')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv(apic.DAEMON_SOCKET_ENV_VAR_NAME, socket_path)
+
+    with LocalService(handler_class) as service:
+        configure_local_services(tmp_path, service.base_url)
+
+        serve_args = apic.create_arg_parser(is_command_names=['serve']).parse_args(['serve'])
+        daemon_thread = threading.Thread(target=apic.execute_command, args=(str(tmp_path), serve_args))
+        daemon_thread.start()
+        wait_for_daemon(socket_path)
+
+        wait_arg_parser = apic.create_arg_parser(is_command_names=['wait'])
+
+        def forward_wait(n):
+            args = wait_arg_parser.parse_args(
+                ['wait', '--job-id', f'job_{n}', '--login', 'user_123', '--password', 'top_secret'])
+            return apic.forward_to_daemon(str(tmp_path), args)
+
+        with ThreadPoolExecutor(max_workers=REQUEST_COUNT) as executor:
+            exit_codes = list(executor.map(forward_wait, range(REQUEST_COUNT)))
+
+        serve_arg_parser = apic.create_arg_parser(is_command_names=['serve'])
+        assert apic.execute_command(str(tmp_path), serve_arg_parser.parse_args(['serve', '--status'])) == 0
+        printed_status = capsys.readouterr().out
+        assert apic.execute_command(str(tmp_path), serve_arg_parser.parse_args(['serve', '--stop'])) == 0
+        daemon_thread.join(10)
+
+    assert exit_codes == [0] * REQUEST_COUNT
+    assert state.job_polls == REQUEST_COUNT
+    # All commands have shared the session of the daemon, which is closed when the daemon stops
+    assert len(state.issued_tokens) == 1
+    assert len(state.revoked_tokens) == 1
+    assert not daemon_thread.is_alive()
+    assert not os.path.exists(socket_path)
+    assert '"wait"' in printed_status and '"sessions": 1' in printed_status
+
+
+def test_daemon_rejects_commands_it_cannot_run(tmp_path, monkeypatch):
+    handler_class, state = create_service_handler_class()
+    socket_path = str(tmp_path / 'apic.sock')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv(apic.DAEMON_SOCKET_ENV_VAR_NAME, socket_path)
+    log_level = logging.getLogger().level
+
+    with LocalService(handler_class) as service:
+        configure_local_services(tmp_path, service.base_url)
+
+        serve_args = apic.create_arg_parser(is_command_names=['serve']).parse_args(['serve'])
+        daemon_thread = threading.Thread(target=apic.execute_command, args=(str(tmp_path), serve_args))
+        daemon_thread.start()
+        wait_for_daemon(socket_path)
+
+        try:
+            rejected_messages = list(DaemonClient(socket_path).send({
+                'type': 'serve',
+                'args': dict(serve_args.__dict__, login='user_123', password='top_secret'),
+                'current_dir': str(tmp_path)}))
+
+            # The daemon keeps its sessions for the commands which follow
+            wait_args = apic.create_arg_parser(is_command_names=['wait']).parse_args(
+                ['wait', '--job-id', 'job_1', '--login', 'user_123', '--password', 'top_secret', '--debug'])
+            wait_exit_code = apic.forward_to_daemon(str(tmp_path), wait_args)
+        finally:
+            DaemonClient(socket_path).send({'type': 'stop'})
+            daemon_thread.join(10)
+
+    assert rejected_messages == [
+        {'error': "Command 'serve' cannot be run by the daemon."},
+        {'exit_code': 1}]
+    assert wait_exit_code == 0
+    assert state.job_polls == 1
+    # --debug of one request does not change the log level of the others
+    assert logging.getLogger().level == log_level
+
+
+def test_output_of_threads_started_by_request_is_routed_to_client():
+    output_router = ThreadOutputRouter()
+    messages = []
+    output_router.install()
+    try:
+        with output_router.route(messages.append):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda n: logging.warning(f'Part {n} has been uploaded.'), range(2)))
+            worker_thread = threading.Thread(target=time.sleep, args=(0.2,))
+            worker_thread.start()
+
+        # The request has finished; its remaining threads write to the daemon's output
+        assert output_router.send_message_functions == {}
+        worker_thread.join()
+    finally:
+        output_router.uninstall()
+
+    assert sorted(message['log']['message'] for message in messages) == [
+        'Part 0 has been uploaded.', 'Part 1 has been uploaded.']
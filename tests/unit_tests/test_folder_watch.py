@@ -0,0 +1,111 @@
+import os
+import time
+from api_client.folder_watch import FolderWatch
+from local_services import LocalService
+from local_services import SSO_TOKEN_PATH
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+
+def test_files_are_ready_once_stable_or_marked(tmp_path):
+    folder_watch = FolderWatch(str(tmp_path), stable_time_in_seconds=0.2)
+    (tmp_path / 'stable.zip').write_bytes(b'stable')
+    (tmp_path / 'marked.zip').write_bytes(b'marked')
+    (tmp_path / 'marked.zip.done').write_bytes(b'')
+    (tmp_path / 'notes.txt').write_bytes(b'ignored')
+
+    # The marked file is ready right away, the other one is being watched for changes
+    assert folder_watch.poll() == [str(tmp_path / 'marked.zip')]
+    assert folder_watch.get_unready_file_count() == 1
+
+    # A file which is still being written is not reported until it stops changing
+    time.sleep(0.1)
+    with open(tmp_path / 'stable.zip', 'ab') as stable_file:
+        stable_file.write(b' and growing')
+    assert folder_watch.poll() == []
+    time.sleep(0.3)
+    assert folder_watch.poll() == [str(tmp_path / 'stable.zip')]
+    assert folder_watch.poll() == []
+
+    # Files are reported again once they have been moved away and dropped anew
+    os.remove(tmp_path / 'marked.zip')
+    folder_watch.poll()
+    (tmp_path / 'marked.zip').write_bytes(b'marked again')
+    assert folder_watch.poll() == [str(tmp_path / 'marked.zip')]
+
+
+def test_marker_can_be_required(tmp_path):
+    folder_watch = FolderWatch(str(tmp_path), stable_time_in_seconds=0, require_marker=True)
+    (tmp_path / 'input.zip').write_bytes(b'input')
+
+    assert folder_watch.poll() == []
+    assert folder_watch.poll() == []
+    (tmp_path / 'input.zip.done').write_bytes(b'')
+    assert folder_watch.poll() == [str(tmp_path / 'input.zip')]
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO, File Management, Dictionary and Job services.
+    Import jobs of the files named 'bad*.zip' fail.
+    """
+    sso_handler_class, state = create_sso_handler_class(uploads=0)
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            body = self.read_body()
+            if self.path == SSO_TOKEN_PATH:
+                self.send_token()
+            elif self.path == '/fms/v1/files/job/import':
+                with state.lock:
+                    state.uploads += 1
+                    file_id = 'bad' if b'bad' in body else f'file_{state.uploads}'
+                self.send_json(200, [{'id': file_id, 'filename': file_id}])
+            else:
+                file_id = self.path.split('/')[4]
+                self.send_json(200, {'jobId': f'job_{file_id}'})
+
+        def do_GET(self):
+            if self.path.startswith('/job/v1/jobs/'):
+                job_id = self.path.rsplit('/', 1)[1]
+                self.send_json(200, {'type': 'IMPORT', 'status': 'FAILED' if 'bad' in job_id else 'COMPLETED'})
+            else:
+                content = b'error zip'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+    return ServiceRequestHandler, state
+
+
+def test_watch_imports_files_and_sorts_them_out(tmp_path, monkeypatch):
+    handler_class, state = create_service_handler_class()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    input_dir = tmp_path / 'inbox'
+    input_dir.mkdir()
+    for file_name in ['first.zip', 'second.zip', 'bad.zip']:
+        (input_dir / file_name).write_bytes(f'{file_name} content'.encode('utf-8'))
+    (input_dir / 'bad.zip.done').write_bytes(b'')
+
+    with LocalService(handler_class) as service:
+        configure_local_services(
+            tmp_path,
+            service.base_url,
+            ['watch_poll_interval_in_seconds = 0.05', 'watch_stable_time_in_seconds = 0'])
+
+        watch_args = apic.create_arg_parser(is_command_names=['watch']).parse_args([
+            'watch', '--input-dir', str(input_dir), '--once', '--login', 'user', '--password', 'password'])
+        exit_code = apic.execute_command(str(tmp_path), watch_args)
+
+    # The failed file makes the run fail
+    assert exit_code == 1
+    # All files have been imported in one session
+    assert state.uploads == 3
+    assert len(state.issued_tokens) == 1
+    assert sorted(os.listdir(input_dir / 'processed')) == ['first.zip', 'second.zip']
+    assert sorted(os.listdir(input_dir / 'failed')) == [
+        'bad.zip', 'bad.zip.error.txt', 'job_IMPORT_job_bad_errors.zip']
+    assert 'job_IMPORT_job_bad_errors.zip' in (input_dir / 'failed' / 'bad.zip.error.txt').read_text()
+    assert sorted(os.listdir(input_dir)) == ['failed', 'processed']
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from api_client.http_transport import HttpTransport
+from api_client.http_transport import HttpTransportSettings
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of a service recording the client port and the Connection header of every request
+    """
+    state = SimpleNamespace(requests=[])
+
+    class ServiceRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            state.requests.append((self.client_address[1], self.headers.get('Connection')))
+            self.send_json(200, {'status': 'OK'})
+
+    return ServiceRequestHandler, state
+
+
+def test_sequential_requests_reuse_connection():
+    handler_class, state = create_service_handler_class()
+
+    with LocalService(handler_class) as service, HttpTransport() as transport:
+        for _ in range(2):
+            transport.get(f'{service.base_url}/job/v1/jobs/1').raise_for_status()
+
+    (first_client_port, first_connection), (second_client_port, second_connection) = state.requests
+    assert first_client_port == second_client_port
+    assert first_connection == second_connection == 'keep-alive'
+
+
+def test_connection_is_closed_after_each_request_without_keep_alive():
+    handler_class, state = create_service_handler_class()
+
+    with LocalService(handler_class) as service, \
+            HttpTransport(HttpTransportSettings(keep_alive=False)) as transport:
+        for _ in range(2):
+            transport.get(f'{service.base_url}/job/v1/jobs/1').raise_for_status()
+
+    (first_client_port, first_connection), (second_client_port, second_connection) = state.requests
+    assert first_client_port != second_client_port
+    assert first_connection == second_connection == 'close'
@@ -0,0 +1,54 @@
+from api_client.job_polling import JobPollScheduler
+from api_client.job_polling import JobDurationHistory
+from api_client.job_polling import parse_retry_after
+
+
+def test_next_delay_backs_off_up_to_max_interval():
+    poll_scheduler = JobPollScheduler(min_interval_in_seconds=1, max_interval_in_seconds=10)
+
+    actual = [poll_scheduler.next_delay(elapsed_seconds=0) for _ in range(20)]
+
+    assert actual[0] <= 1.2
+    assert max(actual) <= 12
+    assert actual[-1] >= 8
+
+
+def test_next_delay_polls_densely_around_predicted_finish():
+    poll_scheduler = JobPollScheduler(
+        predicted_duration_in_seconds=600,
+        min_interval_in_seconds=1,
+        max_interval_in_seconds=60)
+    for _ in range(20):
+        poll_scheduler.next_delay(elapsed_seconds=100)
+
+    # The back off does not sleep through the beginning of the predicted finish window
+    actual = poll_scheduler.next_delay(elapsed_seconds=535)
+    assert actual <= 5 * 1.2
+    actual = poll_scheduler.next_delay(elapsed_seconds=600)
+    assert actual <= 1.2
+
+
+def test_next_delay_honours_retry_after():
+    poll_scheduler = JobPollScheduler()
+
+    actual = poll_scheduler.next_delay(elapsed_seconds=0, retry_after_seconds=30)
+
+    assert actual == 30
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+
+def test_job_duration_history(tmp_path):
+    job_duration_history = JobDurationHistory(str(tmp_path / 'job_history.json'))
+    assert job_duration_history.predict_duration('DataImport') is None
+
+    for duration in [10, 30, 20]:
+        job_duration_history.record('DataImport', duration)
+
+    actual = job_duration_history.predict_duration('DataImport')
+    assert actual == 20
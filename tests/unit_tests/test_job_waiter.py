@@ -0,0 +1,156 @@
+import time
+import threading
+import pytest
+from api_client.job_waiter import JobWaiter
+
+
+class FakeJobServiceClient(object):
+    """
+    Job service client whose jobs finish after the number of polls given by the job id (its part before '_').
+    Every poll takes a while, so the polls sent at once overlap.
+    """
+    def __init__(self, poll_duration_in_seconds=0.05):
+        self.poll_duration_in_seconds = poll_duration_in_seconds
+        self.poll_counts = {}
+        self.concurrent_polls = 0
+        self.max_concurrent_polls = 0
+        self.lock = threading.Lock()
+
+    def poll_job(self, job_id):
+        with self.lock:
+            self.poll_counts[job_id] = self.poll_counts.get(job_id, 0) + 1
+            self.concurrent_polls += 1
+            self.max_concurrent_polls = max(self.max_concurrent_polls, self.concurrent_polls)
+            poll_count = self.poll_counts[job_id]
+
+        try:
+            time.sleep(self.poll_duration_in_seconds)
+        finally:
+            with self.lock:
+                self.concurrent_polls -= 1
+
+        status = 'RUNNING' if poll_count < int(job_id.split('_')[0]) else 'COMPLETED'
+        return {'status': status, 'type': 'DataImport'}, None
+
+
+class FakeJobDurationHistory(object):
+    def __init__(self, predicted_duration_in_seconds=None):
+        self.predicted_duration_in_seconds = predicted_duration_in_seconds
+        self.predicted_job_types = []
+        self.records = []
+
+    def predict_duration(self, job_type):
+        self.predicted_job_types.append(job_type)
+        return self.predicted_duration_in_seconds
+
+    def record(self, job_type, duration_in_seconds):
+        self.records.append((job_type, duration_in_seconds))
+
+
+def test_iter_completed_merges_duplicate_jobs():
+    js_client = FakeJobServiceClient()
+    job_waiter = JobWaiter(js_client, wait_timeout_in_seconds=60, max_concurrent_polls=2)
+    for job_id in ['2', '1', '2', '1']:
+        job_waiter.add(job_id)
+
+    actual = [job_id for job_id, job_status, wait_error in job_waiter.iter_completed()]
+
+    assert actual == ['1', '2']
+    assert js_client.poll_counts == {'1': 1, '2': 2}
+    assert js_client.max_concurrent_polls <= 2
+
+
+def test_iter_completed_bounds_concurrent_polls():
+    js_client = FakeJobServiceClient()
+    job_waiter = JobWaiter(js_client, wait_timeout_in_seconds=60, max_concurrent_polls=3)
+    job_ids = [f'1_{n}' for n in range(10)]
+    for job_id in job_ids:
+        job_waiter.add(job_id)
+
+    actual = [job_id for job_id, job_status, wait_error in job_waiter.iter_completed()]
+
+    assert sorted(actual) == sorted(job_ids)
+    assert js_client.max_concurrent_polls == 3
+
+
+def test_iter_completed_accepts_jobs_added_while_waiting():
+    js_client = FakeJobServiceClient()
+    job_waiter = JobWaiter(js_client, wait_timeout_in_seconds=60, max_concurrent_polls=4)
+    job_waiter.add('1')
+
+    actual = []
+    for job_id, job_status, wait_error in job_waiter.iter_completed():
+        actual.append(job_id)
+        if job_id == '1':
+            job_waiter.add('2')
+
+    assert actual == ['1', '2']
+    assert len(job_waiter) == 0
+
+
+def test_only_jobs_awaited_from_submission_are_recorded_in_history():
+    job_duration_history = FakeJobDurationHistory()
+    job_waiter = JobWaiter(
+        FakeJobServiceClient(), wait_timeout_in_seconds=60, job_duration_history=job_duration_history)
+    # The job awaited by id has been submitted some time before; its wait duration is not its duration
+    job_waiter.add('1_resumed')
+    job_waiter.add('1_submitted', time.monotonic() - 30)
+
+    actual = sorted(job_id for job_id, job_status, wait_error in job_waiter.iter_completed())
+
+    assert actual == ['1_resumed', '1_submitted']
+    assert len(job_duration_history.records) == 1
+    job_type, duration_in_seconds = job_duration_history.records[0]
+    assert job_type == 'DataImport'
+    assert 30 <= duration_in_seconds < 40
+
+
+def test_failed_wait_is_reported_as_outcome_of_its_job():
+    class RefusingJobServiceClient(FakeJobServiceClient):
+        def poll_job(self, job_id):
+            if job_id == 'refused':
+                raise RuntimeError('403 Client Error: Forbidden')
+            return super().poll_job(job_id)
+
+    # The job still running after the timeout fails on its own, the others are awaited as usual
+    job_waiter = JobWaiter(RefusingJobServiceClient(), wait_timeout_in_seconds=0.5, max_concurrent_polls=2)
+    for job_id in ['2_finishing', 'refused', '1000_running']:
+        job_waiter.add(job_id)
+
+    actual = {
+        job_id: (job_status['status'] if job_status else None, type(wait_error).__name__ if wait_error else None)
+        for job_id, job_status, wait_error in job_waiter.iter_completed()}
+
+    assert actual == {
+        '2_finishing': ('COMPLETED', None),
+        'refused': (None, 'RuntimeError'),
+        '1000_running': (None, 'JobWaitTimeoutError')}
+    assert len(job_waiter) == 0
+
+
+def test_max_concurrent_polls_must_be_positive():
+    with pytest.raises(ValueError, match='at least 1'):
+        JobWaiter(FakeJobServiceClient(), wait_timeout_in_seconds=60, max_concurrent_polls=0)
+
+
+def test_predicted_finish_window_is_counted_from_submission():
+    job_duration_history = FakeJobDurationHistory(predicted_duration_in_seconds=30)
+    job_waiter = JobWaiter(
+        FakeJobServiceClient(), wait_timeout_in_seconds=3600, job_duration_history=job_duration_history)
+    wait_begin_time = time.monotonic()
+    # The job submitted 26 s ago is inside its predicted finish window although its wait has just begun
+    job_waiter.add('late', wait_begin_time - 26)
+    job_waiter.add('by_id')
+
+    for job_id in ['late', 'by_id']:
+        # Both waits have backed off to polling every 20 s
+        job_waiter.job_wait_states[job_id].poll_scheduler.interval_in_seconds = 20
+        job_waiter.handle_poll_result(job_id, time.monotonic(), {'status': 'RUNNING', 'type': 'DataImport'}, None)
+
+    next_poll_delays = {}
+    for poll_time, sequence, job_id in job_waiter.poll_queue:
+        next_poll_delays[job_id] = max(next_poll_delays.get(job_id, 0), poll_time - wait_begin_time)
+    assert next_poll_delays['late'] < 2
+    # The finish time of the job awaited by id is not predicted
+    assert next_poll_delays['by_id'] >= 16
+    assert job_duration_history.predicted_job_types == ['DataImport']
@@ -0,0 +1,155 @@
+import json
+import threading
+import pytest
+from api_client.http_transport import HttpTransport
+from api_client.http_transport import HttpTransportSettings
+from api_client.retry_policy import RetryPolicy
+from api_client.metrics import RequestMetrics
+from api_client.metrics import get_endpoint_path
+from api_client.metrics import write_prometheus_textfile
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+from local_services import SSO_TOKEN_PATH
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+
+def test_endpoint_path_has_ids_replaced():
+    assert get_endpoint_path('https://api/job/v1/jobs/123?verbose=true') == '/job/v1/jobs/{id}'
+    assert get_endpoint_path('https://api/fms/v1/files/job/analyses/7f3c-2b') == '/fms/v1/files/job/analyses/{id}'
+    assert get_endpoint_path('https://sso/sso-api/v1/token') == '/sso-api/v1/token'
+
+
+def test_latency_quantiles_are_estimated_from_histogram():
+    metrics = RequestMetrics(latency_buckets_in_seconds=[0.1, 1])
+    for duration in [0.05] * 50 + [0.5] * 49 + [3]:
+        metrics.record_request('GET', 'https://api/job/v1/jobs/1', 200, duration)
+
+    endpoint_stats = metrics.get_stats()['GET /job/v1/jobs/{id}']
+    assert endpoint_stats['latency_buckets'] == {'0.1': 50, '1': 99, '+Inf': 100}
+    assert endpoint_stats['latency_p50_in_seconds'] == pytest.approx(0.1)
+    assert 0.1 < endpoint_stats['latency_p90_in_seconds'] < 1
+    assert endpoint_stats['latency_max_in_seconds'] == 3
+
+
+def test_requests_are_recorded_per_endpoint():
+    attempts = []
+
+    class RequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            attempts.append(self.path)
+            # The first attempt of every job status request fails
+            if attempts.count(self.path) == 1:
+                self.send_json(503, {})
+            else:
+                self.send_json(200, {'status': 'COMPLETED'})
+
+        def do_POST(self):
+            self.read_body()
+            self.send_json(200, {'jobId': 'job_1'})
+
+    settings = HttpTransportSettings(retry_policy=RetryPolicy(min_delay_in_seconds=0))
+    with LocalService(RequestHandler) as service, HttpTransport(settings) as transport:
+        transport.get(f'{service.base_url}/job/v1/jobs/1')
+        transport.get(f'{service.base_url}/job/v1/jobs/2')
+        transport.post(f'{service.base_url}/dictionary/v1/import/file_1/jobs', json={'name': 'portfolio'})
+        transport.post(f'{service.base_url}/fms/v1/files/job/import', data=iter([b'part_1', b'part_2']))
+        with pytest.raises(Exception):
+            transport.get('http://127.0.0.1:9/job/v1/jobs/3', timeout=1)
+
+    stats = transport.metrics.get_stats()
+    job_stats = stats['GET /job/v1/jobs/{id}']
+    assert job_stats['requests'] == 8
+    assert job_stats['retries'] == 5
+    assert job_stats['status_codes'] == {'503': 2, '200': 2, 'error': 4}
+    assert job_stats['bytes_received'] == 2 * len(json.dumps({})) + 2 * len(json.dumps({'status': 'COMPLETED'}))
+    assert stats['POST /dictionary/v1/import/{id}/jobs']['bytes_sent'] == len(json.dumps({'name': 'portfolio'}))
+    assert stats['POST /fms/v1/files/job/import']['bytes_sent'] == len(b'part_1part_2')
+
+    prometheus_text = '\n'.join(transport.metrics.format_prometheus({'command': 'test'}))
+    assert 'apic_http_requests_total{command="test",method="GET",endpoint="/job/v1/jobs/{id}",code="503"} 2' \
+        in prometheus_text
+    assert 'apic_http_request_duration_seconds_bucket{command="test",method="GET",endpoint="/job/v1/jobs/{id}",' \
+        'le="+Inf"} 8' in prometheus_text
+
+
+def test_import_writes_run_report_and_metrics_textfile(tmp_path, monkeypatch):
+    sso_handler_class, state = create_sso_handler_class(job_polls=[])
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            self.read_body()
+            if self.path == SSO_TOKEN_PATH:
+                self.send_token()
+            elif self.path == '/fms/v1/files/job/import':
+                self.send_json(200, [{'id': 'file_1', 'filename': 'input.zip'}])
+            else:
+                self.send_json(200, {'jobId': 'job_1'})
+
+        def do_GET(self):
+            with state.lock:
+                state.job_polls.append(self.path)
+                status = 'COMPLETED' if len(state.job_polls) > 1 else 'RUNNING'
+            self.send_json(200, {'type': 'IMPORT', 'status': status})
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+    (tmp_path / 'input.zip').write_bytes(b'portfolio' * 1000)
+    metrics_dir = tmp_path / 'textfile_collector'
+
+    with LocalService(ServiceRequestHandler) as service:
+        configure_local_services(tmp_path, service.base_url, [f'metrics_textfile_dir = "{metrics_dir}"'])
+
+        import_args = apic.create_arg_parser(is_command_names=['import']).parse_args([
+            'import', '--input-zip', str(tmp_path / 'input.zip'), '--report-json', str(tmp_path / 'report.json'),
+            '--login', 'user', '--password', 'password'])
+        assert apic.execute_command(str(tmp_path), import_args) == 0
+
+    report = json.loads((tmp_path / 'report.json').read_text())
+    assert report['command'] == 'import'
+    assert report['status'] == 'succeeded'
+    steps = {step['name']: step for step in report['steps']}
+    assert list(steps) == ['import upload', 'import job submission', 'import job wait', 'import job validation']
+    assert steps['import job wait']['duration_in_seconds'] > 0
+    assert report['requests']['GET /job/v1/jobs/{id}']['requests'] == 2
+    assert report['requests']['POST /fms/v1/files/job/import']['bytes_sent'] > 9000
+    # The token is revoked when the session is closed, before the report is written
+    assert report['requests']['DELETE /sso-api/v1/token']['status_codes'] == {'204': 1}
+
+    prometheus_text = (metrics_dir / 'apic_import.prom').read_text()
+    assert 'apic_command_success{command="import"} 1' in prometheus_text
+    assert 'apic_step_duration_seconds{command="import",step="import job wait"}' in prometheus_text
+    assert '# TYPE apic_http_request_duration_seconds histogram' in prometheus_text
+
+
+def test_textfile_is_written_by_concurrent_commands(tmp_path):
+    file_path = str(tmp_path / 'apic_import.prom')
+
+    def write(writer_number):
+        for write_number in range(50):
+            write_prometheus_textfile(file_path, [f'apic_command_success{{writer="{writer_number}"}} 1'] * 100)
+
+    writers = [threading.Thread(target=write, args=(writer_number,)) for writer_number in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    lines = (tmp_path / 'apic_import.prom').read_text().splitlines()
+    assert len(lines) == 100 and len(set(lines)) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ['apic_import.prom']
+
+
+def test_failed_command_is_reported(tmp_path):
+    report_file_path = tmp_path / 'report.json'
+
+    with pytest.raises(apic.ApicError):
+        with apic.CommandReport('run-analysis', str(report_file_path)) as command_report:
+            with command_report.step_timings.measure('analysis job wait'):
+                raise apic.ApicError('Job wait has been terminated by timeout.')
+
+    report = json.loads(report_file_path.read_text())
+    assert report['status'] == 'failed'
+    assert report['error'] == 'Job wait has been terminated by timeout.'
+    assert report['steps'][0]['name'] == 'analysis job wait'
+    assert report['requests'] == {}
@@ -0,0 +1,59 @@
+import os
+import hashlib
+import email.parser
+import email.policy
+import requests
+from types import SimpleNamespace
+from api_client.security import Session
+from api_client.file_management_service_client import FileManagementServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+
+def parse_multipart_form(content_type, body):
+    """
+    Parses the multipart/form-data body
+    :return: Name, file name and content of every part
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+    assert message.is_multipart()
+    result = [
+        (part.get_param('name', header='content-disposition'), part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()]
+    return result
+
+
+def test_streamed_body_is_the_same_form_as_requests_files(tmp_path):
+    file_content = os.urandom(200 * 1024) + b'\r\n--not-a-boundary\r\n'
+    source_file_path = tmp_path / 'portfolio "q1".csv'
+    source_file_path.write_bytes(file_content)
+    state = SimpleNamespace(requests=[])
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            state.requests.append((self.headers, self.read_body()))
+            self.send_json(200, [{'id': 'file_1', 'filename': 'portfolio.csv'}])
+
+    with LocalService(FmsRequestHandler) as service:
+        session = Session('user_123', 'top_secret', service.base_url)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+        content_hash = hashlib.sha256()
+        FileManagementServiceClient(session, service.base_url).import_file(
+            str(source_file_path), 'file', '/imports/q1', content_hash)
+
+    headers, body = state.requests[0]
+    # Content-Length is the length of the encoder and matches the bytes sent
+    assert headers.get('Transfer-Encoding') is None
+    assert int(headers['Content-Length']) == len(body)
+    assert content_hash.hexdigest() == hashlib.sha256(file_content).hexdigest()
+
+    expected_request = requests.Request(
+        'POST',
+        service.base_url,
+        data={'path': '/imports/q1'},
+        files={'file': ('portfolio "q1".csv', file_content)}).prepare()
+    expected = parse_multipart_form(expected_request.headers['Content-Type'], expected_request.body)
+    actual = parse_multipart_form(headers['Content-Type'], body)
+    assert actual == expected
+    assert actual[1][2] == file_content
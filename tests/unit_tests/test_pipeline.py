@@ -0,0 +1,99 @@
+import json
+import time
+from local_services import LocalService
+from local_services import SSO_TOKEN_PATH
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+SLOW_ANALYSIS_DURATION_IN_SECONDS = 1.5
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO, File Management, Dictionary, Project and Job services.
+    The import job completes with errors. Analysis 'fast' completes at once, 'slow' after a while
+    and 'bad' fails; the error file of 'bad' cannot be downloaded.
+    """
+    sso_handler_class, state = create_sso_handler_class(submitted_analyses=[], job_submit_times={}, events={})
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            self.read_body()
+            if self.path == SSO_TOKEN_PATH:
+                self.send_token()
+            elif self.path == '/fms/v1/files/job/import':
+                self.send_json(200, [{'id': 'file_1', 'filename': 'input.zip'}])
+            elif self.path.startswith('/dictionary/'):
+                self.send_json(200, {'jobId': 'job_import'})
+            else:
+                analysis_id = self.path.split('/')[4]
+                with state.lock:
+                    state.submitted_analyses.append(analysis_id)
+                    state.job_submit_times[f'job_{analysis_id}'] = time.monotonic()
+                self.send_json(200, {'jobId': f'job_{analysis_id}'})
+
+        def do_GET(self):
+            if self.path == '/job/v1/jobs/job_import':
+                self.send_json(200, {'type': 'IMPORT', 'status': 'COMPLETED_WITH_ERRORS'})
+            elif self.path.startswith('/job/v1/jobs/'):
+                job_id = self.path.rsplit('/', 1)[1]
+                status = 'FAILED' if job_id == 'job_bad' else 'COMPLETED'
+                if job_id == 'job_slow':
+                    with state.lock:
+                        if time.monotonic() - state.job_submit_times[job_id] < SLOW_ANALYSIS_DURATION_IN_SECONDS:
+                            status = 'RUNNING'
+                        else:
+                            state.events.setdefault('slow analysis completed', time.monotonic())
+                self.send_json(200, {'type': 'ANALYSIS', 'status': status})
+            elif self.path == '/fms/v1/files/job/import/job_bad':
+                self.send_json(404, {'message': 'Not found'})
+            else:
+                with state.lock:
+                    state.events[f'GET {self.path}'] = time.monotonic()
+                content = f'content of {self.path}'.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+    return ServiceRequestHandler, state
+
+
+def test_pipeline_downloads_while_analyses_run_and_aggregates_errors(tmp_path, monkeypatch, capsys):
+    handler_class, state = create_service_handler_class()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    (tmp_path / 'input.zip').write_bytes(b'portfolio' * 1000)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+
+    with LocalService(handler_class) as service:
+        configure_local_services(tmp_path, service.base_url)
+
+        pipeline_args = apic.create_arg_parser(is_command_names=['pipeline']).parse_args([
+            'pipeline', '--input-zip', str(tmp_path / 'input.zip'),
+            '--analysis-id', 'fast', '--analysis-id', 'slow', '--analysis-id', 'bad',
+            '--output-path', str(output_dir), '--summary-file', str(tmp_path / 'summary.json'),
+            '--login', 'user', '--password', 'password'])
+        exit_code = apic.execute_command(str(tmp_path), pipeline_args)
+
+    # The import job completed with errors: its errors are downloaded and the analyses run anyway
+    assert sorted(state.submitted_analyses) == ['bad', 'fast', 'slow']
+    assert (output_dir / 'job_IMPORT_job_import_errors.zip').read_bytes() == \
+        b'content of /fms/v1/files/job/import/job_import'
+
+    # The results of the fast analysis are downloaded while the slow one is still running
+    assert state.events['GET /fms/v1/files/job/analyses/fast'] < state.events['slow analysis completed']
+    assert (output_dir / 'analysis_slow_results.zip').read_bytes() == b'content of /fms/v1/files/job/analyses/slow'
+
+    summary_items = {item['analysis_id']: item for item in json.loads((tmp_path / 'summary.json').read_text())}
+    assert {analysis_id: item['status'] for analysis_id, item in summary_items.items()} == \
+        {'fast': 'COMPLETED', 'slow': 'COMPLETED', 'bad': 'FAILED'}
+    assert summary_items['fast']['results_file'] == str(output_dir / 'analysis_fast_results.zip')
+    assert summary_items['bad']['error_file'] is None
+
+    # Both the import job outcome and the failed download make the pipeline fail
+    assert exit_code == 1
+    printed_error = capsys.readouterr().out
+    assert "job id: job_import' finished with status 'COMPLETED_WITH_ERRORS'." in printed_error
+    assert 'Download has failed: 404' in printed_error
@@ -0,0 +1,58 @@
+import time
+import multiprocessing
+from api_client.http_transport import HttpTransport
+from api_client.http_transport import HttpTransportSettings
+from api_client.rate_limiter import RateLimiter
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+PROCESS_COUNT = 4
+REQUESTS_PER_PROCESS = 10
+
+
+def acquire_tokens(state_dir, requests_per_second, burst):
+    rate_limiter = RateLimiter(state_dir, requests_per_second, 0, burst)
+    for _ in range(REQUESTS_PER_PROCESS):
+        rate_limiter.acquire('https://api.example.com/job/v1/jobs/1')
+
+
+def test_rate_limiter_budget_is_shared_by_processes(tmp_path):
+    requests_per_second, burst = 20, 5
+    processes = [
+        multiprocessing.Process(target=acquire_tokens, args=(str(tmp_path), requests_per_second, burst))
+        for _ in range(PROCESS_COUNT)]
+
+    begin_time = time.monotonic()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    duration = time.monotonic() - begin_time
+
+    assert all(process.exitcode == 0 for process in processes)
+    # Everything above the burst is spread at the shared rate
+    assert duration >= (PROCESS_COUNT * REQUESTS_PER_PROCESS - burst) / requests_per_second * 0.95
+
+
+def test_transport_waits_for_service_budget(tmp_path):
+    class ServiceRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            self.send_json(200, {})
+
+    rate_limiter = RateLimiter(str(tmp_path), host_requests_per_second=0, service_requests_per_second=10, burst=2)
+    transport = HttpTransport(HttpTransportSettings(rate_limiter=rate_limiter))
+
+    with LocalService(ServiceRequestHandler) as service:
+        begin_time = time.monotonic()
+        for _ in range(5):
+            transport.get(f'{service.base_url}/job/v1/jobs/1').raise_for_status()
+        duration = time.monotonic() - begin_time
+        # Another service is not limited by the budget of the job service
+        transport.get(f'{service.base_url}/fms/docs/').raise_for_status()
+
+    assert duration >= 0.28
+    stats = rate_limiter.get_stats()
+    assert stats[f'{service.base_url}/job']['requests'] == 5
+    assert stats[f'{service.base_url}/job']['delayed_requests'] == 3
+    assert 0.28 <= stats[f'{service.base_url}/job']['wait_time_in_seconds'] <= 1
+    assert stats[f'{service.base_url}/fms']['delayed_requests'] == 0
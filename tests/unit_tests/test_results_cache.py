@@ -0,0 +1,184 @@
+import os
+import re
+import time
+import pytest
+from types import SimpleNamespace
+from api_client import segmented_download
+from api_client.security import Session
+from api_client.segmented_download import SegmentedDownloadError
+from api_client.file_management_service_client import FileManagementServiceClient
+from api_client.results_cache import ResultsCache
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    results_cache = ResultsCache(str(tmp_path), 'https://service', max_size_in_bytes=250)
+    for analysis_id in ['1', '2', '3']:
+        with open(results_cache.get_download_file_path(analysis_id), 'wb') as download_file:
+            download_file.write(b'x' * 100)
+        results_cache.store(analysis_id, {'etag': f'"{analysis_id}"'})
+        if analysis_id == '2':
+            # The first file is used after the second one
+            time.sleep(0.01)
+            results_cache.record_hit('1')
+
+    assert results_cache.get_validators('1') == {'etag': '"1"', 'last_modified': None}
+    assert results_cache.get_validators('2') is None
+    assert results_cache.get_validators('3') is not None
+    assert results_cache.get_stats()['total_evictions'] == 1
+    assert results_cache.get_stats()['cached_bytes'] == 200
+
+
+def test_files_being_served_are_not_evicted(tmp_path):
+    results_cache = ResultsCache(str(tmp_path), 'https://service', max_size_in_bytes=250)
+    for analysis_id in ['1', '2']:
+        with open(results_cache.get_download_file_path(analysis_id), 'wb') as download_file:
+            download_file.write(b'x' * 100)
+        results_cache.store(analysis_id, {'etag': f'"{analysis_id}"'})
+
+    # Another process is serving the least recently used file
+    with results_cache.lock('1'):
+        with open(results_cache.get_download_file_path('3'), 'wb') as download_file:
+            download_file.write(b'x' * 100)
+        results_cache.store('3', {'etag': '"3"'})
+        assert os.path.isfile(results_cache.get_file_path('1'))
+
+    assert results_cache.get_validators('1') is not None
+    assert results_cache.get_validators('2') is None
+    assert results_cache.get_stats()['total_evictions'] == 1
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO and File Management services serving the results file with its ETag
+    """
+    sso_handler_class, state = create_sso_handler_class(content=b'results v1' * 1000, etag='"v1"', full_downloads=0)
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_GET(self):
+            if self.headers.get('If-None-Match') == state.etag:
+                self.send_empty(304)
+                return
+            with state.lock:
+                state.full_downloads += 1
+            self.send_response(200)
+            self.send_header('ETag', state.etag)
+            self.send_header('Content-Length', str(len(state.content)))
+            self.end_headers()
+            self.wfile.write(state.content)
+
+    return ServiceRequestHandler, state
+
+
+def test_unchanged_results_are_served_from_cache(tmp_path, monkeypatch):
+    handler_class, state = create_service_handler_class()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    output_dirs = [tmp_path / f'out_{n}' for n in range(3)]
+    for output_dir in output_dirs:
+        output_dir.mkdir()
+
+    with LocalService(handler_class) as service:
+        configure_local_services(tmp_path, service.base_url, ['results_cache_enabled = true'])
+
+        arg_parser = apic.create_arg_parser(is_command_names=['download-results'])
+
+        def download_results(output_dir):
+            download_args = arg_parser.parse_args([
+                'download-results', '--analysis-id', '42', '--output-path', str(output_dir),
+                '--login', 'user', '--password', 'password'])
+            assert apic.execute_command(str(tmp_path), download_args) == 0
+            with open(output_dir / 'analysis_42_results.zip', 'rb') as results_file:
+                return results_file.read()
+
+        assert download_results(output_dirs[0]) == state.content
+        assert download_results(output_dirs[1]) == state.content
+        assert state.full_downloads == 1
+
+        # The analysis has been rerun
+        state.content, state.etag = b'results v2' * 1000, '"v2"'
+        assert download_results(output_dirs[2]) == state.content
+        assert state.full_downloads == 2
+
+    results_cache = ResultsCache(str(tmp_path / '.ma' / 'results_cache'), service.base_url)
+    stats = results_cache.get_stats()
+    assert (stats['total_hits'], stats['total_misses'], stats['total_bytes_saved']) == (1, 2, 10000)
+    assert stats['cached_files'] == 1
+    # Files served from the cache before the rerun are not changed by it
+    assert (output_dirs[1] / 'analysis_42_results.zip').read_bytes() == b'results v1' * 1000
+    assert not [file_name for output_dir in output_dirs for file_name in os.listdir(output_dir)
+                if file_name.endswith('.part')]
+
+
+def create_ranged_service_handler_class(is_changed_after_probe=False):
+    """
+    Creates a local stand-in of the results file endpoint answering Range requests and honouring If-Range
+    :param is_changed_after_probe: True - the file is replaced by a new version right after the first byte is sent
+    """
+    state = SimpleNamespace(content=os.urandom(200 * 1024), etag='"v1"', requests=[])
+
+    class ServiceRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            range_header, if_range = self.headers.get('Range'), self.headers.get('If-Range')
+            state.requests.append((range_header, if_range))
+            range_match = re.match(r'^bytes=(\d+)-(\d+)$', range_header or '')
+            if not range_match or (if_range is not None and if_range != state.etag):
+                self.send_content(200, state.content)
+                return
+
+            range_begin, range_end = int(range_match.group(1)), int(range_match.group(2))
+            self.send_content(
+                206, state.content[range_begin:range_end + 1], f'bytes {range_begin}-{range_end}/{len(state.content)}')
+            if is_changed_after_probe and range_header == 'bytes=0-0':
+                state.content, state.etag = os.urandom(200 * 1024), '"v2"'
+
+        def send_content(self, status_code, content, content_range=None):
+            self.send_response(status_code)
+            self.send_header('ETag', state.etag)
+            self.send_header('Content-Length', str(len(content)))
+            if content_range:
+                self.send_header('Content-Range', content_range)
+            self.end_headers()
+            self.wfile.write(content)
+
+    return ServiceRequestHandler, state
+
+
+def download_if_modified(service, destination_file_path):
+    session = Session('user_123', 'top_secret', service.base_url)
+    session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+    result = FileManagementServiceClient(session, service.base_url).download_analysis_result_file_if_modified(
+        '42', str(destination_file_path), segment_count=4)
+    return result
+
+
+def test_revalidating_probe_starts_segmented_download(tmp_path, monkeypatch):
+    monkeypatch.setattr(segmented_download, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    handler_class, state = create_ranged_service_handler_class()
+
+    with LocalService(handler_class) as service:
+        validators = download_if_modified(service, tmp_path / 'results.zip')
+
+    assert validators == {'etag': '"v1"', 'last_modified': None}
+    assert (tmp_path / 'results.zip').read_bytes() == state.content
+    # The file is probed once; every segment is bound to the probed version
+    assert state.requests[0] == ('bytes=0-0', None)
+    assert sorted(state.requests[1:], key=lambda request: int(request[0][6:].split('-')[0])) == [
+        ('bytes=0-65535', '"v1"'),
+        ('bytes=65536-131071', '"v1"'),
+        ('bytes=131072-196607', '"v1"'),
+        ('bytes=196608-204799', '"v1"')]
+
+
+def test_file_changed_after_revalidating_probe_is_not_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(segmented_download, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    handler_class, state = create_ranged_service_handler_class(is_changed_after_probe=True)
+
+    with LocalService(handler_class) as service:
+        with pytest.raises(SegmentedDownloadError, match='has changed during download'):
+            download_if_modified(service, tmp_path / 'results.zip')
+
+    assert not (tmp_path / 'results.zip').exists()
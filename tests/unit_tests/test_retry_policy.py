@@ -0,0 +1,168 @@
+import time
+import pytest
+import requests
+from types import SimpleNamespace
+from api_client.http_transport import HttpTransport
+from api_client.http_transport import HttpTransportSettings
+from api_client.retry_policy import RetryPolicy
+from api_client.retry_policy import CircuitBreakerOpenError
+from api_client.retry_policy import get_service_name
+from api_client.security import Session
+from api_client.job_service_client import JobServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+
+def create_failing_handler_class(failing_request_count, status_code=503, retry_after=None):
+    """
+    Creates a local stand-in of a service which fails the given number of requests before it recovers
+    """
+    state = SimpleNamespace(request_count=0, failing_request_count=failing_request_count)
+
+    class FailingRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            self.handle_request()
+
+        def do_POST(self):
+            self.read_body()
+            self.handle_request()
+
+        def handle_request(self):
+            state.request_count += 1
+            if state.failing_request_count:
+                state.failing_request_count -= 1
+                self.send_response(status_code)
+                if retry_after is not None:
+                    self.send_header('Retry-After', retry_after)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_json(200, {'type': 'ANALYSIS', 'status': 'COMPLETED'})
+
+    return FailingRequestHandler, state
+
+
+def create_transport(**retry_policy_settings):
+    retry_policy = RetryPolicy(min_delay_in_seconds=0.01, max_delay_in_seconds=0.05, **retry_policy_settings)
+    result = HttpTransport(HttpTransportSettings(retry_policy=retry_policy))
+    return result
+
+
+def test_get_is_retried_and_post_only_when_configured():
+    handler_class, state = create_failing_handler_class(2, status_code=502)
+
+    with LocalService(handler_class) as service:
+        url = f'{service.base_url}/job/v1/jobs/1'
+        transport = create_transport()
+        assert transport.get(url).status_code == 200
+        assert state.request_count == 3
+
+        state.failing_request_count = 1
+        assert transport.post(url, data=b'{}').status_code == 502
+        assert create_transport(retry_unsafe_methods=True).post(url, data=b'{}').status_code == 200
+
+    assert transport.service_call_guard.get_stats() == {
+        f'{service.base_url}/job': {'retries': 2, 'circuit_breaker_openings': 0, 'circuit_breaker_rejections': 0}}
+
+
+def test_retry_honours_retry_after_and_gives_up_after_max_retries():
+    handler_class, state = create_failing_handler_class(10, status_code=429, retry_after='1')
+
+    with LocalService(handler_class) as service:
+        transport = create_transport(max_retries=1)
+        begin_time = time.monotonic()
+        response = transport.get(f'{service.base_url}/job/v1/jobs/1')
+
+    assert response.status_code == 429
+    assert state.request_count == 2
+    assert time.monotonic() - begin_time >= 1
+
+
+def test_circuit_breaker_rejects_requests_to_failing_service():
+    handler_class, state = create_failing_handler_class(4, status_code=503)
+
+    with LocalService(handler_class) as service:
+        url = f'{service.base_url}/job/v1/jobs/1'
+        transport = create_transport(
+            max_retries=0, circuit_breaker_failure_threshold=3, circuit_breaker_reset_timeout_in_seconds=0.5)
+        for _ in range(3):
+            assert transport.get(url).status_code == 503
+        with pytest.raises(CircuitBreakerOpenError):
+            transport.get(url)
+        # Other services on the same host are not affected
+        assert transport.get(f'{service.base_url}/fms/docs/').status_code == 503
+        assert state.request_count == 4
+
+        # The trial request after the reset timeout closes the circuit
+        time.sleep(0.5)
+        assert transport.get(url).status_code == 200
+        assert transport.get(url).status_code == 200
+
+    stats = transport.service_call_guard.get_stats()[get_service_name(url)]
+    assert stats['circuit_breaker_openings'] == 1
+    assert stats['circuit_breaker_rejections'] == 1
+
+
+def test_poll_job_outlives_service_outage():
+    handler_class, state = create_failing_handler_class(100, status_code=502)
+
+    with LocalService(handler_class) as service:
+        session = Session('user_123', 'top_secret', service.base_url)
+        session.transport = create_transport(
+            max_retries=1, circuit_breaker_failure_threshold=2, circuit_breaker_reset_timeout_in_seconds=60)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+        js_client = JobServiceClient(session, service.base_url)
+
+        assert js_client.poll_job('job_1') == (None, None)
+        job_status, retry_after = js_client.poll_job('job_1')
+
+    assert job_status is None
+    assert 59 < retry_after <= 60
+    assert state.request_count == 2
+
+
+def test_connection_errors_are_retried():
+    transport = create_transport(max_retries=2)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        # Nothing listens on the port
+        transport.get('http://127.0.0.1:9/job/v1/jobs/1')
+
+    assert transport.service_call_guard.get_stats()['http://127.0.0.1:9/job']['retries'] == 2
+
+
+@pytest.mark.parametrize('trial_error', [
+    requests.exceptions.ChunkedEncodingError('Connection broken: IncompleteRead'),
+    requests.exceptions.InvalidHeader('Invalid header value'),
+    KeyboardInterrupt(),
+    OSError('Rate limiter state is not accessible')])
+def test_trial_request_failing_without_response_does_not_keep_circuit_open(trial_error):
+    handler_class, state = create_failing_handler_class(3, status_code=503)
+
+    with LocalService(handler_class) as service:
+        url = f'{service.base_url}/job/v1/jobs/1'
+        transport = create_transport(
+            max_retries=0, circuit_breaker_failure_threshold=3, circuit_breaker_reset_timeout_in_seconds=0.1)
+        for _ in range(3):
+            assert transport.get(url).status_code == 503
+        time.sleep(0.1)
+
+        # The trial request fails before its response is read, e.g. in the rate limiter or when interrupted
+        transport.rate_limiter = SimpleNamespace(acquire=raise_error(trial_error))
+        with pytest.raises(type(trial_error)):
+            transport.get(url)
+        transport.rate_limiter = None
+
+        # A broken response counts as a failure and opens the circuit again; otherwise the next request is the trial
+        if isinstance(trial_error, requests.exceptions.ChunkedEncodingError):
+            with pytest.raises(CircuitBreakerOpenError):
+                transport.get(url)
+            time.sleep(0.1)
+        assert transport.get(url).status_code == 200
+        assert transport.get(url).status_code == 200
+
+
+def raise_error(error):
+    def raise_it(*args):
+        raise error
+    return raise_it
@@ -0,0 +1,123 @@
+import time
+import threading
+import jwt
+import pytest
+import requests
+from types import SimpleNamespace
+from api_client.security import Session
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+THREAD_COUNT = 32
+CALLS_PER_THREAD = 50
+
+
+def create_sso_handler_class(token_lifetimes_in_seconds=(), failing=False):
+    """
+    Creates a local stand-in of the SSO token endpoint. Token requests are slow, so concurrent callers overlap.
+    """
+    state = SimpleNamespace(issued_tokens=[], revoked_tokens=[], token_request_count=0)
+    lock = threading.Lock()
+
+    class SsoRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            self.read_body()
+            with lock:
+                state.token_request_count += 1
+                token_number = len(state.issued_tokens)
+            time.sleep(0.2)
+            if failing:
+                self.send_empty(500)
+                return
+
+            token_lifetime = token_lifetimes_in_seconds[token_number] \
+                if token_number < len(token_lifetimes_in_seconds) else 3600
+            token = jwt.encode({'exp': int(time.time()) + token_lifetime, 'n': token_number}, 'secret').decode('ascii')
+            with lock:
+                state.issued_tokens.append(token)
+            self.send_json(200, {'id_token': token, 'token_type': 'Bearer'})
+
+        def do_DELETE(self):
+            with lock:
+                state.revoked_tokens.append(Session.remove_prefix_bearer(self.headers['Authorization']))
+            self.send_empty(204)
+
+    return SsoRequestHandler, state
+
+
+def run_concurrently(target):
+    """
+    Runs the target in many threads started at once
+    :return: Results and errors of all threads
+    """
+    barrier = threading.Barrier(THREAD_COUNT)
+    results = []
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(THREAD_COUNT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results, errors
+
+
+def get_auth_tokens(session):
+    result = [Session.remove_prefix_bearer(session.get_auth_header()['Authorization']) for _ in range(CALLS_PER_THREAD)]
+    return result
+
+
+def test_concurrent_first_token_requests_collapse_into_one():
+    handler_class, state = create_sso_handler_class()
+
+    with LocalService(handler_class) as sso:
+        with Session('user_123', 'top_secret', sso.base_url) as session:
+            results, errors = run_concurrently(lambda: get_auth_tokens(session))
+
+    assert errors == []
+    assert state.token_request_count == 1
+    assert {token for tokens in results for token in tokens} == {state.issued_tokens[0]}
+
+
+def test_concurrent_renewals_collapse_into_one():
+    # The first token is within the renewal threshold right away
+    handler_class, state = create_sso_handler_class(token_lifetimes_in_seconds=[10])
+
+    with LocalService(handler_class) as sso:
+        session = Session('user_123', 'top_secret', sso.base_url)
+        expiring_token = session.get_auth_token()
+
+        results, errors = run_concurrently(lambda: get_auth_tokens(session))
+        session.close()
+
+    assert errors == []
+    assert state.token_request_count == 2
+    # Every thread has got the renewed token, and only the expiring token has been revoked during the renewal
+    assert {token for tokens in results for token in tokens} == {state.issued_tokens[1]}
+    assert state.revoked_tokens == [expiring_token, state.issued_tokens[1]]
+
+
+def test_concurrent_callers_share_renewal_failure():
+    handler_class, state = create_sso_handler_class(failing=True)
+
+    with LocalService(handler_class) as sso:
+        with Session('user_123', 'top_secret', sso.base_url) as session:
+            results, errors = run_concurrently(session.get_auth_token)
+            assert state.token_request_count == 1
+
+            # The failed renewal is not reused by the next call
+            with pytest.raises(requests.HTTPError):
+                session.get_auth_token()
+            assert state.token_request_count == 2
+
+    assert results == []
+    assert len(errors) == THREAD_COUNT
+    assert all(isinstance(error, requests.HTTPError) for error in errors)
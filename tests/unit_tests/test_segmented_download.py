@@ -0,0 +1,120 @@
+import os
+import json
+import re
+import pytest
+from types import SimpleNamespace
+from api_client import segmented_download
+from api_client.security import Session
+from api_client.segmented_download import SegmentedDownloadError
+from api_client.file_management_service_client import FileManagementServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+FILE_CONTENT = os.urandom(300 * 1024)
+RANGE_PATTERN = re.compile(r'^bytes=(\d+)-(\d+)$')
+
+
+def create_fms_handler_class(supports_ranges=True, truncated_range_begin=None):
+    """
+    Creates a local stand-in of the results file endpoint
+    :param supports_ranges: True - Range requests are answered with 206; False - the Range header is ignored
+    :param truncated_range_begin: Begin of the byte range whose response is cut in half; None - none is cut
+    """
+    state = SimpleNamespace(ranges=[], truncated_range_begin=truncated_range_begin)
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            range_match = RANGE_PATTERN.match(self.headers.get('Range', ''))
+            if not supports_ranges or not range_match:
+                state.ranges.append(None)
+                self.send_content(200, FILE_CONTENT)
+                return
+
+            range_begin, range_end = int(range_match.group(1)), int(range_match.group(2))
+            state.ranges.append([range_begin, range_end])
+            content = FILE_CONTENT[range_begin:range_end + 1]
+            content_range = f'bytes {range_begin}-{range_end}/{len(FILE_CONTENT)}'
+            if range_begin == state.truncated_range_begin:
+                # The connection is dropped after half of the declared body
+                self.close_connection = True
+                self.send_content(206, content[:len(content) // 2], len(content), content_range)
+                return
+            self.send_content(206, content, content_range=content_range)
+
+        def send_content(self, status_code, content, content_length=None, content_range=None):
+            self.send_response(status_code)
+            self.send_header('Content-Length', str(len(content) if content_length is None else content_length))
+            self.send_header('ETag', '"results-1"')
+            if content_range:
+                self.send_header('Content-Range', content_range)
+            self.end_headers()
+            self.wfile.write(content)
+
+    return FmsRequestHandler, state
+
+
+def create_fms_client(service):
+    session = Session('user_123', 'top_secret', service.base_url)
+    session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+    result = FileManagementServiceClient(session, service.base_url)
+    return result
+
+
+@pytest.fixture(autouse=True)
+def small_segments(monkeypatch):
+    monkeypatch.setattr(segmented_download, 'MIN_SEGMENT_SIZE', 64 * 1024)
+
+
+def test_file_is_downloaded_in_byte_ranges(tmp_path):
+    handler_class, state = create_fms_handler_class()
+    destination_file_path = tmp_path / 'results.zip'
+
+    with LocalService(handler_class) as service:
+        create_fms_client(service).download_analysis_result_file(
+            'analysis_1', str(destination_file_path), segment_count=4)
+
+    assert destination_file_path.read_bytes() == FILE_CONTENT
+    # The probe and four segments of 75 KiB
+    assert state.ranges[0] == [0, 0]
+    assert sorted(state.ranges[1:]) == [[0, 76799], [76800, 153599], [153600, 230399], [230400, 307199]]
+    assert os.listdir(tmp_path) == ['results.zip']
+
+
+def test_truncated_segment_fails_and_download_is_resumed(tmp_path):
+    destination_file_path = tmp_path / 'results.zip'
+    state_file_path = tmp_path / 'results.zip.part.state'
+
+    handler_class, state = create_fms_handler_class(truncated_range_begin=153600)
+    with LocalService(handler_class) as service:
+        with pytest.raises(SegmentedDownloadError, match='is incomplete'):
+            create_fms_client(service).download_analysis_result_file(
+                'analysis_1', str(destination_file_path), segment_count=4)
+
+        # The other segments have finished and are recorded in the sidecar state
+        download_state = json.loads(state_file_path.read_text())
+        assert sorted(download_state['completed']) == [0, 1, 3]
+        assert download_state['validator'] == '"results-1"'
+        assert not destination_file_path.exists()
+
+        state.ranges = []
+        state.truncated_range_begin = None
+        create_fms_client(service).download_analysis_result_file(
+            'analysis_1', str(destination_file_path), segment_count=4)
+
+    # Only the missing segment is downloaded again
+    assert state.ranges == [[0, 0], [153600, 230399]]
+    assert destination_file_path.read_bytes() == FILE_CONTENT
+    assert os.listdir(tmp_path) == ['results.zip']
+
+
+def test_file_is_downloaded_as_single_stream_if_server_ignores_ranges(tmp_path):
+    handler_class, state = create_fms_handler_class(supports_ranges=False)
+    destination_file_path = tmp_path / 'results.zip'
+
+    with LocalService(handler_class) as service:
+        create_fms_client(service).download_analysis_result_file(
+            'analysis_1', str(destination_file_path), segment_count=4)
+
+    assert state.ranges == [None, None]
+    assert destination_file_path.read_bytes() == FILE_CONTENT
+    assert os.listdir(tmp_path) == ['results.zip']
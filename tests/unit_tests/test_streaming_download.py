@@ -0,0 +1,131 @@
+import os
+import hashlib
+import tracemalloc
+import pytest
+import requests
+from types import SimpleNamespace
+from api_client.security import Session
+from api_client.file_management_service_client import DOWNLOAD_CHUNK_SIZE
+from api_client.file_management_service_client import FileManagementServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+FILE_CONTENT = os.urandom(3 * DOWNLOAD_CHUNK_SIZE + 12345)
+LARGE_FILE_BLOCK = os.urandom(64 * 1024)
+LARGE_FILE_BLOCK_COUNT = 512
+
+
+def create_fms_handler_class(is_truncated=False):
+    """
+    Creates a local stand-in of the results and import error file endpoints streaming the files in chunks
+    :param is_truncated: True - the connection is dropped after half of the file is sent
+    """
+    state = SimpleNamespace(paths=[])
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            state.paths.append(self.path)
+            if self.path == '/fms/v1/files/job/analyses/large':
+                self.send_chunked([LARGE_FILE_BLOCK] * LARGE_FILE_BLOCK_COUNT)
+                return
+
+            blocks = [FILE_CONTENT[begin:begin + 64 * 1024] for begin in range(0, len(FILE_CONTENT), 64 * 1024)]
+            if is_truncated:
+                self.close_connection = True
+                self.send_chunked(blocks[:len(blocks) // 2], is_complete=False)
+                return
+            self.send_chunked(blocks)
+
+        def send_chunked(self, blocks, is_complete=True):
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('ETag', '"results-1"')
+            self.end_headers()
+            for block in blocks:
+                self.wfile.write(f'{len(block):x}\r\n'.encode('ascii') + block + b'\r\n')
+            if is_complete:
+                self.wfile.write(b'0\r\n\r\n')
+
+    return FmsRequestHandler, state
+
+
+def create_fms_client(service):
+    session = Session('user_123', 'top_secret', service.base_url)
+    session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+    result = FileManagementServiceClient(session, service.base_url)
+    return result
+
+
+def test_downloaded_files_match_source(tmp_path):
+    handler_class, state = create_fms_handler_class()
+    results_file_path = str(tmp_path / 'results.zip')
+    error_file_path = str(tmp_path / 'errors.txt')
+
+    with LocalService(handler_class) as service:
+        fms_client = create_fms_client(service)
+        fms_client.download_analysis_result_file('1', results_file_path)
+        fms_client.download_job_import_error_file('2', error_file_path)
+
+    for file_path in [results_file_path, error_file_path]:
+        with open(file_path, 'rb') as downloaded_file:
+            assert downloaded_file.read() == FILE_CONTENT
+    assert state.paths == ['/fms/v1/files/job/analyses/1', '/fms/v1/files/job/import/2']
+    assert sorted(os.listdir(tmp_path)) == ['errors.txt', 'results.zip']
+
+
+def test_interrupted_download_leaves_no_file(tmp_path):
+    handler_class, _ = create_fms_handler_class(is_truncated=True)
+    results_file_path = str(tmp_path / 'results.zip')
+
+    with LocalService(handler_class) as service:
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            create_fms_client(service).download_analysis_result_file('1', results_file_path)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_chunk_consumer_leaves_no_file(tmp_path):
+    handler_class, _ = create_fms_handler_class()
+    error_file_path = str(tmp_path / 'errors.txt')
+
+    def consume_chunk(chunk):
+        raise ValueError('Chunk cannot be extracted')
+
+    with LocalService(handler_class) as service:
+        with pytest.raises(ValueError, match='Chunk cannot be extracted'):
+            create_fms_client(service).download_job_import_error_file('2', error_file_path, consume_chunk)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_memory_does_not_grow_with_file_size(tmp_path):
+    handler_class, _ = create_fms_handler_class()
+    results_file_path = str(tmp_path / 'results.zip')
+    file_size = len(LARGE_FILE_BLOCK) * LARGE_FILE_BLOCK_COUNT
+    chunk_sizes = []
+
+    with LocalService(handler_class) as service:
+        fms_client = create_fms_client(service)
+        tracemalloc.start()
+        try:
+            fms_client.download_analysis_result_file(
+                'large',
+                results_file_path,
+                chunk_consumer=lambda chunk: chunk_sizes.append(len(chunk)))
+            _, peak_size = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert max(chunk_sizes) <= DOWNLOAD_CHUNK_SIZE
+    assert sum(chunk_sizes) == file_size
+    # The peak covers a few chunks in flight, not the 32 MiB file
+    assert peak_size < 4 * DOWNLOAD_CHUNK_SIZE
+
+    expected_hash = hashlib.sha256()
+    for _ in range(LARGE_FILE_BLOCK_COUNT):
+        expected_hash.update(LARGE_FILE_BLOCK)
+    downloaded_hash = hashlib.sha256()
+    with open(results_file_path, 'rb') as downloaded_file:
+        for chunk in iter(lambda: downloaded_file.read(DOWNLOAD_CHUNK_SIZE), b''):
+            downloaded_hash.update(chunk)
+    assert downloaded_hash.digest() == expected_hash.digest()
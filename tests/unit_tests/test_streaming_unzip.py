@@ -0,0 +1,147 @@
+import io
+import os
+import zipfile
+import pytest
+import requests
+from api_client.security import Session
+from api_client.file_management_service_client import FileManagementServiceClient
+from api_client.streaming_unzip import StreamingZipExtractor
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+import apic
+
+MEMBERS = {
+    'results/summary.csv': b'id,value\n' + b'1,100\n' * 50000,
+    'results/details.csv': os.urandom(300 * 1024),
+    'readme.txt': b''
+}
+
+
+def create_zip_file(zip_file_path, seekable=True):
+    zip_stream = io.BytesIO()
+    # Zip files written to a non-seekable stream have their sizes in data descriptors after the member data
+    zip_output = zip_stream if seekable else NonSeekableStream(zip_stream)
+    with zipfile.ZipFile(zip_output, 'w') as zip_file:
+        zip_file.writestr('results/', b'')
+        for index, (name, content) in enumerate(MEMBERS.items()):
+            zip_file.writestr(name, content, zipfile.ZIP_DEFLATED if index % 2 == 0 else zipfile.ZIP_STORED)
+
+    with open(zip_file_path, 'wb') as zip_file:
+        zip_file.write(zip_stream.getvalue())
+    return zip_stream.getvalue()
+
+
+class NonSeekableStream(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def tell(self):
+        return self.stream.tell()
+
+    def flush(self):
+        pass
+
+
+def extract_in_chunks(zip_content, zip_file_path, output_dir, chunk_size=4099):
+    zip_extractor = StreamingZipExtractor(str(output_dir), memory_limit_in_bytes=64 * 1024)
+    for position in range(0, len(zip_content), chunk_size):
+        zip_extractor.feed(zip_content[position:position + chunk_size])
+        assert len(zip_extractor.buffer) <= 64 * 1024
+    extracted_file_paths = zip_extractor.finish(str(zip_file_path))
+    return zip_extractor, extracted_file_paths
+
+
+def assert_extracted(output_dir):
+    for name, content in MEMBERS.items():
+        with open(os.path.join(output_dir, *name.split('/')), 'rb') as member_file:
+            assert member_file.read() == content
+
+
+def test_members_are_extracted_while_downloading(tmp_path):
+    zip_file_path = tmp_path / 'results.zip'
+    zip_content = create_zip_file(zip_file_path)
+
+    zip_extractor, extracted_file_paths = extract_in_chunks(zip_content, zip_file_path, tmp_path / 'out')
+
+    assert zip_extractor.fallback_reason is None
+    assert len(extracted_file_paths) == len(MEMBERS) + 1
+    assert_extracted(tmp_path / 'out')
+
+
+def test_data_descriptors_are_extracted_after_download(tmp_path):
+    zip_file_path = tmp_path / 'results.zip'
+    zip_content = create_zip_file(zip_file_path, seekable=False)
+
+    zip_extractor, extracted_file_paths = extract_in_chunks(zip_content, zip_file_path, tmp_path / 'out')
+
+    assert 'data descriptor' in zip_extractor.fallback_reason
+    assert_extracted(tmp_path / 'out')
+
+
+def test_central_directory_differing_from_local_headers_is_followed(tmp_path):
+    zip_file_path = tmp_path / 'results.zip'
+    zip_content = create_zip_file(zip_file_path)
+    # A member which is not in the central directory, e.g. left behind by rewriting the archive in place
+    stale_zip_stream = io.BytesIO()
+    with zipfile.ZipFile(stale_zip_stream, 'w') as stale_zip_file:
+        stale_zip_file.writestr('stale.txt', b'stale')
+    stale_zip_content = stale_zip_stream.getvalue()
+    zip_content = stale_zip_content[:stale_zip_content.index(b'PK\x01\x02')] + zip_content
+    zip_file_path.write_bytes(zip_content)
+
+    zip_extractor, extracted_file_paths = extract_in_chunks(zip_content, zip_file_path, tmp_path / 'out')
+
+    assert 'central directory' in zip_extractor.fallback_reason
+    assert not os.path.exists(tmp_path / 'out' / 'stale.txt')
+    assert_extracted(tmp_path / 'out')
+
+
+def test_results_file_is_extracted_as_it_is_downloaded(tmp_path):
+    zip_content = create_zip_file(tmp_path / 'source.zip')
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(zip_content)))
+            self.end_headers()
+            self.wfile.write(zip_content)
+
+    with LocalService(FmsRequestHandler) as service:
+        session = Session('user_123', 'top_secret', service.base_url)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+        fms_client = FileManagementServiceClient(session, service.base_url)
+
+        zip_extractor = StreamingZipExtractor(str(tmp_path / 'out'))
+        fms_client.download_analysis_result_file(
+            'analysis_1', str(tmp_path / 'results.zip'), segment_count=4, chunk_consumer=zip_extractor.feed)
+        zip_extractor.finish(str(tmp_path / 'results.zip'))
+
+    assert zip_extractor.fallback_reason is None
+    assert (tmp_path / 'results.zip').read_bytes() == zip_content
+    assert_extracted(tmp_path / 'out')
+
+
+def test_extracted_members_are_removed_if_download_fails(tmp_path):
+    zip_content = create_zip_file(tmp_path / 'source.zip')
+    extracting_state = {}
+
+    def download_function(chunk_consumer):
+        # The connection is dropped in the middle of a member
+        for position in range(0, len(zip_content) * 2 // 3, 4099):
+            chunk_consumer(zip_content[position:position + 4099])
+        zip_extractor = chunk_consumer.__self__
+        extracting_state['member_file'] = zip_extractor.member['file']
+        extracting_state['extracted_file_paths'] = [
+            member_path for member_path, size, crc in zip_extractor.extracted_members.values()]
+        raise requests.exceptions.ChunkedEncodingError('Connection broken')
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        apic.download_and_extract_zip_file(download_function, str(tmp_path / 'results.zip'))
+
+    assert extracting_state['member_file'].closed
+    assert extracting_state['extracted_file_paths']
+    # Only the folders are left; no file extracted before the failure remains
+    assert [file_names for dir_path, dir_names, file_names in os.walk(tmp_path / 'results')] == [[], []]
@@ -0,0 +1,45 @@
+import os
+import stat
+from api_client.security import Session
+from api_client.token_cache import TokenCache
+from local_services import LocalService
+from local_services import create_sso_handler_class
+
+
+def test_token_cache_shares_token_between_sessions(tmp_path):
+    handler_class, state = create_sso_handler_class()
+    cache_dir = str(tmp_path / 'token_cache')
+
+    with LocalService(handler_class) as sso:
+        with Session('user_123', 'top_secret', sso.base_url, token_cache=TokenCache(cache_dir)) as session:
+            first_token = session.get_auth_token()
+        second_cache = TokenCache(cache_dir)
+        with Session('user_123', 'top_secret', sso.base_url, token_cache=second_cache) as session:
+            second_token = session.get_auth_token()
+
+    assert first_token == second_token
+    assert len(state.issued_tokens) == 1
+    assert state.revoked_tokens == []
+    assert second_cache.get_stats('user_123', sso.base_url) == \
+        {'hits': 1, 'misses': 0, 'total_hits': 1, 'total_misses': 1}
+
+    cache_file_paths = [path for path in os.listdir(cache_dir) if path.endswith('.json')]
+    assert len(cache_file_paths) == 1
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(os.path.join(cache_dir, cache_file_paths[0])).st_mode) == 0o600
+
+
+def test_token_cache_replaces_expiring_token(tmp_path):
+    # Tokens expire within the renewal threshold, so a cached token is never reused
+    handler_class, state = create_sso_handler_class(token_lifetime_in_seconds=10)
+    cache_dir = str(tmp_path / 'token_cache')
+
+    with LocalService(handler_class) as sso:
+        for _ in range(2):
+            with Session('user_123', 'top_secret', sso.base_url, token_cache=TokenCache(cache_dir)) as session:
+                session.get_auth_token()
+
+        cached_token = TokenCache(cache_dir).load('user_123', sso.base_url)
+
+    assert len(state.issued_tokens) == 2
+    assert cached_token == state.issued_tokens[1]
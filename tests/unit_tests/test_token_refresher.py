@@ -0,0 +1,102 @@
+import time
+import threading
+import jwt
+from types import SimpleNamespace
+from api_client.security import Session
+from api_client.token_refresher import AuthTokenRefresher
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+
+def create_sso_handler_class(token_lifetime_in_seconds=3600, failing_request_count=0):
+    """
+    Creates a local stand-in of the SSO token endpoint
+    """
+    state = SimpleNamespace(issued_tokens=[], revoked_tokens=[], failing_request_count=failing_request_count)
+
+    class SsoRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            self.read_body()
+            if state.failing_request_count:
+                state.failing_request_count -= 1
+                self.send_empty(503)
+                return
+            token = jwt.encode(
+                {'exp': int(time.time()) + token_lifetime_in_seconds, 'n': len(state.issued_tokens)},
+                'secret').decode('ascii')
+            state.issued_tokens.append(token)
+            self.send_json(200, {'id_token': token, 'token_type': 'Bearer'})
+
+        def do_DELETE(self):
+            state.revoked_tokens.append(Session.remove_prefix_bearer(self.headers['Authorization']))
+            self.send_empty(204)
+
+    return SsoRequestHandler, state
+
+
+def test_refresh_swaps_token_and_revokes_replaced_one_later():
+    handler_class, state = create_sso_handler_class()
+
+    with LocalService(handler_class) as sso:
+        session = Session('user_123', 'top_secret', sso.base_url)
+        first_token = session.get_auth_token()
+        refresher = AuthTokenRefresher(session, revocation_delay_in_seconds=60)
+        refresher.start()
+        # Refresh is scheduled the lead time before the expiration
+        assert 3400 < refresher.next_refresh_time - time.time() < 3500
+
+        refresher.refresh()
+        second_token = session.get_auth_token()
+        # The replaced token stays valid for the requests which are already in flight
+        assert state.revoked_tokens == []
+
+        refresher.stop()
+        assert state.revoked_tokens == [first_token]
+        session.close()
+
+    assert second_token == state.issued_tokens[1]
+    assert state.revoked_tokens == [first_token, second_token]
+    assert refresher.get_stats()['refresh_count'] == 1
+
+
+def test_refresh_failure_keeps_current_token():
+    handler_class, state = create_sso_handler_class()
+
+    with LocalService(handler_class) as sso:
+        session = Session('user_123', 'top_secret', sso.base_url, background_token_refresh=True)
+        first_token = session.get_auth_token()
+        state.failing_request_count = 1
+
+        session.token_refresher.refresh()
+        stats = session.token_refresher.get_stats()
+        assert session.get_auth_token() == first_token
+        assert session.token_refresher.next_refresh_time - time.time() < 2
+        session.close()
+
+    assert stats['refresh_count'] == 0
+    assert stats['refresh_failure_count'] == 1
+
+
+def test_refresh_shares_renewal_with_token_callers():
+    # Tokens expire within the renewal threshold, so the callers renew the token while it's being refreshed
+    handler_class, state = create_sso_handler_class(token_lifetime_in_seconds=10)
+
+    class SlowSsoRequestHandler(handler_class):
+        def do_POST(self):
+            time.sleep(0.3)
+            super().do_POST()
+
+    with LocalService(SlowSsoRequestHandler) as sso:
+        session = Session('user_123', 'top_secret', sso.base_url, background_token_refresh=True)
+        first_token = session.get_auth_token()
+        refresh_thread = threading.Thread(target=session.token_refresher.refresh)
+        refresh_thread.start()
+        time.sleep(0.1)
+        second_token = session.get_auth_token()
+        refresh_thread.join()
+        stats = session.token_refresher.get_stats()
+        session.close()
+
+    assert state.issued_tokens == [first_token, second_token]
+    assert stats['refresh_count'] == 1
+    assert state.revoked_tokens == [first_token, second_token]
@@ -0,0 +1,89 @@
+import hashlib
+from api_client.upload_index import UploadIndex
+from local_services import LocalService
+from local_services import SSO_TOKEN_PATH
+from local_services import create_sso_handler_class
+from local_services import configure_local_services
+import apic
+
+
+def test_index_entries_are_bound_to_service_and_user(tmp_path):
+    database_file_path = str(tmp_path / 'upload_index.sqlite')
+    upload_index = UploadIndex(database_file_path, 'https://service', 'user')
+    upload_index.record_upload('hash_1', 100, {'id': 'file_1', 'filename': 'input.zip'})
+    upload_index.record_job('file_1', 'job_1')
+
+    assert upload_index.has_file_size(100)
+    assert not upload_index.has_file_size(101)
+    assert upload_index.find('hash_1')['id'] == 'file_1'
+    assert upload_index.find('hash_1')['job_id'] == 'job_1'
+    assert UploadIndex(database_file_path, 'https://service', 'other_user').find('hash_1') is None
+    assert UploadIndex(database_file_path, 'https://other_service', 'user').find('hash_1') is None
+
+    assert upload_index.forget('file_1')
+    assert upload_index.find('hash_1') is None
+    assert not upload_index.forget('file_1')
+
+
+def create_service_handler_class():
+    """
+    Creates a local stand-in of the SSO, File Management, Dictionary and Job services
+    """
+    sso_handler_class, state = create_sso_handler_class(uploads=0, import_jobs=[])
+
+    class ServiceRequestHandler(sso_handler_class):
+        def do_POST(self):
+            self.read_body()
+            if self.path == SSO_TOKEN_PATH:
+                self.send_token()
+            elif self.path == '/fms/v1/files/job/import':
+                with state.lock:
+                    state.uploads += 1
+                    file_id = f'file_{state.uploads}'
+                self.send_json(200, [{'id': file_id, 'filename': 'input.zip'}])
+            else:
+                file_id = self.path.split('/')[4]
+                with state.lock:
+                    state.import_jobs.append(file_id)
+                self.send_json(200, {'jobId': f'job_{len(state.import_jobs)}'})
+
+        def do_GET(self):
+            self.send_json(200, {'type': 'IMPORT', 'status': 'COMPLETED'})
+
+    return ServiceRequestHandler, state
+
+
+def test_identical_input_zip_is_not_uploaded_again(tmp_path, monkeypatch):
+    handler_class, state = create_service_handler_class()
+    monkeypatch.setenv('HOME', str(tmp_path))
+    content = b'portfolio' * 1000
+    (tmp_path / 'delivery_1.zip').write_bytes(content)
+    (tmp_path / 'delivery_2.zip').write_bytes(content)
+    (tmp_path / 'other.zip').write_bytes(content[::-1])
+
+    with LocalService(handler_class) as service:
+        configure_local_services(tmp_path, service.base_url, ['upload_dedup_enabled = true'])
+
+        arg_parser = apic.create_arg_parser(is_command_names=['import'])
+
+        def run_import(file_name, *options):
+            import_args = arg_parser.parse_args([
+                'import', '--input-zip', str(tmp_path / file_name), '--login', 'user', '--password', 'password',
+                *options])
+            return apic.execute_command(str(tmp_path), import_args)
+
+        assert run_import('delivery_1.zip') == 0
+        # The same content delivered again reuses the uploaded file
+        assert run_import('delivery_2.zip') == 0
+        # A different content of the same size is uploaded
+        assert run_import('other.zip') == 0
+        assert run_import('delivery_2.zip', '--force-upload') == 0
+
+    assert state.uploads == 3
+    assert state.import_jobs == ['file_1', 'file_1', 'file_2', 'file_3']
+
+    # The file has been hashed while being uploaded
+    upload_index = UploadIndex(str(tmp_path / '.ma' / 'upload_index.sqlite'), service.base_url, 'user')
+    indexed_file_info = upload_index.find(hashlib.sha256(content).hexdigest())
+    assert indexed_file_info['id'] == 'file_3'
+    assert indexed_file_info['job_id'] == 'job_4'
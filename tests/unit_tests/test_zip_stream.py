@@ -0,0 +1,91 @@
+import io
+import os
+import zipfile
+from api_client import zip_stream
+from api_client.zip_stream import DirectoryZipStream
+from api_client.security import Session
+from api_client.file_management_service_client import FileManagementServiceClient
+from local_services import LocalService
+from local_services import LocalServiceRequestHandler
+
+
+def create_input_dir(input_dir):
+    files = {
+        'portfolio.csv': b'id,balance\n' + b''.join(b'%d,%d.25\n' % (n, n * 13) for n in range(100000)),
+        'reference/rates.csv': os.urandom(200 * 1024),
+        'reference/empty.csv': b'',
+        'reference/résumé.csv': b'a,b\n1,2\n'
+    }
+    for name, content in files.items():
+        file_path = os.path.join(input_dir, *name.split('/'))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as input_file:
+            input_file.write(content)
+    return files
+
+
+def assert_zip_content(zip_content, files):
+    with zipfile.ZipFile(io.BytesIO(zip_content)) as zip_file:
+        assert zip_file.testzip() is None
+        assert sorted(zip_file.namelist()) == sorted(files)
+        for name, content in files.items():
+            assert zip_file.read(name) == content
+
+
+def test_directory_is_zipped_in_parallel_blocks(tmp_path):
+    files = create_input_dir(tmp_path)
+
+    directory_zip_stream = DirectoryZipStream(str(tmp_path), worker_count=3, block_size=64 * 1024)
+    zip_content = b''.join(directory_zip_stream)
+
+    assert_zip_content(zip_content, files)
+    assert directory_zip_stream.member_count == len(files)
+    assert directory_zip_stream.archive_size == len(zip_content)
+    # The blocks compressed independently keep the compression ratio of the whole file
+    with zipfile.ZipFile(io.BytesIO(zip_content)) as zip_file:
+        compressed_size = zip_file.getinfo('portfolio.csv').compress_size
+    assert compressed_size < get_zipfile_compressed_size(files['portfolio.csv']) * 1.02
+
+
+def get_zipfile_compressed_size(content):
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('file', content)
+    with zipfile.ZipFile(zip_buffer) as zip_file:
+        result = zip_file.getinfo('file').compress_size
+    return result
+
+
+def test_large_members_are_written_with_zip64_extensions(tmp_path, monkeypatch):
+    files = create_input_dir(tmp_path)
+    monkeypatch.setattr(zip_stream, 'ZIP64_SIZE_LIMIT', 100 * 1024)
+
+    zip_content = b''.join(DirectoryZipStream(str(tmp_path), block_size=64 * 1024))
+
+    assert_zip_content(zip_content, files)
+
+
+def test_directory_is_zipped_into_upload_body(tmp_path):
+    files = create_input_dir(tmp_path / 'portfolio_2019')
+    uploads = []
+
+    class FmsRequestHandler(LocalServiceRequestHandler):
+        def do_POST(self):
+            assert self.headers['Transfer-Encoding'] == 'chunked'
+            uploads.append((self.headers['Content-Type'], self.read_body()))
+            self.send_json(200, [{'id': 'file_1', 'filename': 'portfolio_2019.zip'}])
+
+    with LocalService(FmsRequestHandler) as service:
+        session = Session('user_123', 'top_secret', service.base_url)
+        session.get_auth_header = lambda: {'Authorization': 'Bearer test'}
+        fms_client = FileManagementServiceClient(session, service.base_url)
+
+        files_info = fms_client.import_file_stream(
+            DirectoryZipStream(str(tmp_path / 'portfolio_2019')), 'portfolio_2019.zip', 'raw')
+
+    assert files_info[0]['id'] == 'file_1'
+    content_type, body = uploads[0]
+    boundary = content_type.split('boundary=')[1].encode('ascii')
+    file_part = body.split(b'--' + boundary)[2]
+    assert b'filename="portfolio_2019.zip"' in file_part
+    assert_zip_content(file_part.split(b'\r\n\r\n', 1)[1][:-2], files)